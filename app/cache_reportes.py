@@ -0,0 +1,223 @@
+"""
+Caché en disco de los archivos de reportes ya generados (XLSX, CSV, CSV.gz).
+
+La clave combina el tipo de reporte, el formato, los filtros y una marca de agua
+de los datos: la cantidad y el mayor id_registro de los registros dentro de los
+filtros, más VersionReportes (contador en la base de datos que se incrementa en
+la misma transacción que una edición o eliminación). Un registro nuevo solo
+cambia la marca de agua de los reportes cuyo rango de fechas, empleado o
+contrato lo incluyen; el resto se sigue sirviendo del disco. ResumenDiario se
+actualiza en la misma transacción que el registro, así que nunca se cachea un
+resumen viejo con la marca de agua nueva.
+
+Los archivos viven en REPORTES_CACHE_DIR (compartido entre workers si el
+directorio lo está). Cada acierto actualiza la fecha de modificación del archivo
+y, al superar REPORTES_CACHE_MAX_MB, se eliminan los usados hace más tiempo (LRU).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from django.conf import settings
+from django.db.models import Count, Max
+from .models import RegistroAsistencia
+from .services import ReporteService
+from .caches import VersionReportes
+
+logger = logging.getLogger(__name__)
+
+
+class CacheReportes:
+    """Guarda y recupera archivos de reportes por clave de contenido."""
+
+    EXTENSION = '.reporte'
+    BLOQUE_COPIA = 64 * 1024
+    TEMPORAL_ABANDONADO = 24 * 3600  # Segundos tras los que se borra un .tmp de una escritura interrumpida
+
+    @staticmethod
+    def activa():
+        """True si la caché está habilitada (REPORTES_CACHE_MAX_MB > 0)."""
+        return settings.REPORTES_CACHE_MAX_MB > 0
+
+    @staticmethod
+    def _limite_bytes():
+        return settings.REPORTES_CACHE_MAX_MB * 1024 * 1024
+
+    @staticmethod
+    def marca_agua(filtros):
+        """
+        Cantidad y mayor id_registro de los registros que entran en el reporte.
+        La cantidad cubre los ids que se confirman fuera de orden (con Postgres una
+        transacción puede confirmar un id menor después de uno mayor).
+        El resumen diario se deriva de los mismos registros, así que comparte la marca.
+
+        Args:
+            filtros: dict devuelto por ReporteService.obtener_filtros
+
+        Returns:
+            list: [cantidad, mayor id_registro] ([0, 0] si no hay registros)
+        """
+        registros = ReporteService.filtrar_registros(RegistroAsistencia.objects.all(), filtros)
+        datos = registros.aggregate(cantidad=Count('id_registro'), ultimo=Max('id_registro'))
+        return [datos['cantidad'], datos['ultimo'] or 0]
+
+    @staticmethod
+    def clave(tipo, formato, filtros):
+        """
+        Clave del archivo para los datos actuales.
+
+        Args:
+            tipo: 'asistencia' o 'resumen'
+            formato: Uno de ExportService.FORMATOS
+            filtros: dict devuelto por ReporteService.obtener_filtros
+
+        Returns:
+            str: Hash hexadecimal (también sirve como ETag)
+        """
+        datos = json.dumps([
+            tipo, formato, sorted(filtros.items()),
+            CacheReportes.marca_agua(filtros), VersionReportes.obtener(),
+        ], default=str)
+        return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _ruta(clave):
+        return os.path.join(settings.REPORTES_CACHE_DIR, clave + CacheReportes.EXTENSION)
+
+    @staticmethod
+    def abrir(clave):
+        """
+        Abre el archivo cacheado y lo marca como usado recientemente.
+
+        Returns:
+            Archivo abierto en modo binario o None si no está en caché
+        """
+        ruta = CacheReportes._ruta(clave)
+        try:
+            archivo = open(ruta, 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass  # Otro worker lo eliminó; el archivo abierto sigue siendo legible
+        return archivo
+
+    @staticmethod
+    def _temporal():
+        os.makedirs(settings.REPORTES_CACHE_DIR, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=settings.REPORTES_CACHE_DIR, suffix='.tmp', delete=False)
+
+    @staticmethod
+    def _confirmar(temporal, clave):
+        """Publica el temporal con su nombre definitivo (reemplazo atómico) y aplica el límite."""
+        temporal.close()
+        if os.path.getsize(temporal.name) > CacheReportes._limite_bytes():
+            os.unlink(temporal.name)
+            return
+        os.replace(temporal.name, CacheReportes._ruta(clave))
+        CacheReportes.recortar()
+
+    @staticmethod
+    def guardar_bloques(clave, bloques):
+        """
+        Reenvía los bloques de una respuesta mientras los copia a la caché.
+        El archivo se publica solo si la respuesta se envió completa.
+
+        Args:
+            clave: Clave devuelta por clave()
+            bloques: Iterable de bytes
+
+        Yields:
+            bytes: Los mismos bloques
+        """
+        try:
+            temporal = CacheReportes._temporal()
+        except OSError:
+            logger.exception("No se pudo crear el archivo de caché de reportes")
+            yield from bloques
+            return
+        completo = False
+        try:
+            for bloque in bloques:
+                temporal.write(bloque)
+                yield bloque
+            completo = True
+        finally:
+            try:
+                if completo:
+                    CacheReportes._confirmar(temporal, clave)
+                else:
+                    temporal.close()
+                    os.unlink(temporal.name)
+            except OSError:
+                logger.exception("No se pudo guardar el reporte %s en caché", clave)
+
+    @staticmethod
+    def guardar_archivo(clave, origen):
+        """
+        Copia a la caché un archivo ya generado (p. ej. por procesar_reportes).
+
+        Args:
+            clave: Clave devuelta por clave()
+            origen: Archivo binario abierto; se lee desde la posición actual
+        """
+        try:
+            temporal = CacheReportes._temporal()
+            try:
+                shutil.copyfileobj(origen, temporal, CacheReportes.BLOQUE_COPIA)
+            except BaseException:
+                temporal.close()
+                os.unlink(temporal.name)
+                raise
+            CacheReportes._confirmar(temporal, clave)
+        except OSError:
+            logger.exception("No se pudo guardar el reporte %s en caché", clave)
+
+    @staticmethod
+    def recortar():
+        """
+        Elimina los archivos usados hace más tiempo hasta quedar bajo REPORTES_CACHE_MAX_MB.
+
+        Returns:
+            int: Archivos eliminados
+        """
+        archivos = []
+        total = 0
+        try:
+            with os.scandir(settings.REPORTES_CACHE_DIR) as entradas:
+                for entrada in entradas:
+                    try:
+                        info = entrada.stat()
+                    except FileNotFoundError:
+                        continue
+                    if entrada.name.endswith('.tmp'):
+                        if time.time() - info.st_mtime > CacheReportes.TEMPORAL_ABANDONADO:
+                            try:
+                                os.unlink(entrada.path)
+                            except FileNotFoundError:
+                                pass
+                        continue
+                    if not entrada.name.endswith(CacheReportes.EXTENSION):
+                        continue
+                    archivos.append((info.st_mtime, info.st_size, entrada.path))
+                    total += info.st_size
+        except FileNotFoundError:
+            return 0
+
+        limite = CacheReportes._limite_bytes()
+        eliminados = 0
+        for _, tamano, ruta in sorted(archivos):
+            if total <= limite:
+                break
+            try:
+                os.unlink(ruta)
+                eliminados += 1
+            except FileNotFoundError:
+                pass
+            total -= tamano
+        return eliminados
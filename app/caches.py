@@ -0,0 +1,494 @@
+"""
+Cachés para datos de consulta frecuente (memoria del proceso y backend de caché de Django).
+Se invalidan mediante señales de los modelos (ver signals.py).
+"""
+
+import asyncio
+import bisect
+import hashlib
+import threading
+import unicodedata
+import weakref
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from .models import Empleado, TipoAsistencia, DispositivoEmpleado, RegistroAsistencia, VersionDatos
+
+
+def resumen_empleado(empleado):
+    """
+    Datos del empleado que devuelven las APIs de identificación y búsqueda por QR.
+
+    Args:
+        empleado: Instancia de Empleado
+
+    Returns:
+        dict: id, nombres, apellidos, nombre_completo y dni
+    """
+    return {
+        'id': empleado.id_empleado,
+        'nombres': empleado.nombres,
+        'apellidos': empleado.apellidos,
+        'nombre_completo': empleado.nombre_completo,
+        'dni': empleado.dni,
+    }
+
+
+class CacheVersionada:
+    """
+    Base para datos cacheados en memoria del proceso con invalidación por versión.
+
+    Cada proceso guarda su propia copia junto con la versión con la que se cargó.
+    La versión vigente es un contador en la base de datos (VersionDatos) que se
+    incrementa en la misma transacción que el cambio; el backend de caché de
+    Django solo la guarda por VERSION_TTL segundos para no consultarla en cada
+    uso. Con Redis la invalidación se ve al instante en todos los workers; con
+    la caché local, como mucho VERSION_TTL segundos después.
+
+    Una recarga a la vez por proceso: los hilos (y las corrutinas de cada event
+    loop) que encuentran la versión vencida esperan a la misma reconstrucción.
+    Las subclases definen VERSION_KEY y _construir().
+    """
+
+    VERSION_KEY = None
+    VERSION_TTL = 5
+
+    _version = None
+    _lock = threading.Lock()
+    _alocks = weakref.WeakKeyDictionary()  # event loop -> asyncio.Lock
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._lock = threading.Lock()
+        cls._alocks = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def _version_vigente(cls):
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            version = VersionDatos.obtener(cls.VERSION_KEY)
+            cache.set(cls.VERSION_KEY, version, cls.VERSION_TTL)
+        return version
+
+    @classmethod
+    async def _aversion_vigente(cls):
+        version = await cache.aget(cls.VERSION_KEY)
+        if version is None:
+            version = await VersionDatos.aobtener(cls.VERSION_KEY)
+            await cache.aset(cls.VERSION_KEY, version, cls.VERSION_TTL)
+        return version
+
+    @classmethod
+    def _construir(cls):
+        raise NotImplementedError
+
+    @classmethod
+    def _cargar(cls):
+        if cls._version_vigente() == cls._version:
+            return
+        with cls._lock:
+            # Otro hilo pudo reconstruir mientras se esperaba el lock
+            version = cls._version_vigente()
+            if version == cls._version:
+                return
+            cls._construir()
+            cls._version = version
+
+    @classmethod
+    async def _acargar(cls):
+        """Versión async de _cargar para las vistas ASGI."""
+        if await cls._aversion_vigente() == cls._version:
+            return
+        loop = asyncio.get_running_loop()
+        lock = cls._alocks.get(loop)
+        if lock is None:
+            lock = cls._alocks[loop] = asyncio.Lock()
+        async with lock:
+            if await cls._aversion_vigente() == cls._version:
+                return
+            await sync_to_async(cls._cargar)()
+
+    @classmethod
+    def invalidar(cls):
+        """
+        Incrementa la versión (dentro de la transacción en curso) para que todos
+        los procesos recarguen los datos; la copia en la caché se descarta al confirmar.
+        """
+        VersionDatos.incrementar(cls.VERSION_KEY)
+        cls._version = None
+        transaction.on_commit(lambda: cache.delete(cls.VERSION_KEY))
+
+
+class CatalogoTipos(CacheVersionada):
+    """Catálogo de tipos de asistencia cacheado en memoria del proceso."""
+
+    VERSION_KEY = 'catalogo_tipos_version'
+
+    _tipos = []
+    _por_id = {}
+    _por_nombre = {}
+    _unicos = frozenset()
+    _con_descripcion = frozenset()
+
+    @classmethod
+    def _construir(cls):
+        tipos = list(TipoAsistencia.objects.order_by('id_tipo'))
+        cls._tipos = tipos
+        cls._por_id = {t.id_tipo: t for t in tipos}
+        cls._por_nombre = {t.nombre_asistencia.lower(): t.id_tipo for t in tipos}
+        cls._unicos = frozenset(t.id_tipo for t in tipos if t.es_tipo_unico)
+        cls._con_descripcion = frozenset(t.id_tipo for t in tipos if t.requiere_descripcion)
+
+    @classmethod
+    def todos(cls):
+        """
+        Retorna todos los tipos de asistencia ordenados por id.
+
+        Returns:
+            list: Instancias de TipoAsistencia (no deben modificarse)
+        """
+        cls._cargar()
+        return cls._tipos
+
+    @classmethod
+    def obtener(cls, id_tipo):
+        """
+        Obtiene un tipo de asistencia por su id.
+
+        Args:
+            id_tipo: ID del tipo (int o str)
+
+        Returns:
+            TipoAsistencia: Instancia cacheada
+
+        Raises:
+            TipoAsistencia.DoesNotExist: Si el id no existe o no es numérico
+        """
+        cls._cargar()
+        try:
+            return cls._por_id[int(id_tipo)]
+        except (KeyError, TypeError, ValueError):
+            raise TipoAsistencia.DoesNotExist(f"TipoAsistencia {id_tipo!r} no existe")
+
+    @classmethod
+    def id_por_nombre(cls, nombre):
+        """
+        Obtiene el id de un tipo por su nombre (sin distinguir mayúsculas).
+
+        Returns:
+            int o None si no existe
+        """
+        cls._cargar()
+        return cls._por_nombre.get(str(nombre).lower())
+
+    @classmethod
+    def es_unico(cls, id_tipo):
+        """Verifica si el tipo solo puede registrarse una vez por día."""
+        cls._cargar()
+        return id_tipo in cls._unicos
+
+    @classmethod
+    def requiere_descripcion(cls, id_tipo):
+        """Verifica si el tipo requiere descripción adicional."""
+        cls._cargar()
+        return id_tipo in cls._con_descripcion
+
+
+class CacheFingerprint:
+    """
+    Caché del vínculo fingerprint -> empleado sobre el backend de caché de Django.
+
+    Guarda un resumen del empleado (no la instancia) para responder la
+    auto-identificación sin consultar la base de datos. Los fingerprints no
+    vinculados también se cachean, con un TTL corto (caché negativa).
+    """
+
+    PREFIJO = 'fp:'
+    NO_VINCULADO = {'id': None}
+
+    @classmethod
+    def _clave(cls, fingerprint):
+        return cls.PREFIJO + hashlib.sha1(str(fingerprint).encode()).hexdigest()
+
+    @classmethod
+    def obtener(cls, fingerprint):
+        """
+        Obtiene el empleado vinculado a un fingerprint.
+
+        Args:
+            fingerprint: ID del dispositivo
+
+        Returns:
+            dict: Resumen del empleado o None si no está vinculado
+        """
+        clave = cls._clave(fingerprint)
+        valor = cache.get(clave)
+        if valor is None:
+            empleado = DispositivoEmpleado.obtener_empleado_por_fingerprint(fingerprint)
+            if empleado:
+                valor = resumen_empleado(empleado)
+                cache.set(clave, valor, settings.FINGERPRINT_CACHE_TTL)
+            else:
+                valor = cls.NO_VINCULADO
+                cache.set(clave, valor, settings.FINGERPRINT_CACHE_TTL_NEGATIVO)
+        return valor if valor['id'] is not None else None
+
+    @classmethod
+    async def aobtener(cls, fingerprint):
+        """Versión async de obtener (caché y ORM async) para las vistas ASGI."""
+        clave = cls._clave(fingerprint)
+        valor = await cache.aget(clave)
+        if valor is None:
+            vinculo = await DispositivoEmpleado.objects.select_related('empleado') \
+                .filter(fingerprint=fingerprint).afirst()
+            if vinculo:
+                valor = resumen_empleado(vinculo.empleado)
+                await cache.aset(clave, valor, settings.FINGERPRINT_CACHE_TTL)
+            else:
+                valor = cls.NO_VINCULADO
+                await cache.aset(clave, valor, settings.FINGERPRINT_CACHE_TTL_NEGATIVO)
+        return valor if valor['id'] is not None else None
+
+    @classmethod
+    def invalidar(cls, *fingerprints):
+        """Elimina de la caché los fingerprints indicados."""
+        cache.delete_many([cls._clave(fp) for fp in fingerprints])
+
+
+class IndiceQR(CacheVersionada):
+    """
+    Índice en memoria del proceso código QR -> resumen del empleado.
+
+    Se construye en el primer escaneo con una sola consulta y se reconstruye
+    cuando las señales de Empleado cambian la versión. Un código que no está
+    en el índice se busca en la base de datos y, si existe, se agrega.
+    """
+
+    VERSION_KEY = 'indice_qr_version'
+
+    _por_codigo = {}
+
+    @classmethod
+    def _construir(cls):
+        filas = Empleado.objects.exclude(codigo_qr__isnull=True).exclude(codigo_qr='') \
+            .values_list('codigo_qr', 'id_empleado', 'nombres', 'apellidos', 'dni')
+        cls._por_codigo = {
+            codigo: {
+                'id': id_empleado,
+                'nombres': nombres,
+                'apellidos': apellidos,
+                'nombre_completo': f"{nombres} {apellidos}",
+                'dni': dni,
+            }
+            for codigo, id_empleado, nombres, apellidos, dni in filas
+        }
+
+    @classmethod
+    def obtener(cls, codigo_qr):
+        """
+        Obtiene el empleado de un código QR.
+
+        Args:
+            codigo_qr: Código QR escaneado
+
+        Returns:
+            dict: Resumen del empleado o None si el código no existe
+        """
+        cls._cargar()
+        empleado = cls._por_codigo.get(codigo_qr)
+        if empleado is None:
+            instancia = Empleado.buscar_por_codigo_qr(codigo_qr)
+            if instancia is None:
+                return None
+            empleado = cls._por_codigo[codigo_qr] = resumen_empleado(instancia)
+        return empleado
+
+    @classmethod
+    async def aobtener(cls, codigo_qr):
+        """Versión async de obtener para las vistas ASGI."""
+        await cls._acargar()
+        empleado = cls._por_codigo.get(codigo_qr)
+        if empleado is None:
+            instancia = await Empleado.objects.filter(codigo_qr=codigo_qr).afirst()
+            if instancia is None:
+                return None
+            empleado = cls._por_codigo[codigo_qr] = resumen_empleado(instancia)
+        return empleado
+
+
+def normalizar_busqueda(texto):
+    """
+    Normaliza un texto para búsquedas: minúsculas y sin tildes (José -> jose, Ñ -> n).
+
+    Args:
+        texto: Texto a normalizar
+
+    Returns:
+        str
+    """
+    descompuesto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+class IndiceEmpleados(CacheVersionada):
+    """
+    Índice de búsqueda por prefijo de empleados en memoria del proceso.
+
+    Cada palabra de nombres y apellidos (normalizada) y el DNI se guardan como
+    claves (palabra, posición) en una lista ordenada; un prefijo se resuelve con
+    bisect sobre esa lista. El ETag es una huella de los datos indexados
+    (cantidad y hash de las filas): es igual en todos los workers que tienen los
+    mismos empleados y cambia cuando el índice se reconstruye con datos distintos.
+    """
+
+    VERSION_KEY = 'indice_empleados_version'
+    POR_PAGINA = 20
+    MAX_POR_PAGINA = 50
+
+    _empleados = []  # Resúmenes ordenados por apellidos y nombres
+    _claves = []
+    _huella = ''
+
+    @classmethod
+    def _construir(cls):
+        filas = Empleado.objects.order_by('apellidos', 'nombres', 'id_empleado') \
+            .values_list('id_empleado', 'nombres', 'apellidos', 'dni')
+        empleados = []
+        claves = []
+        huella = hashlib.sha1()
+        for posicion, (id_empleado, nombres, apellidos, dni) in enumerate(filas):
+            huella.update(f"{id_empleado}\x1f{nombres}\x1f{apellidos}\x1f{dni}\x1e".encode())
+            empleados.append({
+                'id': id_empleado,
+                'nombres': nombres,
+                'apellidos': apellidos,
+                'nombre_completo': f"{nombres} {apellidos}",
+                'dni': dni,
+            })
+            # El DNI se guarda como entero: se indexa también con los ceros a la izquierda
+            palabras = set(normalizar_busqueda(f"{nombres} {apellidos}").split())
+            palabras.update({str(dni), f"{dni:08d}"})
+            claves.extend((palabra, posicion) for palabra in palabras)
+        claves.sort()
+        cls._empleados = empleados
+        cls._claves = claves
+        cls._huella = f"{len(empleados)}-{huella.hexdigest()[:20]}"
+
+    @classmethod
+    def _posiciones(cls, prefijo):
+        # Recorre por índice desde el primer candidato: copiar la cola de la lista
+        # costaría lo mismo que un recorrido completo aunque haya pocas coincidencias
+        claves = cls._claves
+        posiciones = set()
+        for i in range(bisect.bisect_left(claves, (prefijo,)), len(claves)):
+            palabra, posicion = claves[i]
+            if not palabra.startswith(prefijo):
+                break
+            posiciones.add(posicion)
+        return posiciones
+
+    @classmethod
+    def _buscar(cls, texto, pagina, por_pagina):
+        terminos = normalizar_busqueda(texto).split()
+        if terminos:
+            # Cada término debe ser prefijo de alguna palabra (o del DNI) del empleado
+            conjuntos = sorted((cls._posiciones(t) for t in terminos), key=len)
+            posiciones = sorted(conjuntos[0].intersection(*conjuntos[1:]))
+        else:
+            posiciones = range(len(cls._empleados))
+        inicio = (pagina - 1) * por_pagina
+        return {
+            'resultados': [cls._empleados[i] for i in posiciones[inicio:inicio + por_pagina]],
+            'pagina': pagina,
+            'total': len(posiciones),
+            'hay_mas': inicio + por_pagina < len(posiciones),
+        }
+
+    @classmethod
+    def buscar(cls, texto, pagina=1, por_pagina=POR_PAGINA):
+        """
+        Busca empleados cuyas palabras empiecen con cada término del texto.
+
+        Args:
+            texto: Términos separados por espacios (nombres, apellidos o DNI);
+                   sin términos devuelve todos
+            pagina: Número de página (desde 1)
+            por_pagina: Resultados por página (máximo MAX_POR_PAGINA)
+
+        Returns:
+            dict: resultados (resúmenes en orden alfabético), pagina, total y hay_mas
+        """
+        cls._cargar()
+        return cls._buscar(texto, pagina, min(por_pagina, cls.MAX_POR_PAGINA))
+
+    @classmethod
+    async def abuscar(cls, texto, pagina=1, por_pagina=POR_PAGINA):
+        """Versión async de buscar para las vistas ASGI."""
+        await cls._acargar()
+        return cls._buscar(texto, pagina, min(por_pagina, cls.MAX_POR_PAGINA))
+
+    @classmethod
+    async def aversion(cls):
+        """
+        Huella de los datos del índice vigente (se usa como ETag).
+
+        Returns:
+            str: Cantidad de empleados y hash de sus filas
+        """
+        await cls._acargar()
+        return cls._huella
+
+
+class UltimoRegistro:
+    """
+    Último id_registro (marca de agua) para los tableros que consultan cambios.
+
+    Se guarda en el backend de caché con un TTL corto y se borra al insertar
+    registros (ver signals.py). Con la caché local de cada proceso, el TTL acota
+    el retraso con que un worker ve lo insertado por otro.
+    """
+
+    CLAVE = 'ultimo_registro_id'
+    TTL = 5
+
+    @classmethod
+    def obtener(cls):
+        """
+        Retorna el mayor id_registro (0 si no hay registros).
+
+        Returns:
+            int
+        """
+        valor = cache.get(cls.CLAVE)
+        if valor is None:
+            valor = RegistroAsistencia.objects.aggregate(ultimo=Max('id_registro'))['ultimo'] or 0
+            cache.set(cls.CLAVE, valor, cls.TTL)
+        return valor
+
+    @classmethod
+    def invalidar(cls):
+        """Descarta la marca de agua para que la siguiente consulta la recalcule."""
+        cache.delete(cls.CLAVE)
+
+
+class VersionReportes(CacheVersionada):
+    """
+    Versión de los datos de los reportes que no se refleja en la marca de agua de
+    registros: ediciones o eliminaciones de registros, cambios de empleados o tipos
+    y reconstrucciones del resumen. Forma parte de la clave de CacheReportes.
+    """
+
+    VERSION_KEY = 'reportes_version'
+
+    @classmethod
+    def obtener(cls):
+        """
+        Lee el contador directamente de la base de datos (sin la caché de VERSION_TTL):
+        un reporte servido con una versión vieja podría tener datos ya editados.
+
+        Returns:
+            int: Versión vigente
+        """
+        return VersionDatos.obtener(cls.VERSION_KEY)
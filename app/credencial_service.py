@@ -0,0 +1,208 @@
+"""
+Servicio para generar credenciales (fotochecks) con el código QR de cada empleado.
+Produce un ZIP de PNGs o un PDF de páginas con varias credenciales, generados
+por bloques en memoria y enviados a medida que se producen, sin escribir archivos.
+"""
+
+import io
+import zipfile
+import zlib
+from PIL import Image, ImageDraw, ImageFont
+from django.db.models import Q
+from .models import Empleado
+from .qr_service import QRService, construir_qr, renderizar_png
+
+
+class _Salida(io.RawIOBase):
+    """Destino de escritura que acumula bytes hasta que se retiran con vaciar()."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+class CredencialService:
+    """Servicio para exportar credenciales QR de empleados."""
+
+    CHUNK_SIZE = 200  # Empleados leídos por lote
+
+    # Página A4 a 150 dpi con una grilla de 3 x 4 credenciales
+    DPI = 150
+    PAGINA_PX = (1240, 1754)
+    PAGINA_PT = (595.28, 841.89)
+    COLUMNAS = 3
+    FILAS = 4
+    QR_PX = 300
+
+    @staticmethod
+    def obtener_empleados(filtros=None):
+        """
+        Obtiene los empleados a incluir, asignando códigos a quienes no lo tienen.
+
+        Args:
+            filtros: dict con empleado_id y/o contrato (opcional)
+
+        Returns:
+            QuerySet: Empleados ordenados por apellidos y nombres
+        """
+        empleados = Empleado.objects.order_by('apellidos', 'nombres')
+        filtros = filtros or {}
+        if 'empleado_id' in filtros:
+            empleados = empleados.filter(id_empleado=filtros['empleado_id'])
+        if 'contrato' in filtros:
+            empleados = empleados.filter(contrato=filtros['contrato'])
+        QRService.asignar_codigos_faltantes(
+            list(empleados.filter(Q(codigo_qr__isnull=True) | Q(codigo_qr='')))
+        )
+        return empleados
+
+    @staticmethod
+    def stream_zip(empleados):
+        """
+        Genera un ZIP con un PNG por empleado, por bloques.
+
+        Args:
+            empleados: QuerySet de Empleado
+
+        Yields:
+            bytes: Fragmentos del archivo ZIP
+        """
+        salida = _Salida()
+        # Los PNG ya están comprimidos: se guardan sin volver a comprimir
+        with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_STORED) as zf:
+            for empleado in empleados.iterator(chunk_size=CredencialService.CHUNK_SIZE):
+                png = renderizar_png(QRService._url_qr(empleado.codigo_qr))
+                zf.writestr(f"qr_{empleado.dni}_{empleado.codigo_qr}.png", png)
+                yield salida.vaciar()
+        yield salida.vaciar()
+
+    @staticmethod
+    def _fuente(tamano):
+        try:
+            return ImageFont.load_default(size=tamano)
+        except TypeError:
+            # Pillow < 10.1 no permite elegir el tamaño de la fuente por defecto
+            return ImageFont.load_default()
+
+    @staticmethod
+    def _pagina(empleados):
+        """
+        Dibuja una página con la grilla de credenciales.
+
+        Args:
+            empleados: Lista de hasta COLUMNAS * FILAS empleados
+
+        Returns:
+            Image: Imagen en modo "1" (blanco y negro)
+        """
+        ancho, alto = CredencialService.PAGINA_PX
+        celda_ancho = ancho // CredencialService.COLUMNAS
+        celda_alto = alto // CredencialService.FILAS
+        fuente_nombre = CredencialService._fuente(24)
+        fuente_dni = CredencialService._fuente(20)
+
+        pagina = Image.new('1', (ancho, alto), 1)
+        dibujo = ImageDraw.Draw(pagina)
+        for i, empleado in enumerate(empleados):
+            x = (i % CredencialService.COLUMNAS) * celda_ancho
+            y = (i // CredencialService.COLUMNAS) * celda_alto
+            dibujo.rectangle([x + 10, y + 10, x + celda_ancho - 10, y + celda_alto - 10], outline=0, width=2)
+
+            qr = construir_qr(QRService._url_qr(empleado.codigo_qr)).make_image().get_image().convert('1')
+            qr = qr.resize((CredencialService.QR_PX, CredencialService.QR_PX), Image.NEAREST)
+            pagina.paste(qr, (x + (celda_ancho - CredencialService.QR_PX) // 2, y + 20))
+
+            centro = x + celda_ancho // 2
+            texto_y = y + 20 + CredencialService.QR_PX + 10
+            dibujo.text((centro, texto_y), empleado.nombres, font=fuente_nombre, fill=0, anchor='mt')
+            dibujo.text((centro, texto_y + 28), empleado.apellidos, font=fuente_nombre, fill=0, anchor='mt')
+            dibujo.text((centro, texto_y + 58), f"DNI {empleado.dni}", font=fuente_dni, fill=0, anchor='mt')
+        return pagina
+
+    @staticmethod
+    def stream_pdf(empleados):
+        """
+        Genera un PDF con COLUMNAS x FILAS credenciales por página, página por página.
+
+        Cada página es una imagen en blanco y negro comprimida (FlateDecode). El árbol
+        de páginas y la tabla xref se escriben al final, así que la memoria no depende
+        de la cantidad de empleados.
+
+        Args:
+            empleados: QuerySet de Empleado
+
+        Yields:
+            bytes: Fragmentos del archivo PDF
+        """
+        ancho_px, alto_px = CredencialService.PAGINA_PX
+        ancho_pt, alto_pt = CredencialService.PAGINA_PT
+        offsets = {}
+        posicion = 0
+        # 1 = catálogo, 2 = árbol de páginas; cada página usa tres objetos a partir del 3
+        siguiente = 3
+        paginas = []
+
+        def objeto(numero, cuerpo, flujo=None):
+            nonlocal posicion
+            offsets[numero] = posicion
+            datos = f"{numero} 0 obj\n".encode() + cuerpo
+            if flujo is not None:
+                datos += b"\nstream\n" + flujo + b"\nendstream"
+            datos += b"\nendobj\n"
+            posicion += len(datos)
+            return datos
+
+        cabecera = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        posicion += len(cabecera)
+        yield cabecera
+
+        def emitir_pagina(lote):
+            nonlocal siguiente
+            imagen_num, contenido_num, pagina_num = siguiente, siguiente + 1, siguiente + 2
+            siguiente += 3
+            paginas.append(pagina_num)
+
+            bits = zlib.compress(CredencialService._pagina(lote).tobytes())
+            contenido = f"q {ancho_pt} 0 0 {alto_pt} 0 0 cm /Im0 Do Q".encode()
+            return (
+                objeto(imagen_num, (
+                    f"<< /Type /XObject /Subtype /Image /Width {ancho_px} /Height {alto_px} "
+                    f"/ColorSpace /DeviceGray /BitsPerComponent 1 /Filter /FlateDecode "
+                    f"/Length {len(bits)} >>"
+                ).encode(), bits)
+                + objeto(contenido_num, f"<< /Length {len(contenido)} >>".encode(), contenido)
+                + objeto(pagina_num, (
+                    f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ancho_pt} {alto_pt}] "
+                    f"/Resources << /XObject << /Im0 {imagen_num} 0 R >> >> /Contents {contenido_num} 0 R >>"
+                ).encode())
+            )
+
+        por_pagina = CredencialService.COLUMNAS * CredencialService.FILAS
+        lote = []
+        for empleado in empleados.iterator(chunk_size=CredencialService.CHUNK_SIZE):
+            lote.append(empleado)
+            if len(lote) == por_pagina:
+                yield emitir_pagina(lote)
+                lote = []
+        if lote or not paginas:
+            yield emitir_pagina(lote)
+
+        kids = ' '.join(f"{n} 0 R" for n in paginas)
+        final = objeto(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(paginas)} >>".encode())
+        final += objeto(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        total = siguiente
+        xref = [f"xref\n0 {total}\n", "0000000000 65535 f \n"]
+        xref += [f"{offsets[n]:010d} 00000 n \n" for n in range(1, total)]
+        xref.append(f"trailer\n<< /Size {total} /Root 1 0 R >>\nstartxref\n{posicion}\n%%EOF\n")
+        yield final + ''.join(xref).encode()
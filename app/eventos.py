@@ -0,0 +1,209 @@
+"""
+Difusión en tiempo real de registros de asistencia (Server-Sent Events).
+
+Cada conexión SSE se suscribe al Broadcaster del proceso con una cola acotada.
+Los registros se publican al confirmarse la transacción y se reparten a todas
+las colas. Con varios workers/procesos se usa Postgres LISTEN/NOTIFY para que
+cada proceso reciba también lo publicado por los demás (EVENTOS_BACKEND).
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+CANAL = 'registros_asistencia'
+RESINCRONIZAR = object()  # Marca en la cola: el suscriptor perdió eventos
+
+
+def evento_registro(registro):
+    """
+    Datos que se envían de un registro (mismos campos que ReporteService.registros_nuevos).
+
+    Args:
+        registro: RegistroAsistencia con empleado y tipo cargados
+
+    Returns:
+        dict
+    """
+    return {
+        'id': registro.id_registro,
+        'empleado_id': registro.empleado_id,
+        'empleado': registro.empleado.nombre_completo,
+        'tipo': registro.tipo.nombre_asistencia,
+        'fecha': registro.fecha_registro.isoformat(),
+        'hora': registro.hora_registro.strftime('%H:%M:%S'),
+        'descripcion': registro.descripcion or '',
+    }
+
+
+class Broadcaster:
+    """
+    Reparte eventos a las conexiones SSE de este proceso.
+
+    Cada suscriptor tiene una asyncio.Queue acotada (EVENTOS_MAX_COLA) ligada a su
+    event loop; publicar es seguro desde cualquier hilo. Si un suscriptor lento llena
+    su cola, se vacía y se le envía RESINCRONIZAR para que el cliente se ponga al día
+    consultando la API de registros nuevos.
+    """
+
+    _suscriptores = set()
+    _lock = threading.Lock()
+    _escucha = None
+
+    @staticmethod
+    def _usa_postgres():
+        return settings.EVENTOS_BACKEND == 'postgres' and connection.vendor == 'postgresql'
+
+    @classmethod
+    @contextmanager
+    def suscribir(cls):
+        """
+        Registra una cola para el event loop actual mientras dure el bloque.
+
+        Yields:
+            asyncio.Queue: Cola con dicts de eventos (o RESINCRONIZAR)
+        """
+        if cls._usa_postgres():
+            cls._iniciar_escucha()
+        suscriptor = (asyncio.get_running_loop(), asyncio.Queue(maxsize=settings.EVENTOS_MAX_COLA))
+        with cls._lock:
+            cls._suscriptores.add(suscriptor)
+        try:
+            yield suscriptor[1]
+        finally:
+            with cls._lock:
+                cls._suscriptores.discard(suscriptor)
+
+    @staticmethod
+    def _encolar(cola, evento):
+        try:
+            cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            while not cola.empty():
+                cola.get_nowait()
+            cola.put_nowait(RESINCRONIZAR)
+
+    @classmethod
+    def repartir(cls, evento):
+        """Entrega un evento a todos los suscriptores del proceso."""
+        with cls._lock:
+            suscriptores = list(cls._suscriptores)
+        for loop, cola in suscriptores:
+            try:
+                loop.call_soon_threadsafe(cls._encolar, cola, evento)
+            except RuntimeError:
+                pass  # Event loop cerrado: la suscripción se elimina al salir del bloque
+
+    @classmethod
+    def publicar(cls, eventos):
+        """
+        Publica eventos a todos los procesos (o solo a este con el backend en memoria).
+
+        Args:
+            eventos: Lista de dicts (ver evento_registro)
+        """
+        if cls._usa_postgres():
+            with connection.cursor() as cursor:
+                for evento in eventos:
+                    cursor.execute("SELECT pg_notify(%s, %s)", [CANAL, json.dumps(evento)])
+        else:
+            for evento in eventos:
+                cls.repartir(evento)
+
+    @classmethod
+    def _iniciar_escucha(cls):
+        with cls._lock:
+            if cls._escucha is None or not cls._escucha.is_alive():
+                cls._escucha = threading.Thread(target=cls._escuchar, name='eventos-listen', daemon=True)
+                cls._escucha.start()
+
+    @classmethod
+    def _escuchar(cls):
+        """Hilo que hace LISTEN en Postgres y reparte las notificaciones en este proceso."""
+        while True:
+            db = connections.create_connection('default')
+            try:
+                db.connect()
+                db.set_autocommit(True)
+                raw = db.connection
+                with raw.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CANAL}")
+                logger.info("Escuchando notificaciones en el canal %s", CANAL)
+                if hasattr(raw, 'notifies') and callable(raw.notifies):
+                    # psycopg 3
+                    while True:
+                        for aviso in raw.notifies(timeout=30):
+                            cls.repartir(json.loads(aviso.payload))
+                else:
+                    # psycopg2
+                    while True:
+                        if select.select([raw], [], [], 30) == ([], [], []):
+                            continue
+                        raw.poll()
+                        while raw.notifies:
+                            cls.repartir(json.loads(raw.notifies.pop(0).payload))
+            except Exception:
+                logger.exception("Se perdió la conexión LISTEN; reintentando")
+                # Los clientes pueden haber perdido eventos mientras tanto
+                cls.repartir(RESINCRONIZAR)
+                time.sleep(5)
+            finally:
+                try:
+                    db.close()
+                except Exception:
+                    pass
+
+
+def publicar_registros(registros):
+    """
+    Publica los registros cuando se confirme la transacción actual (en autocommit, de inmediato).
+    Un error al publicar no afecta el registro.
+
+    Args:
+        registros: RegistroAsistencia con empleado y tipo cargados
+    """
+    eventos = [evento_registro(r) for r in registros]
+    if not eventos:
+        return
+
+    def publicar():
+        try:
+            Broadcaster.publicar(eventos)
+        except Exception:
+            logger.exception("No se pudieron publicar %s registros", len(eventos))
+
+    transaction.on_commit(publicar)
+
+
+async def flujo_sse(intervalo_ping=15):
+    """
+    Genera el flujo text/event-stream de una conexión: un evento "registro" por
+    registro nuevo, "resincronizar" si se perdieron eventos y comentarios de ping
+    para mantener viva la conexión a través de proxies.
+
+    Args:
+        intervalo_ping: Segundos sin eventos antes de enviar un ping
+
+    Yields:
+        str: Fragmentos SSE
+    """
+    with Broadcaster.suscribir() as cola:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                evento = await asyncio.wait_for(cola.get(), intervalo_ping)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if evento is RESINCRONIZAR:
+                yield "event: resincronizar\ndata: {}\n\n"
+            else:
+                yield f"id: {evento['id']}\nevent: registro\ndata: {json.dumps(evento)}\n\n"
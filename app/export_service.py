@@ -0,0 +1,463 @@
+"""
+Servicio de exportación de reportes de asistencia.
+Genera archivos Excel en modo streaming (write-only) y CSV (opcionalmente
+comprimido con gzip) por bloques, para que la memoria no crezca con la
+cantidad de registros exportados.
+"""
+
+import csv
+import io
+import tempfile
+import warnings
+import zlib
+from itertools import chain, islice
+from django.db.models import Q
+from django.http import FileResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Border, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.table import Table, TableStyleInfo
+from .models import RegistroAsistencia, ResumenDiario
+from .services import ReporteService
+from .cache_reportes import CacheReportes
+
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+GZIP_CONTENT_TYPE = 'application/gzip'
+CONTENT_TYPES = {'xlsx': XLSX_CONTENT_TYPE, 'csv': CSV_CONTENT_TYPE, 'csv.gz': GZIP_CONTENT_TYPE}
+
+
+class ExportService:
+    """Servicio para exportar registros y resúmenes de asistencia a Excel."""
+
+    ENCABEZADOS_ASISTENCIA = [
+        "Empleado", "Tipo de Asistencia", "Fecha", "Hora", "Descripción", "ID Dispositivo",
+        "Sincronizado sin conexión"
+    ]
+
+    ENCABEZADOS_RESUMEN = [
+        "Empleado", "Fecha", "Tiempo de Almuerzo",
+        "Horas por Comisión", "Horas por Permiso (Otros)",
+        "Horas Trabajadas Totales"
+    ]
+
+    FORMATOS = ('xlsx', 'csv', 'csv.gz')
+
+    CHUNK_SIZE = 2000  # Filas por lote al iterar el queryset
+    FILAS_BLOQUE_CSV = 2000  # Filas por bloque CSV enviado al cliente
+    MUESTRA_ANCHOS = 500  # Filas usadas para estimar el ancho de las columnas
+    BLOQUE_RESPUESTA = 64 * 1024  # Bytes por bloque enviado al cliente
+
+    @staticmethod
+    def obtener_formato(params):
+        """
+        Lee el formato de exportación de los parámetros GET.
+
+        Args:
+            params: QueryDict (request.GET) o dict
+
+        Returns:
+            str: Uno de FORMATOS (xlsx si no se indica)
+
+        Raises:
+            ValueError: Si el formato no está soportado
+        """
+        formato = (params.get('formato') or 'xlsx').strip().lower()
+        if formato not in ExportService.FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato}. Usa {', '.join(ExportService.FORMATOS)}.")
+        return formato
+
+    @staticmethod
+    def _despues_de(claves, ultimo, descendente):
+        """Condición keyset: filas posteriores a `ultimo` en el orden de `claves`."""
+        operador = 'lt' if descendente else 'gt'
+        condicion = Q()
+        for i, clave in enumerate(claves):
+            iguales = {c: v for c, v in zip(claves[:i], ultimo[:i])}
+            condicion |= Q(**iguales, **{f'{clave}__{operador}': ultimo[i]})
+        return condicion
+
+    @staticmethod
+    def iterar_por_claves(consulta, campos, claves, descendente=False, lote=None):
+        """
+        Recorre un QuerySet por paginación keyset: cada lote es una consulta
+        `WHERE (claves) > último ORDER BY claves LIMIT lote`.
+
+        A diferencia de iterator(), no depende de cursores del lado del servidor,
+        que DISABLE_SERVER_SIDE_CURSORS (pgbouncer en modo transacción) desactiva y
+        entonces psycopg trae todo el resultado a memoria.
+
+        Args:
+            consulta: QuerySet (ya filtrado; el orden lo define `claves`)
+            campos: Campos a devolver (values_list)
+            claves: Campos que identifican una fila de forma única, en orden
+            descendente: Recorre de la última fila a la primera
+            lote: Filas por consulta (por defecto CHUNK_SIZE)
+
+        Yields:
+            tuple: Valores de `campos`
+        """
+        lote = lote or ExportService.CHUNK_SIZE
+        n = len(campos)
+        base = consulta.order_by(*(f'-{c}' if descendente else c for c in claves)) \
+            .values_list(*campos, *claves)
+        ultimo = None
+        while True:
+            pagina = base if ultimo is None else \
+                base.filter(ExportService._despues_de(claves, ultimo, descendente))
+            filas = list(pagina[:lote])
+            for fila in filas:
+                yield fila[:n]
+            if len(filas) < lote:
+                return
+            ultimo = filas[-1][n:]
+
+    @staticmethod
+    def filas_asistencia(registros):
+        """
+        Recorre los registros de asistencia del más reciente al más antiguo,
+        por lotes keyset de (fecha, hora, id) y sin instanciar modelos.
+
+        Args:
+            registros: QuerySet de RegistroAsistencia (ya filtrado)
+
+        Yields:
+            list: Fila con los valores del reporte de asistencia
+        """
+        campos = (
+            'empleado__nombres', 'empleado__apellidos', 'tipo__nombre_asistencia',
+            'fecha_registro', 'hora_registro', 'descripcion', 'fingerprint', 'sincronizado_en',
+        )
+        claves = ('fecha_registro', 'hora_registro', 'id_registro')
+        for nombres, apellidos, tipo, fecha, hora, descripcion, fingerprint, sincronizado in \
+                ExportService.iterar_por_claves(registros, campos, claves, descendente=True):
+            yield [
+                f"{nombres} {apellidos}",
+                tipo,
+                fecha.strftime('%Y-%m-%d'),
+                hora.strftime('%H:%M:%S'),
+                descripcion or '',
+                fingerprint or '',
+                # Fecha y hora de recepción: la marca usa la hora del dispositivo
+                timezone.localtime(sincronizado).strftime('%Y-%m-%d %H:%M:%S') if sincronizado else '',
+            ]
+
+    @staticmethod
+    def filas_resumen(resumenes):
+        """
+        Recorre los resúmenes diarios precalculados por empleado y fecha, por lotes
+        keyset sobre la clave única (empleado, fecha).
+
+        Args:
+            resumenes: QuerySet de ResumenDiario (ya filtrado)
+
+        Yields:
+            list: Fila con los valores del resumen diario
+        """
+        campos = (
+            'empleado__nombres', 'empleado__apellidos', 'fecha',
+            'almuerzo', 'comision', 'permiso', 'trabajadas',
+        )
+        for nombres, apellidos, fecha, almuerzo, comision, permiso, trabajadas in \
+                ExportService.iterar_por_claves(resumenes, campos, ('empleado_id', 'fecha')):
+            yield [
+                f"{nombres} {apellidos}",
+                fecha.strftime("%Y-%m-%d"),
+                ReporteService.strfsegundos(almuerzo),
+                ReporteService.strfsegundos(comision),
+                ReporteService.strfsegundos(permiso),
+                ReporteService.strfsegundos(trabajadas),
+            ]
+
+    @staticmethod
+    def estimar_anchos(encabezados, muestra):
+        """
+        Estima el ancho de cada columna a partir de una muestra acotada de filas.
+
+        Args:
+            encabezados: Lista de encabezados
+            muestra: Lista de filas de muestra
+
+        Returns:
+            list: Ancho sugerido por columna
+        """
+        anchos = [len(str(valor)) for valor in encabezados]
+        for fila in muestra:
+            for i, valor in enumerate(fila):
+                if valor:
+                    anchos[i] = max(anchos[i], len(str(valor)))
+        return [ancho + 2 for ancho in anchos]
+
+    @staticmethod
+    def escribir_xlsx(destino, titulo, nombre_tabla, encabezados, filas):
+        """
+        Escribe un libro Excel en modo write-only, fila por fila.
+
+        Args:
+            destino: Archivo (o ruta) donde se guarda el libro
+            titulo: Título de la hoja
+            nombre_tabla: displayName de la tabla con estilo
+            encabezados: Lista de encabezados
+            filas: Iterable de filas; se consume una sola vez
+
+        Returns:
+            int: Cantidad de filas de datos escritas
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title=titulo)
+
+        # Los anchos deben fijarse antes de escribir la primera fila
+        filas = iter(filas)
+        muestra = list(islice(filas, ExportService.MUESTRA_ANCHOS))
+        for i, ancho in enumerate(ExportService.estimar_anchos(encabezados, muestra), start=1):
+            ws.column_dimensions[get_column_letter(i)].width = ancho
+
+        # Estilo encabezado
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill("solid", fgColor="4F81BD")
+        thin_border = Border(
+            left=Side(style='thin'), right=Side(style='thin'),
+            top=Side(style='thin'), bottom=Side(style='thin')
+        )
+        celdas = []
+        for encabezado in encabezados:
+            cell = WriteOnlyCell(ws, value=encabezado)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.border = thin_border
+            celdas.append(cell)
+        ws.append(celdas)
+
+        total = 0
+        for fila in chain(muestra, filas):
+            ws.append(fila)
+            total += 1
+
+        # Tabla solo si hay datos (al menos 1 fila de datos)
+        if total:
+            tabla = Table(
+                displayName=nombre_tabla,
+                ref=f"A1:{get_column_letter(len(encabezados))}{total + 1}"
+            )
+            # En modo write-only las columnas de la tabla se declaran a mano
+            tabla._initialise_columns()
+            for columna, encabezado in zip(tabla.tableColumns, encabezados):
+                columna.name = encabezado
+            tabla.tableStyleInfo = TableStyleInfo(
+                name="TableStyleMedium9", showFirstColumn=False,
+                showLastColumn=False, showRowStripes=True, showColumnStripes=False
+            )
+            with warnings.catch_warnings():
+                # openpyxl advierte siempre en write-only aunque las columnas ya estén declaradas
+                warnings.simplefilter('ignore', UserWarning)
+                ws.add_table(tabla)
+
+        wb.save(destino)
+        return total
+
+    @staticmethod
+    def respuesta_xlsx(nombre_archivo, titulo, nombre_tabla, encabezados, filas):
+        """
+        Construye una respuesta que genera y envía el Excel por bloques.
+
+        El libro se arma en un archivo temporal (no en memoria) recién cuando
+        el servidor empieza a consumir la respuesta.
+
+        Args:
+            nombre_archivo: Nombre del archivo descargado
+            titulo: Título de la hoja
+            nombre_tabla: displayName de la tabla con estilo
+            encabezados: Lista de encabezados
+            filas: Iterable perezoso de filas
+
+        Returns:
+            StreamingHttpResponse: Respuesta con el archivo Excel
+        """
+        def contenido():
+            with tempfile.TemporaryFile() as tmp:
+                ExportService.escribir_xlsx(tmp, titulo, nombre_tabla, encabezados, filas)
+                tmp.seek(0)
+                while True:
+                    bloque = tmp.read(ExportService.BLOQUE_RESPUESTA)
+                    if not bloque:
+                        break
+                    yield bloque
+
+        response = StreamingHttpResponse(contenido(), content_type=XLSX_CONTENT_TYPE)
+        response['Content-Disposition'] = f'attachment; filename={nombre_archivo}'
+        return response
+
+    @staticmethod
+    def bloques_csv(encabezados, filas, comprimir=False):
+        """
+        Genera el CSV (UTF-8) por bloques de FILAS_BLOQUE_CSV filas.
+
+        Args:
+            encabezados: Lista de encabezados
+            filas: Iterable de filas; se consume una sola vez
+            comprimir: True comprime la salida en formato gzip
+
+        Yields:
+            bytes: Bloques del archivo
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        compresor = zlib.compressobj(wbits=31) if comprimir else None  # wbits=31: cabecera gzip
+
+        def vaciar():
+            datos = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            return compresor.compress(datos) if compresor else datos
+
+        writer.writerow(encabezados)
+        filas = iter(filas)
+        while True:
+            lote = list(islice(filas, ExportService.FILAS_BLOQUE_CSV))
+            if not lote:
+                break
+            writer.writerows(lote)
+            bloque = vaciar()
+            if bloque:
+                yield bloque
+        bloque = vaciar()
+        if compresor:
+            bloque += compresor.flush()
+        if bloque:
+            yield bloque
+
+    @staticmethod
+    def respuesta_csv(nombre_archivo, encabezados, filas, comprimir=False):
+        """
+        Construye una respuesta que envía el CSV a medida que se leen las filas.
+
+        Args:
+            nombre_archivo: Nombre del archivo descargado
+            encabezados: Lista de encabezados
+            filas: Iterable perezoso de filas
+            comprimir: True envía el CSV comprimido con gzip
+
+        Returns:
+            StreamingHttpResponse: Respuesta con el archivo CSV
+        """
+        response = StreamingHttpResponse(
+            ExportService.bloques_csv(encabezados, filas, comprimir),
+            content_type=GZIP_CONTENT_TYPE if comprimir else CSV_CONTENT_TYPE,
+        )
+        response['Content-Disposition'] = f'attachment; filename={nombre_archivo}'
+        return response
+
+    @staticmethod
+    def reporte(tipo, filtros):
+        """
+        Define un reporte: consulta filtrada, columnas y nombres del archivo.
+        Lo usan la descarga directa y los ReporteJob en segundo plano.
+
+        Args:
+            tipo: 'asistencia' (detalle de registros) o 'resumen' (resumen diario)
+            filtros: dict devuelto por ReporteService.obtener_filtros
+
+        Returns:
+            dict: nombre_base, titulo, nombre_tabla, encabezados y filas (iterable perezoso)
+        """
+        if tipo == 'asistencia':
+            registros = ReporteService.filtrar_registros(RegistroAsistencia.objects.all(), filtros)
+            return {
+                'nombre_base': 'registro_asistencia',
+                'titulo': "Asistencia",
+                'nombre_tabla': "RegistroAsistencia",
+                'encabezados': ExportService.ENCABEZADOS_ASISTENCIA,
+                'filas': ExportService.filas_asistencia(registros),
+            }
+        if tipo == 'resumen':
+            resumenes = ReporteService.filtrar_registros(ResumenDiario.objects.all(), filtros, campo_fecha='fecha')
+            return {
+                'nombre_base': 'resumen_asistencia',
+                'titulo': "Resumen Diario",
+                'nombre_tabla': "ResumenAsistencia",
+                'encabezados': ExportService.ENCABEZADOS_RESUMEN,
+                'filas': ExportService.filas_resumen(resumenes),
+            }
+        raise ValueError(f"Tipo de reporte desconocido: {tipo}")
+
+    @staticmethod
+    def escribir(formato, destino, titulo, nombre_tabla, encabezados, filas, **kwargs):
+        """
+        Escribe el reporte completo en un archivo binario abierto.
+
+        Args:
+            formato: Uno de FORMATOS
+            destino: Archivo abierto en modo binario
+            titulo, nombre_tabla, encabezados, filas: Ver reporte()
+        """
+        if formato == 'xlsx':
+            ExportService.escribir_xlsx(destino, titulo, nombre_tabla, encabezados, filas)
+            return
+        for bloque in ExportService.bloques_csv(encabezados, filas, comprimir=formato == 'csv.gz'):
+            destino.write(bloque)
+
+    @staticmethod
+    def respuesta(formato, nombre_base, titulo, nombre_tabla, encabezados, filas):
+        """
+        Construye la respuesta de exportación en el formato pedido con las mismas columnas.
+
+        Args:
+            formato: Uno de FORMATOS
+            nombre_base: Nombre del archivo sin extensión
+            titulo: Título de la hoja (solo Excel)
+            nombre_tabla: displayName de la tabla con estilo (solo Excel)
+            encabezados: Lista de encabezados
+            filas: Iterable perezoso de filas
+
+        Returns:
+            StreamingHttpResponse
+        """
+        if formato == 'xlsx':
+            return ExportService.respuesta_xlsx(
+                f'{nombre_base}.xlsx', titulo, nombre_tabla, encabezados, filas
+            )
+        return ExportService.respuesta_csv(
+            f'{nombre_base}.{formato}', encabezados, filas, comprimir=formato == 'csv.gz'
+        )
+
+    @staticmethod
+    def respuesta_reporte(tipo, formato, filtros, if_none_match=''):
+        """
+        Respuesta de un reporte pasando por CacheReportes: si los datos no cambiaron
+        desde la última generación se envía el archivo guardado; si no, se genera en
+        streaming y se guarda mientras se envía. El ETag es la clave de la caché.
+
+        Args:
+            tipo: 'asistencia' o 'resumen'
+            formato: Uno de FORMATOS
+            filtros: dict devuelto por ReporteService.obtener_filtros
+            if_none_match: Encabezado If-None-Match de la petición
+
+        Returns:
+            HttpResponse: 304, FileResponse (acierto) o StreamingHttpResponse
+        """
+        definicion = ExportService.reporte(tipo, filtros)
+        if not CacheReportes.activa():
+            return ExportService.respuesta(formato, **definicion)
+
+        clave = CacheReportes.clave(tipo, formato, filtros)
+        etag = f'"{clave}"'
+        archivo = None
+        if etag in if_none_match:
+            response = HttpResponseNotModified()
+        elif (archivo := CacheReportes.abrir(clave)) is not None:
+            response = FileResponse(
+                archivo, as_attachment=True, filename=f"{definicion['nombre_base']}.{formato}",
+                content_type=CONTENT_TYPES[formato],
+            )
+        else:
+            response = ExportService.respuesta(formato, **definicion)
+            response.streaming_content = CacheReportes.guardar_bloques(clave, response.streaming_content)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        if response.status_code == 200:
+            response['X-Cache-Reporte'] = 'HIT' if archivo is not None else 'MISS'
+        return response
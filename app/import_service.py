@@ -0,0 +1,211 @@
+"""
+Servicio para importar el padrón de empleados desde CSV o Excel (XLSX).
+Lee el archivo en streaming y sincroniza por lotes con upserts por DNI.
+"""
+
+import csv
+import os
+from openpyxl import load_workbook
+from django.db import transaction
+from .models import Empleado, DispositivoEmpleado
+from .caches import CacheFingerprint, IndiceEmpleados, IndiceQR, VersionReportes
+
+
+class ImportService:
+    """Servicio para importar empleados en lote."""
+
+    COLUMNAS = ('nombres', 'apellidos', 'dni', 'contrato')
+    CAMPOS_ACTUALIZABLES = ['nombres', 'apellidos', 'contrato']
+    DNI_DIGITOS = 8
+    MAX_LARGO = 50  # max_length de los CharField de Empleado
+    MAX_ERRORES = 100  # Errores que se conservan para el reporte
+
+    @staticmethod
+    def _normalizar_encabezado(valor):
+        return str(valor or '').strip().lower()
+
+    @staticmethod
+    def leer_filas(ruta):
+        """
+        Lee las filas de un CSV o XLSX sin cargar el archivo completo en memoria.
+        La primera fila debe tener los encabezados nombres, apellidos, dni y contrato
+        (sin distinguir mayúsculas); las demás columnas se ignoran.
+
+        Args:
+            ruta: Ruta del archivo .csv o .xlsx
+
+        Yields:
+            tuple: (número de fila en el archivo, dict con las columnas)
+
+        Raises:
+            ValueError: Si la extensión no es soportada o faltan columnas
+        """
+        extension = os.path.splitext(ruta)[1].lower()
+        if extension == '.csv':
+            yield from ImportService._leer_csv(ruta)
+        elif extension in ('.xlsx', '.xlsm'):
+            yield from ImportService._leer_xlsx(ruta)
+        else:
+            raise ValueError(f'Formato no soportado: "{extension}". Use .csv o .xlsx')
+
+    @staticmethod
+    def _indices(encabezados):
+        encabezados = [ImportService._normalizar_encabezado(e) for e in encabezados]
+        faltantes = [c for c in ImportService.COLUMNAS if c not in encabezados]
+        if faltantes:
+            raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+        return {c: encabezados.index(c) for c in ImportService.COLUMNAS}
+
+    @staticmethod
+    def _leer_csv(ruta):
+        with open(ruta, newline='', encoding='utf-8-sig') as f:
+            muestra = f.read(4096)
+            f.seek(0)
+            try:
+                dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+            except csv.Error:
+                dialecto = csv.excel
+            lector = csv.reader(f, dialecto)
+            indices = ImportService._indices(next(lector, []))
+            for numero, fila in enumerate(lector, start=2):
+                if not any(fila):
+                    continue
+                yield numero, {c: fila[i] if i < len(fila) else None for c, i in indices.items()}
+
+    @staticmethod
+    def _leer_xlsx(ruta):
+        libro = load_workbook(ruta, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            indices = ImportService._indices(next(filas, ()))
+            for numero, fila in enumerate(filas, start=2):
+                if not any(v not in (None, '') for v in fila):
+                    continue
+                yield numero, {c: fila[i] if i < len(fila) else None for c, i in indices.items()}
+        finally:
+            libro.close()
+
+    @staticmethod
+    def validar_fila(fila):
+        """
+        Valida y normaliza una fila del padrón.
+
+        Args:
+            fila: dict con nombres, apellidos, dni y contrato
+
+        Returns:
+            dict: Datos listos para Empleado (dni como int)
+
+        Raises:
+            ValueError: Con el motivo si la fila no es válida
+        """
+        dni = fila.get('dni')
+        if isinstance(dni, float) and dni.is_integer():
+            dni = int(dni)  # Excel guarda los números como float
+        dni = str(dni if dni is not None else '').strip()
+        # Excel quita los ceros a la izquierda: se aceptan DNIs con menos dígitos
+        if not dni.isdigit() or len(dni) > ImportService.DNI_DIGITOS or int(dni) == 0:
+            raise ValueError(f"DNI inválido: {dni!r}")
+
+        datos = {'dni': int(dni)}
+        for campo in ImportService.CAMPOS_ACTUALIZABLES:
+            valor = ' '.join(str(fila.get(campo) or '').split())
+            if not valor:
+                raise ValueError(f"Falta {campo}")
+            if len(valor) > ImportService.MAX_LARGO:
+                raise ValueError(f"{campo} supera {ImportService.MAX_LARGO} caracteres")
+            datos[campo] = valor
+        return datos
+
+    @staticmethod
+    def _guardar_lote(lote):
+        """
+        Inserta o actualiza un lote de empleados (dict dni -> datos) en una transacción.
+        Las filas que no cambian no se escriben.
+
+        Returns:
+            tuple: (insertados, actualizados, sin cambios)
+        """
+        with transaction.atomic():
+            existentes = {
+                dni: (nombres, apellidos, contrato)
+                for dni, nombres, apellidos, contrato in Empleado.objects.filter(dni__in=lote.keys())
+                .values_list('dni', 'nombres', 'apellidos', 'contrato')
+            }
+            cambios = [
+                datos for dni, datos in lote.items()
+                if existentes.get(dni) != (datos['nombres'], datos['apellidos'], datos['contrato'])
+            ]
+            actualizados = [datos['dni'] for datos in cambios if datos['dni'] in existentes]
+            if cambios:
+                Empleado.objects.bulk_create(
+                    [Empleado(**datos) for datos in cambios],
+                    update_conflicts=True,
+                    update_fields=ImportService.CAMPOS_ACTUALIZABLES,
+                    unique_fields=['dni'],
+                )
+
+        if actualizados:
+            # bulk_create no dispara señales: se invalidan las cachés que guardan nombres
+            fingerprints = list(
+                DispositivoEmpleado.objects.filter(empleado__dni__in=actualizados)
+                .values_list('fingerprint', flat=True)
+            )
+            if fingerprints:
+                CacheFingerprint.invalidar(*fingerprints)
+
+        insertados = len(cambios) - len(actualizados)
+        return insertados, len(actualizados), len(lote) - len(cambios)
+
+    @staticmethod
+    def importar_empleados(filas, lote=1000):
+        """
+        Sincroniza empleados por DNI: inserta los nuevos y actualiza nombres,
+        apellidos y contrato de los existentes, por lotes.
+
+        Args:
+            filas: Iterable de (número de fila, dict) como el de leer_filas
+            lote: Filas por transacción/upsert
+
+        Returns:
+            dict: insertados, actualizados, sin_cambios, omitidos y errores
+                  (primeros MAX_ERRORES (número de fila, motivo))
+        """
+        resultado = {'insertados': 0, 'actualizados': 0, 'sin_cambios': 0, 'omitidos': 0, 'errores': []}
+        pendientes = {}
+        numeros = {}  # DNI -> número de fila de la aparición que está en pendientes
+
+        def omitir(numero, motivo):
+            resultado['omitidos'] += 1
+            if len(resultado['errores']) < ImportService.MAX_ERRORES:
+                resultado['errores'].append((numero, motivo))
+
+        def guardar():
+            insertados, actualizados, sin_cambios = ImportService._guardar_lote(pendientes)
+            resultado['insertados'] += insertados
+            resultado['actualizados'] += actualizados
+            resultado['sin_cambios'] += sin_cambios
+            pendientes.clear()
+            numeros.clear()
+
+        for numero, fila in filas:
+            try:
+                datos = ImportService.validar_fila(fila)
+            except ValueError as e:
+                omitir(numero, str(e))
+                continue
+            if datos['dni'] in pendientes:
+                # Un upsert no puede tocar dos veces la misma fila: gana la última aparición
+                omitir(numeros[datos['dni']], f"DNI {datos['dni']} repetido; se descarta esta fila y se usa la fila {numero}")
+            pendientes[datos['dni']] = datos
+            numeros[datos['dni']] = numero
+            if len(pendientes) >= lote:
+                guardar()
+        if pendientes:
+            guardar()
+
+        if resultado['insertados'] or resultado['actualizados']:
+            IndiceQR.invalidar()
+            IndiceEmpleados.invalidar()
+            VersionReportes.invalidar()
+        return resultado
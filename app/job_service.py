@@ -0,0 +1,221 @@
+"""
+Servicio de exportaciones en segundo plano (ReporteJob).
+La página de descargas encola el reporte y `manage.py procesar_reportes` lo
+genera fuera de los workers web, escribiendo el archivo en el almacenamiento
+de medios (default_storage) para descargarlo cuando termina.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from django.core.files import File
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import ReporteJob
+from .services import ReporteService
+from .export_service import ExportService
+from .cache_reportes import CacheReportes
+
+logger = logging.getLogger(__name__)
+
+
+class ReporteJobService:
+    """Servicio para encolar, procesar y limpiar exportaciones en segundo plano."""
+
+    PARAMETROS = ('desde', 'hasta', 'empleado', 'contrato')  # Filtros que se guardan con el job
+    LATIDO_SEGUNDOS = 30  # Cada cuánto el worker marca latido_en mientras genera un archivo
+
+    @staticmethod
+    def encolar(tipo, params, usuario=None):
+        """
+        Valida los filtros y crea un job pendiente.
+
+        Args:
+            tipo: 'asistencia' o 'resumen'
+            params: Parámetros de la petición (filtros y formato)
+            usuario: User que lo solicita
+
+        Returns:
+            ReporteJob
+
+        Raises:
+            ValueError: Si el tipo, el formato o algún filtro son inválidos
+        """
+        if tipo not in dict(ReporteJob.TIPOS):
+            raise ValueError(f"Tipo de reporte desconocido: {tipo}")
+        ReporteService.obtener_filtros(params)
+        formato = ExportService.obtener_formato(params)
+        parametros = {
+            clave: params.get(clave).strip()
+            for clave in ReporteJobService.PARAMETROS
+            if (params.get(clave) or '').strip()
+        }
+        return ReporteJob.objects.create(
+            tipo=tipo, formato=formato, parametros=parametros, solicitado_por=usuario
+        )
+
+    @staticmethod
+    def tomar_siguiente():
+        """
+        Toma el job pendiente más antiguo y lo marca en proceso.
+
+        Con Postgres, select_for_update(skip_locked=True) permite varios workers sin
+        que dos tomen el mismo job ni se bloqueen entre sí. En motores sin bloqueo
+        por fila (SQLite) la actualización condicionada al estado evita tomarlo dos veces.
+
+        Returns:
+            ReporteJob o None si no hay pendientes
+        """
+        with transaction.atomic():
+            job = (
+                ReporteJob.objects.select_for_update(skip_locked=True)
+                .filter(estado=ReporteJob.PENDIENTE)
+                .order_by('id')
+                .first()
+            )
+            if job is None:
+                return None
+            ahora = timezone.now()
+            tomado = ReporteJob.objects.filter(pk=job.pk, estado=ReporteJob.PENDIENTE).update(
+                estado=ReporteJob.PROCESANDO, iniciado_en=ahora, latido_en=ahora
+            )
+            if not tomado:
+                return None
+        job.estado = ReporteJob.PROCESANDO
+        job.iniciado_en = job.latido_en = ahora
+        return job
+
+    @staticmethod
+    def _latir(job_id, detener):
+        """
+        Actualiza latido_en cada LATIDO_SEGUNDOS hasta que se active `detener`.
+        Corre en un hilo aparte, con su propia conexión, mientras se genera el archivo.
+        """
+        try:
+            while not detener.wait(ReporteJobService.LATIDO_SEGUNDOS):
+                ReporteJob.objects.filter(pk=job_id, estado=ReporteJob.PROCESANDO) \
+                    .update(latido_en=timezone.now())
+        except Exception:
+            logger.exception("No se pudo actualizar el latido del reporte %s", job_id)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def procesar(job):
+        """
+        Genera el archivo del job en un temporal y lo guarda en el almacenamiento.
+        Si CacheReportes ya tiene el reporte para los datos actuales se copia de ahí.
+        Un error deja el job en estado ERROR con el mensaje. Mientras tanto un hilo
+        actualiza latido_en para que recuperar_abandonados no lo tome por abandonado.
+
+        Args:
+            job: ReporteJob en estado PROCESANDO
+
+        Returns:
+            bool: True si terminó correctamente
+        """
+        detener = threading.Event()
+        latido = threading.Thread(target=ReporteJobService._latir, args=(job.pk, detener), daemon=True)
+        latido.start()
+        try:
+            return ReporteJobService._generar(job)
+        finally:
+            detener.set()
+            latido.join()
+
+    @staticmethod
+    def _generar(job):
+        """Genera y guarda el archivo del job (ver procesar)."""
+        try:
+            filtros = ReporteService.obtener_filtros(job.parametros)
+            clave = CacheReportes.clave(job.tipo, job.formato, filtros) if CacheReportes.activa() else None
+            cacheado = CacheReportes.abrir(clave) if clave else None
+            with cacheado or tempfile.TemporaryFile() as temporal:
+                if cacheado is None:
+                    ExportService.escribir(job.formato, temporal, **ExportService.reporte(job.tipo, filtros))
+                    if clave:
+                        temporal.seek(0)
+                        CacheReportes.guardar_archivo(clave, temporal)
+                job.tamano = temporal.seek(0, os.SEEK_END)
+                temporal.seek(0)
+                job.archivo.save(f"{job.pk}_{job.nombre_descarga}", File(temporal), save=False)
+        except Exception as e:
+            logger.exception("No se pudo generar el reporte %s", job.pk)
+            job.estado = ReporteJob.ERROR
+            job.error = str(e) or e.__class__.__name__
+            job.terminado_en = timezone.now()
+            job.save(update_fields=['estado', 'error', 'terminado_en'])
+            return False
+
+        job.estado = ReporteJob.TERMINADO
+        job.terminado_en = timezone.now()
+        job.save(update_fields=['estado', 'archivo', 'tamano', 'terminado_en'])
+        return True
+
+    @staticmethod
+    def recuperar_abandonados(minutos):
+        """
+        Devuelve a pendiente los jobs en proceso cuyo worker dejó de dar señales
+        hace más de `minutos` (p. ej. se reinició a mitad de un reporte). Un reporte
+        largo que sigue generándose actualiza latido_en y no se toca.
+
+        Returns:
+            int: Jobs recuperados
+        """
+        limite = timezone.now() - timedelta(minutes=minutos)
+        return ReporteJob.objects.filter(estado=ReporteJob.PROCESANDO).filter(
+            Q(latido_en__lt=limite) | Q(latido_en__isnull=True, iniciado_en__lt=limite)
+        ).update(estado=ReporteJob.PENDIENTE, iniciado_en=None, latido_en=None)
+
+    @staticmethod
+    def limpiar(dias):
+        """
+        Elimina los jobs terminados hace más de `dias` días junto con sus archivos.
+
+        Returns:
+            int: Jobs eliminados
+        """
+        limite = timezone.now() - timedelta(days=dias)
+        viejos = ReporteJob.objects.filter(
+            estado__in=[ReporteJob.TERMINADO, ReporteJob.ERROR], terminado_en__lt=limite
+        )
+        eliminados = 0
+        for job in viejos.iterator():
+            if job.archivo:
+                job.archivo.delete(save=False)
+            job.delete()
+            eliminados += 1
+        return eliminados
+
+    @staticmethod
+    def recientes(usuario, limite=10):
+        """
+        Últimos jobs del usuario para la página de descargas.
+
+        Returns:
+            list: dicts con id, tipo (nombre visible), tipo_clave, formato, estado, tamano,
+                  error, creado_en y terminado_en
+        """
+        jobs = ReporteJob.objects.filter(solicitado_por=usuario).order_by('-id')[:limite]
+        return [
+            {
+                'id': job.pk,
+                'tipo': job.get_tipo_display(),
+                'tipo_clave': job.tipo,
+                'formato': job.formato,
+                'estado': job.estado,
+                'estado_display': job.get_estado_display(),
+                'parametros': job.parametros,
+                'tamano': job.tamano,
+                'error': job.error,
+                'creado_en': timezone.localtime(job.creado_en).isoformat(timespec='seconds'),
+                'terminado_en': (
+                    timezone.localtime(job.terminado_en).isoformat(timespec='seconds')
+                    if job.terminado_en else None
+                ),
+            }
+            for job in jobs
+        ]
@@ -0,0 +1,58 @@
+"""
+Exporta las credenciales QR de los empleados en un solo PDF o ZIP.
+
+Uso:
+    python manage.py exportar_credenciales --salida credenciales.pdf
+    python manage.py exportar_credenciales --formato zip --contrato CAS --salida cas.zip
+    python manage.py exportar_credenciales --formato pdf > credenciales.pdf
+"""
+
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from app.credencial_service import CredencialService
+from app.services import ReporteService
+
+
+class Command(BaseCommand):
+    help = "Genera las credenciales QR (PDF por páginas o ZIP de PNGs) sin escribir archivos intermedios."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=['pdf', 'zip'], default=None,
+                            help='pdf o zip (por defecto se deduce de --salida, si no pdf)')
+        parser.add_argument('--empleado', help='ID del empleado (opcional)')
+        parser.add_argument('--contrato', help='Contrato (opcional)')
+        parser.add_argument('--salida', help='Archivo de salida (por defecto, salida estándar)')
+
+    def handle(self, *args, **options):
+        salida = options['salida']
+        formato = options['formato']
+        if formato is None:
+            formato = 'zip' if salida and salida.lower().endswith('.zip') else 'pdf'
+
+        try:
+            filtros = ReporteService.obtener_filtros(
+                {'empleado': options['empleado'], 'contrato': options['contrato']}
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        empleados = CredencialService.obtener_empleados(filtros)
+        fragmentos = CredencialService.stream_pdf(empleados) if formato == 'pdf' \
+            else CredencialService.stream_zip(empleados)
+
+        inicio = time.perf_counter()
+        destino = open(salida, 'wb') if salida else sys.stdout.buffer
+        total = 0
+        try:
+            for fragmento in fragmentos:
+                destino.write(fragmento)
+                total += len(fragmento)
+        finally:
+            if salida:
+                destino.close()
+        duracion = time.perf_counter() - inicio
+
+        self.stderr.write(self.style.SUCCESS(
+            f"Credenciales: {empleados.count()} | {formato.upper()} {total / 1024:.0f} KB | {duracion:.1f}s"
+        ))
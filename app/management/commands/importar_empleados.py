@@ -0,0 +1,48 @@
+"""
+Importa (sincroniza) el padrón de empleados desde un CSV o XLSX.
+
+El archivo debe tener los encabezados nombres, apellidos, dni y contrato.
+Los empleados se identifican por DNI: los nuevos se insertan y los existentes
+se actualizan; las filas sin cambios no se escriben.
+
+Uso:
+    python manage.py importar_empleados padron.csv
+    python manage.py importar_empleados planilla.xlsx --lote 5000
+"""
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from app.import_service import ImportService
+
+
+class Command(BaseCommand):
+    help = "Inserta o actualiza empleados por DNI desde un CSV o XLSX, por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx')
+        parser.add_argument('--lote', type=int, default=1000, help='Filas por transacción/upsert')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+
+        inicio = time.perf_counter()
+        try:
+            resultado = ImportService.importar_empleados(
+                ImportService.leer_filas(options['archivo']), lote=options['lote']
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        duracion = time.perf_counter() - inicio
+
+        for numero, motivo in resultado['errores']:
+            self.stderr.write(f"Fila {numero}: {motivo}")
+        if resultado['omitidos'] > len(resultado['errores']):
+            self.stderr.write(f"... y {resultado['omitidos'] - len(resultado['errores'])} filas omitidas más")
+
+        filas = sum(resultado[c] for c in ('insertados', 'actualizados', 'sin_cambios', 'omitidos'))
+        self.stdout.write(self.style.SUCCESS(
+            f"Insertados: {resultado['insertados']} | actualizados: {resultado['actualizados']} | "
+            f"sin cambios: {resultado['sin_cambios']} | omitidos: {resultado['omitidos']} | "
+            f"{duracion:.1f}s ({filas / duracion if duracion else 0:.0f} filas/s)"
+        ))
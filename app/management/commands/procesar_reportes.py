@@ -0,0 +1,60 @@
+"""
+Worker de exportaciones en segundo plano: toma los ReporteJob pendientes y
+genera sus archivos en el almacenamiento de medios.
+
+Uso:
+    python manage.py procesar_reportes                 # Corre indefinidamente
+    python manage.py procesar_reportes --una-vez       # Procesa lo pendiente y termina
+    python manage.py procesar_reportes --intervalo 5 --limpiar-dias 7
+
+Se pueden correr varios workers en paralelo (con Postgres no toman el mismo job).
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from app.job_service import ReporteJobService
+
+
+class Command(BaseCommand):
+    help = "Procesa las exportaciones encoladas desde la página de descargas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help='Procesa los pendientes y termina')
+        parser.add_argument('--intervalo', type=float, default=2, help='Segundos de espera sin pendientes')
+        parser.add_argument('--abandonados-minutos', type=int, default=5,
+                            help='Reintenta los jobs en proceso cuyo worker no da señales hace estos minutos')
+        parser.add_argument('--limpiar-dias', type=int, default=7,
+                            help='Elimina los jobs (y archivos) terminados hace más de estos días')
+
+    def handle(self, *args, **options):
+        ultima_recuperacion = ultima_limpieza = None
+        while True:
+            # Mantenimiento al iniciar; luego abandonados cada minuto y limpieza cada hora
+            if ultima_recuperacion is None or time.monotonic() - ultima_recuperacion > 60:
+                recuperados = ReporteJobService.recuperar_abandonados(options['abandonados_minutos'])
+                if recuperados:
+                    self.stdout.write(f"Jobs recuperados: {recuperados}")
+                ultima_recuperacion = time.monotonic()
+            if ultima_limpieza is None or time.monotonic() - ultima_limpieza > 3600:
+                eliminados = ReporteJobService.limpiar(options['limpiar_dias'])
+                if eliminados:
+                    self.stdout.write(f"Jobs eliminados: {eliminados}")
+                ultima_limpieza = time.monotonic()
+
+            job = ReporteJobService.tomar_siguiente()
+            if job is None:
+                if options['una_vez']:
+                    return
+                close_old_connections()
+                time.sleep(options['intervalo'])
+                continue
+
+            inicio = time.perf_counter()
+            if ReporteJobService.procesar(job):
+                self.stdout.write(self.style.SUCCESS(
+                    f"Reporte {job.pk} ({job.tipo}, {job.formato}): {job.tamano} bytes | "
+                    f"{time.perf_counter() - inicio:.1f}s"
+                ))
+            else:
+                self.stderr.write(f"Reporte {job.pk} con error: {job.error}")
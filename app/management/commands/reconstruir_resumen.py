@@ -0,0 +1,36 @@
+"""
+Reconstruye la tabla ResumenDiario a partir de los registros de asistencia.
+
+Uso:
+    python manage.py reconstruir_resumen
+    python manage.py reconstruir_resumen --desde 2025-06-01 --hasta 2025-06-30
+"""
+
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from app.services import ReporteService
+
+
+class Command(BaseCommand):
+    help = "Recalcula (backfill/reparación) los resúmenes diarios de asistencia."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha inicial YYYY-MM-DD (opcional)')
+        parser.add_argument('--hasta', help='Fecha final YYYY-MM-DD (opcional)')
+        parser.add_argument('--lote', type=int, default=1000, help='Resúmenes por sentencia de upsert')
+
+    def handle(self, *args, **options):
+        try:
+            desde = date.fromisoformat(options['desde']) if options['desde'] else None
+            hasta = date.fromisoformat(options['hasta']) if options['hasta'] else None
+        except ValueError as e:
+            raise CommandError(f"Fecha inválida: {e}")
+
+        inicio = time.perf_counter()
+        guardados, eliminados = ReporteService.reconstruir_resumen(desde, hasta, lote=options['lote'])
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Resúmenes guardados: {guardados} | eliminados: {eliminados} | {duracion:.1f}s"
+        ))
@@ -0,0 +1,203 @@
+"""
+Métricas de rendimiento por vista (opcional, METRICAS_ACTIVAS).
+
+MetricasMiddleware mide cada petición: duración total, cantidad y tiempo de las
+consultas a la base de datos (con un execute_wrapper en cada conexión) y tamaño
+de la respuesta. Los valores se envían en el encabezado Server-Timing y se
+acumulan por vista en memoria del proceso; la vista `metricas` los publica en
+formato de texto de Prometheus.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+CUANTILES = (0.5, 0.95, 0.99)
+
+# Métricas publicadas: nombre, descripción y atributo de Medicion
+SERIES = (
+    ('asistencia_peticion_segundos', 'Duración de la petición por vista', 'duracion'),
+    ('asistencia_peticion_consultas_db', 'Consultas a la base de datos por petición', 'consultas'),
+    ('asistencia_peticion_db_segundos', 'Tiempo en la base de datos por petición', 'db'),
+    ('asistencia_respuesta_bytes', 'Tamaño de la respuesta (sin respuestas en streaming)', 'bytes'),
+)
+
+_medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+class Medicion:
+    """Valores de una petición en curso."""
+
+    __slots__ = ('duracion', 'consultas', 'db', 'bytes')
+
+    def __init__(self):
+        self.duracion = 0.0
+        self.consultas = 0
+        self.db = 0.0
+        self.bytes = None
+
+
+def contar_consulta(execute, sql, params, many, context):
+    """
+    execute_wrapper que suma las consultas a la medición de la petición actual.
+    La medición viaja en un ContextVar, así que también cuenta las consultas que
+    las vistas async ejecutan en hilos con sync_to_async.
+    """
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.db += time.perf_counter() - inicio
+        medicion.consultas += 1
+
+
+def instalar_contador(sender, connection, **kwargs):
+    """Agrega contar_consulta a una conexión (también como receptor de connection_created)."""
+    if contar_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(contar_consulta)
+
+
+class Metricas:
+    """
+    Acumulado por vista en memoria del proceso.
+
+    Guarda suma y conteo totales de cada serie y las últimas METRICAS_MUESTRAS
+    mediciones para calcular los cuantiles. Con varios workers cada proceso
+    publica sus propios valores.
+    """
+
+    _lock = threading.Lock()
+    _por_vista = {}
+
+    @classmethod
+    def registrar(cls, vista, medicion):
+        """
+        Agrega la medición de una petición.
+
+        Args:
+            vista: Nombre de la vista (nombre de la URL)
+            medicion: Medicion terminada
+        """
+        with cls._lock:
+            series = cls._por_vista.get(vista)
+            if series is None:
+                series = cls._por_vista[vista] = {
+                    atributo: [0.0, 0, deque(maxlen=settings.METRICAS_MUESTRAS)]
+                    for _, _, atributo in SERIES
+                }
+            for atributo, serie in series.items():
+                valor = getattr(medicion, atributo)
+                if valor is None:
+                    continue
+                serie[0] += valor
+                serie[1] += 1
+                serie[2].append(valor)
+
+    @classmethod
+    def reiniciar(cls):
+        """Descarta lo acumulado."""
+        with cls._lock:
+            cls._por_vista = {}
+
+    @staticmethod
+    def _cuantil(ordenados, q):
+        # Método del rango más cercano
+        return ordenados[max(math.ceil(q * len(ordenados)) - 1, 0)]
+
+    @classmethod
+    def prometheus(cls):
+        """
+        Texto en formato de exposición de Prometheus (tipo summary por serie).
+
+        Returns:
+            str
+        """
+        with cls._lock:
+            copia = {
+                vista: {atributo: (s[0], s[1], sorted(s[2])) for atributo, s in series.items()}
+                for vista, series in cls._por_vista.items()
+            }
+        lineas = []
+        for nombre, descripcion, atributo in SERIES:
+            lineas.append(f"# HELP {nombre} {descripcion}")
+            lineas.append(f"# TYPE {nombre} summary")
+            for vista in sorted(copia):
+                suma, conteo, muestras = copia[vista][atributo]
+                if not conteo:
+                    continue
+                etiqueta = vista.replace('\\', '\\\\').replace('"', '\\"')
+                for q in CUANTILES:
+                    lineas.append(
+                        f'{nombre}{{vista="{etiqueta}",quantile="{q}"}} {cls._cuantil(muestras, q):g}'
+                    )
+                lineas.append(f'{nombre}_sum{{vista="{etiqueta}"}} {suma:g}')
+                lineas.append(f'{nombre}_count{{vista="{etiqueta}"}} {conteo}')
+        return "\n".join(lineas) + "\n"
+
+
+class MetricasMiddleware:
+    """
+    Mide cada petición y agrega el encabezado Server-Timing.
+
+    Se activa con METRICAS_ACTIVAS (settings.py lo agrega al inicio de MIDDLEWARE
+    para incluir el tiempo del resto de middlewares). En las respuestas en
+    streaming se mide hasta que empieza el envío y no se registra el tamaño.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+        connection_created.connect(instalar_contador, dispatch_uid='metricas_contar_consulta')
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        # Conexiones de este hilo abiertas antes de cargar el middleware
+        for conexion in connections.all(initialized_only=True):
+            instalar_contador(None, conexion)
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        return self._terminar(request, response, medicion, inicio)
+
+    async def __acall__(self, request):
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        return self._terminar(request, response, medicion, inicio)
+
+    @staticmethod
+    def _terminar(request, response, medicion, inicio):
+        medicion.duracion = time.perf_counter() - inicio
+        if not response.streaming:
+            medicion.bytes = len(response.content)
+        coincidencia = request.resolver_match
+        vista = coincidencia.view_name if coincidencia else 'sin_ruta'
+        Metricas.registrar(vista, medicion)
+        response['Server-Timing'] = (
+            f'total;dur={medicion.duracion * 1000:.1f}, '
+            f'db;dur={medicion.db * 1000:.1f};desc="consultas: {medicion.consultas}"'
+        )
+        return response
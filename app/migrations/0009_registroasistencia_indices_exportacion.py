@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-17 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_disable_actividades'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registroasistencia',
+            index=models.Index(fields=['empleado', 'fecha_registro', 'hora_registro'], name='registro_emp_fecha_hora_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registroasistencia',
+            index=models.Index(fields=['fecha_registro', 'hora_registro'], name='registro_fecha_hora_idx'),
+        ),
+    ]
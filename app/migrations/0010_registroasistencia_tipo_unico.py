@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-17 22:19
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+TIPOS_UNICOS = ['Entrada', 'Inicio Almuerzo', 'Fin Almuerzo', 'Salida']
+
+
+def marcar_tipos_unicos(apps, schema_editor):
+    """
+    Marca el primer registro del día de cada tipo único por empleado.
+    Los duplicados históricos se conservan sin marca para no romper la restricción.
+    """
+    RegistroAsistencia = apps.get_model('app', 'RegistroAsistencia')
+    primeros = RegistroAsistencia.objects.filter(
+        tipo__nombre_asistencia__in=TIPOS_UNICOS
+    ).values('empleado_id', 'tipo_id', 'fecha_registro').annotate(
+        primero=Min('id_registro')
+    ).values('primero')
+    RegistroAsistencia.objects.filter(id_registro__in=primeros).update(tipo_unico=True)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_registroasistencia_indices_exportacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registroasistencia',
+            name='tipo_unico',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(marcar_tipos_unicos, noop),
+        migrations.AddConstraint(
+            model_name='registroasistencia',
+            constraint=models.UniqueConstraint(condition=models.Q(('tipo_unico', True)), fields=('empleado', 'tipo', 'fecha_registro'), name='registro_tipo_unico_por_dia'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-17 22:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_registroasistencia_tipo_unico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('almuerzo', models.IntegerField(default=0)),
+                ('comision', models.IntegerField(default=0)),
+                ('permiso', models.IntegerField(default=0)),
+                ('trabajadas', models.IntegerField(default=0)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.empleado')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha'], name='resumen_fecha_idx')],
+                'constraints': [models.UniqueConstraint(fields=('empleado', 'fecha'), name='resumen_empleado_fecha_unico')],
+            },
+        ),
+    ]
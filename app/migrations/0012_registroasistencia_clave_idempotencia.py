@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_resumendiario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registroasistencia',
+            name='clave_idempotencia',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-17 22:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_registroasistencia_clave_idempotencia'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registroasistencia',
+            index=models.Index(fields=['fecha_registro', 'id_registro'], name='registro_fecha_id_idx'),
+        ),
+    ]
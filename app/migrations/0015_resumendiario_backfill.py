@@ -0,0 +1,103 @@
+from django.db import migrations
+
+# Copia del cálculo de ReporteService al momento de esta migración: las migraciones
+# no deben depender del código vigente, que puede cambiar después
+TIPOS_RESUMEN = (
+    'entrada', 'salida', 'inicio almuerzo', 'fin almuerzo',
+    'salida por comisión', 'entrada por comisión', 'salida por otros', 'entrada por otros',
+)
+
+
+def microsegundos(hora):
+    """Convierte un time a microsegundos desde la medianoche."""
+    return ((hora.hour * 60 + hora.minute) * 60 + hora.second) * 1_000_000 + hora.microsecond
+
+
+def truncar_segundos(us):
+    """Convierte microsegundos a segundos enteros truncando hacia cero."""
+    return us // 1_000_000 if us >= 0 else -((-us) // 1_000_000)
+
+
+def calcular_segundos_lote(empleado_ids, fechas, tipo_ids, marcas_us, nombres_tipo):
+    """Pivota las marcas por (empleado, fecha) con la primera hora de cada tipo y calcula las duraciones."""
+    posiciones = {nombre: i for i, nombre in enumerate(TIPOS_RESUMEN)}
+    columna_por_tipo = {
+        id_tipo: posiciones[nombre.lower()]
+        for id_tipo, nombre in nombres_tipo.items()
+        if nombre.lower() in posiciones
+    }
+
+    pivote = {}
+    for clave, tipo_id, us in zip(zip(empleado_ids, fechas), tipo_ids, marcas_us):
+        fila = pivote.setdefault(clave, [None] * 8)
+        columna = columna_por_tipo.get(tipo_id)
+        if columna is not None and (fila[columna] is None or us < fila[columna]):
+            fila[columna] = us
+
+    resultado = {}
+    for clave, (entrada, salida, ini_alm, fin_alm, sal_com, ent_com, sal_otr, ent_otr) in pivote.items():
+        almuerzo = fin_alm - ini_alm if ini_alm is not None and fin_alm is not None else 0
+        comision = ent_com - sal_com if sal_com is not None and ent_com is not None else 0
+        permiso = ent_otr - sal_otr if sal_otr is not None and ent_otr is not None else 0
+        trabajadas = salida - entrada - almuerzo - permiso if entrada is not None and salida is not None else 0
+        resultado[clave] = {
+            'almuerzo': truncar_segundos(almuerzo),
+            'comision': truncar_segundos(comision),
+            'permiso': truncar_segundos(permiso),
+            'trabajadas': truncar_segundos(trabajadas),
+        }
+    return resultado
+
+
+def llenar_resumenes(apps, schema_editor):
+    """
+    Calcula ResumenDiario para el historial existente (0011 solo crea la tabla).
+    Recorre los registros por (empleado, fecha) y guarda por lotes de 1000 días.
+    """
+    RegistroAsistencia = apps.get_model('app', 'RegistroAsistencia')
+    TipoAsistencia = apps.get_model('app', 'TipoAsistencia')
+    ResumenDiario = apps.get_model('app', 'ResumenDiario')
+    nombres_tipo = dict(TipoAsistencia.objects.values_list('id_tipo', 'nombre_asistencia'))
+
+    def guardar(columnas):
+        resultado = calcular_segundos_lote(*columnas, nombres_tipo)
+        ResumenDiario.objects.bulk_create(
+            [
+                ResumenDiario(empleado_id=empleado_id, fecha=fecha, **segundos)
+                for (empleado_id, fecha), segundos in resultado.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['empleado', 'fecha'],
+            update_fields=['almuerzo', 'comision', 'permiso', 'trabajadas'],
+        )
+
+    registros = RegistroAsistencia.objects.order_by('empleado_id', 'fecha_registro') \
+        .values_list('empleado_id', 'fecha_registro', 'tipo_id', 'hora_registro')
+    columnas = ([], [], [], [])
+    dias = 0
+    anterior = None
+    for empleado_id, fecha, tipo_id, hora in registros.iterator(chunk_size=2000):
+        if (empleado_id, fecha) != anterior:
+            if dias >= 1000:
+                guardar(columnas)
+                columnas = ([], [], [], [])
+                dias = 0
+            anterior = (empleado_id, fecha)
+            dias += 1
+        columnas[0].append(empleado_id)
+        columnas[1].append(fecha)
+        columnas[2].append(tipo_id)
+        columnas[3].append(microsegundos(hora))
+    if dias:
+        guardar(columnas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_reportejob'),
+    ]
+
+    operations = [
+        migrations.RunPython(llenar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_versiondatos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registroasistencia',
+            name='sincronizado_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
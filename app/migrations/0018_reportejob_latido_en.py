@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_registroasistencia_sincronizado_en'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportejob',
+            name='latido_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-17 23:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_reportejob_latido_en'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='registroasistencia',
+            name='registro_fecha_hora_idx',
+        ),
+        migrations.AddIndex(
+            model_name='registroasistencia',
+            index=models.Index(fields=['fecha_registro', 'hora_registro', 'id_registro'], name='registro_fecha_hora_id_idx'),
+        ),
+    ]
@@ -91,6 +91,9 @@ class TipoAsistencia(models.Model):
     id_tipo = models.AutoField(primary_key=True)
     nombre_asistencia = models.CharField(max_length=50, unique=True)
 
+    TIPOS_UNICOS = frozenset(['Entrada', 'Inicio Almuerzo', 'Fin Almuerzo', 'Salida'])
+    TIPOS_CON_DESCRIPCION = frozenset(['Entrada por otros', 'Salida por otros'])
+
     def __str__(self):
         return self.nombre_asistencia
     
@@ -102,8 +105,7 @@ class TipoAsistencia(models.Model):
         Returns:
             bool: True si es un tipo único
         """
-        tipos_unicos = ['Entrada', 'Inicio Almuerzo', 'Fin Almuerzo', 'Salida']
-        return self.nombre_asistencia in tipos_unicos
+        return self.nombre_asistencia in self.TIPOS_UNICOS
     
     @property
     def requiere_descripcion(self):
@@ -113,8 +115,7 @@ class TipoAsistencia(models.Model):
         Returns:
             bool: True si requiere descripción
         """
-        tipos_con_descripcion = ['Entrada por otros', 'Salida por otros']
-        return self.nombre_asistencia in tipos_con_descripcion
+        return self.nombre_asistencia in self.TIPOS_CON_DESCRIPCION
 
 class RegistroAsistencia(models.Model):
     id_registro = models.AutoField(primary_key=True)
@@ -124,10 +125,35 @@ class RegistroAsistencia(models.Model):
     hora_registro = models.TimeField()
     descripcion = models.CharField(max_length=50, blank=True, null=True)   
     fingerprint = models.CharField(max_length=100, blank=True, null=True) # FingerprintJS ID del dispositivo
+    tipo_unico = models.BooleanField(default=False, editable=False) # Copia de tipo.es_tipo_unico para la restricción única
+    clave_idempotencia = models.CharField(max_length=64, unique=True, blank=True, null=True, editable=False) # Generada por el cliente en registros sincronizados sin conexión
+    sincronizado_en = models.DateTimeField(blank=True, null=True, editable=False) # Recepción en el servidor de un registro tomado sin conexión (fecha/hora son las del dispositivo)
+
+    class Meta:
+        indexes = [
+            # Exportaciones y consultas filtradas por empleado y rango de fechas
+            models.Index(fields=['empleado', 'fecha_registro', 'hora_registro'], name='registro_emp_fecha_hora_idx'),
+            # Exportaciones por rango de fechas: orden y paginación keyset por fecha/hora/id
+            models.Index(fields=['fecha_registro', 'hora_registro', 'id_registro'], name='registro_fecha_hora_id_idx'),
+            # Tablero en vivo: registros del día posteriores al último id visto
+            models.Index(fields=['fecha_registro', 'id_registro'], name='registro_fecha_id_idx'),
+        ]
+        constraints = [
+            # Entrada, Inicio/Fin Almuerzo y Salida: una sola vez por día, garantizado por la base de datos
+            models.UniqueConstraint(
+                fields=['empleado', 'tipo', 'fecha_registro'],
+                condition=models.Q(tipo_unico=True),
+                name='registro_tipo_unico_por_dia',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.empleado} - {self.tipo.nombre_asistencia} - {self.fecha_registro} {self.hora_registro}"
     
+    def save(self, *args, **kwargs):
+        self.tipo_unico = self.tipo.es_tipo_unico
+        super().save(*args, **kwargs)
+    
     @property
     def fecha_hora_completa(self):
         """Retorna la fecha y hora combinadas como string."""
@@ -165,6 +191,112 @@ class RegistroAsistencia(models.Model):
             fecha_registro=fecha
         ).select_related('tipo').order_by('hora_registro')
 
+class ResumenDiario(models.Model):
+    """
+    Resumen precalculado por empleado y día.
+    Se actualiza al registrar cada asistencia y se repara con `manage.py reconstruir_resumen`.
+    Las duraciones se guardan en segundos.
+    """
+    empleado = models.ForeignKey(Empleado, on_delete=models.CASCADE)
+    fecha = models.DateField()
+    almuerzo = models.IntegerField(default=0)
+    comision = models.IntegerField(default=0)
+    permiso = models.IntegerField(default=0)
+    trabajadas = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['empleado', 'fecha'], name='resumen_empleado_fecha_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha'], name='resumen_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.empleado} - {self.fecha}"
+
+class ReporteJob(models.Model):
+    """
+    Exportación pedida desde la página de descargas y generada en segundo plano
+    por `manage.py procesar_reportes`, fuera de los workers web.
+    """
+    PENDIENTE = 'pendiente'
+    PROCESANDO = 'procesando'
+    TERMINADO = 'terminado'
+    ERROR = 'error'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (PROCESANDO, 'Procesando'),
+        (TERMINADO, 'Terminado'),
+        (ERROR, 'Error'),
+    ]
+    TIPOS = [
+        ('asistencia', 'Asistencia (detalle)'),
+        ('resumen', 'Resumen diario'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    formato = models.CharField(max_length=10, default='xlsx')
+    parametros = models.JSONField(default=dict, blank=True)  # Filtros tal como llegaron (request.GET)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    solicitado_por = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True)
+    creado_en = models.DateTimeField(auto_now_add=True)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    latido_en = models.DateTimeField(null=True, blank=True)  # Lo actualiza el worker mientras genera el archivo
+    terminado_en = models.DateTimeField(null=True, blank=True)
+    archivo = models.FileField(upload_to='reportes/', blank=True)
+    tamano = models.BigIntegerField(null=True, blank=True)  # Bytes del archivo generado
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # El worker toma el pendiente más antiguo
+            models.Index(fields=['estado', 'id'], name='reportejob_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} ({self.formato}) - {self.get_estado_display()}"
+
+    @property
+    def nombre_descarga(self):
+        """Nombre del archivo descargado (mismo que la descarga directa)."""
+        base = 'registro_asistencia' if self.tipo == 'asistencia' else 'resumen_asistencia'
+        return f"{base}.{self.formato}"
+
+class VersionDatos(models.Model):
+    """
+    Contador de versión de datos cacheados (ver caches.CacheVersionada).
+    Vive en la base de datos para que todos los procesos vean la misma versión
+    aunque la caché de Django sea local de cada proceso.
+    """
+    clave = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.clave}: {self.version}"
+
+    @classmethod
+    def obtener(cls, clave):
+        """Versión vigente de `clave` (0 si nunca se incrementó)."""
+        return cls.objects.filter(clave=clave).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    async def aobtener(cls, clave):
+        """Versión async de obtener."""
+        return await cls.objects.filter(clave=clave).values_list('version', flat=True).afirst() or 0
+
+    @classmethod
+    def incrementar(cls, clave):
+        """
+        Incrementa la versión de `clave` dentro de la transacción en curso,
+        así el cambio de versión se confirma junto con los datos que la cambian.
+        """
+        if cls.objects.filter(clave=clave).update(version=models.F('version') + 1):
+            return
+        _, creada = cls.objects.get_or_create(clave=clave, defaults={'version': 1})
+        if not creada:
+            cls.objects.filter(clave=clave).update(version=models.F('version') + 1)
+
 # ACTIVIDADES: Deshabilitado temporalmente
 # class ActividadProyecto(models.Model):
 #     """Registro local de proyecto y actividad declarada por el empleado. Solo una vez por día (al registrar Entrada)."""
@@ -3,16 +3,166 @@ Servicio para manejar el sistema de códigos QR.
 Permite identificación automática de empleados mediante QR.
 """
 
-import qrcode
+import hashlib
+import io
+import logging
 import os
+import time
+import uuid
+from functools import lru_cache
+import qrcode
+import qrcode.image.svg
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
 from django.conf import settings
+from django.db import connections
 from django.http import JsonResponse
 from .models import Empleado
+from .caches import IndiceQR
+
+logger = logging.getLogger(__name__)
+
+
+QR_BOX_SIZE = 10  # Píxeles por módulo de las imágenes de empleados
+QR_CACHE_SIZE = 1024  # Imágenes codificadas que se conservan en memoria por proceso
+
+
+def construir_qr(data, box_size=QR_BOX_SIZE):
+    """
+    Construye el QR con los parámetros usados en todas las imágenes de empleados.
+    
+    Args:
+        data: Texto a codificar
+        box_size: Píxeles por módulo (opcional)
+        
+    Returns:
+        qrcode.QRCode: QR listo para generar la imagen
+    """
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def renderizar_png(url, box_size=QR_BOX_SIZE):
+    """
+    Genera el PNG del QR de una URL.
+    La URL se guarda como metadato (chunk tEXt) para detectar archivos vigentes sin regenerarlos.
+    
+    Args:
+        url: URL a codificar
+        box_size: Píxeles por módulo (opcional)
+        
+    Returns:
+        bytes: Contenido PNG
+    """
+    img = construir_qr(url, box_size).make_image(fill_color="black", back_color="white")
+    info = PngInfo()
+    info.add_text('url', url)
+    buffer = io.BytesIO()
+    img.save(buffer, pnginfo=info)
+    return buffer.getvalue()
+
+
+def renderizar_svg(url, box_size=QR_BOX_SIZE):
+    """
+    Genera el SVG del QR de una URL (fondo blanco, un solo path).
+    
+    Args:
+        url: URL a codificar
+        box_size: Tamaño del módulo; en SVG cada 10 equivalen a 1 mm
+        
+    Returns:
+        bytes: Contenido SVG
+    """
+    img = construir_qr(url, box_size).make_image(image_factory=qrcode.image.svg.SvgPathFillImage)
+    return img.to_string(encoding='UTF-8')
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def imagen_qr(codigo_qr, formato, box_size=QR_BOX_SIZE):
+    """
+    Imagen codificada del QR de un código de empleado, memorizada por código, formato y tamaño.
+    
+    Args:
+        codigo_qr: Código QR del empleado
+        formato: 'png' o 'svg'
+        box_size: Tamaño del módulo (opcional)
+        
+    Returns:
+        tuple: (contenido en bytes, ETag fuerte derivado del contenido)
+    """
+    url = QRService._url_qr(codigo_qr)
+    contenido = renderizar_svg(url, box_size) if formato == 'svg' else renderizar_png(url, box_size)
+    return contenido, f'"{hashlib.sha1(contenido).hexdigest()}"'
+
+
+def generar_archivo_qr(trabajo):
+    """
+    Escribe el PNG de un QR si el archivo no existe o corresponde a otra URL.
+    Se ejecuta en los procesos del pool, por lo que no usa el ORM.
+    
+    Args:
+        trabajo: Tupla (url, ruta del archivo)
+        
+    Returns:
+        bool: True si se generó la imagen, False si el archivo ya estaba vigente
+    """
+    url, filepath = trabajo
+    if os.path.exists(filepath):
+        try:
+            with Image.open(filepath) as existente:
+                if existente.info.get('url') == url:
+                    return False
+        except OSError:
+            pass  # Archivo dañado: se regenera
+    contenido = renderizar_png(url)
+    with open(filepath, 'wb') as f:
+        f.write(contenido)
+    return True
+
+
+def generar_archivo_qr_seguro(trabajo):
+    """
+    Variante de generar_archivo_qr para pool.map: devuelve la excepción en lugar de
+    propagarla, así un archivo con error no detiene el resto del lote.
+    
+    Args:
+        trabajo: Tupla (url, ruta del archivo)
+        
+    Returns:
+        bool | Exception: Resultado de generar_archivo_qr o el error producido
+    """
+    try:
+        return generar_archivo_qr(trabajo)
+    except Exception as e:
+        return e
 
 
 class QRService:
     """Servicio para manejar códigos QR de empleados."""
     
+    @staticmethod
+    def _url_qr(codigo_qr):
+        base_url = os.getenv("APP_URL", "http://127.0.0.1:8000")
+        return f"{base_url}/qr/{codigo_qr}/"
+    
+    @staticmethod
+    def _directorio_qr():
+        qr_dir = os.path.join(settings.BASE_DIR, 'qr_codes')
+        os.makedirs(qr_dir, exist_ok=True)
+        return qr_dir
+    
+    @staticmethod
+    def _ruta_qr(qr_dir, empleado):
+        return os.path.join(qr_dir, f"qr_{empleado.dni}_{empleado.codigo_qr}.png")
+    
     @staticmethod
     def generar_qr_empleado(empleado):
         """
@@ -27,57 +177,107 @@ class QRService:
         # Generar código QR si no existe
         codigo_qr = empleado.generar_codigo_qr()
         
-        # URL que se codificará en el QR
-        base_url = os.getenv("APP_URL", "http://127.0.0.1:8000")
-        qr_url = f"{base_url}/qr/{codigo_qr}/"
+        filepath = QRService._ruta_qr(QRService._directorio_qr(), empleado)
+        generar_archivo_qr((QRService._url_qr(codigo_qr), filepath))
+        return filepath
+    
+    @staticmethod
+    def asignar_codigos_faltantes(empleados):
+        """
+        Asigna código QR a los empleados que no lo tienen, con un solo bulk_update.
         
-        # Crear directorio si no existe
-        qr_dir = os.path.join(settings.BASE_DIR, 'qr_codes')
-        os.makedirs(qr_dir, exist_ok=True)
+        Args:
+            empleados: Lista de instancias de Empleado (se modifican en memoria)
+            
+        Returns:
+            int: Cantidad de códigos asignados
+        """
+        sin_codigo = [e for e in empleados if not e.codigo_qr]
+        for empleado in sin_codigo:
+            # Mismo formato que Empleado.generar_codigo_qr
+            empleado.codigo_qr = f"EMP{empleado.dni}{uuid.uuid4().hex[:8].upper()}"
+        if sin_codigo:
+            Empleado.objects.bulk_update(sin_codigo, ['codigo_qr'], batch_size=1000)
+            # bulk_update no dispara señales
+            IndiceQR.invalidar()
+        return len(sin_codigo)
+    
+    @staticmethod
+    def generar_qr_masivo(empleados=None, workers=None):
+        """
+        Genera los PNG de muchos empleados en paralelo.
+        
+        Asigna los códigos faltantes en una sola sentencia, reparte el renderizado
+        entre un ProcessPoolExecutor y omite los archivos que ya corresponden a la URL.
         
-        # Generar QR
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(qr_url)
-        qr.make(fit=True)
+        Args:
+            empleados: Iterable de Empleado (opcional, por defecto todos)
+            workers: Cantidad de procesos (opcional, por defecto os.cpu_count(); 1 = sin pool)
+            
+        Returns:
+            dict: archivos (lista de dicts empleado/archivo/codigo_qr), generados,
+                  omitidos, errores, segundos e imagenes_por_segundo
+        """
+        inicio = time.perf_counter()
+        empleados = list(empleados if empleados is not None else Empleado.objects.all())
+        QRService.asignar_codigos_faltantes(empleados)
         
-        # Crear imagen
-        img = qr.make_image(fill_color="black", back_color="white")
+        qr_dir = QRService._directorio_qr()
+        trabajos = [
+            (QRService._url_qr(e.codigo_qr), QRService._ruta_qr(qr_dir, e))
+            for e in empleados
+        ]
         
-        # Guardar archivo
-        filename = f"qr_{empleado.dni}_{codigo_qr}.png"
-        filepath = os.path.join(qr_dir, filename)
-        img.save(filepath)
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(trabajos) > 1:
+            # Los procesos hijos no deben heredar conexiones abiertas a la base de datos
+            connections.close_all()
+            # Trabajos en bloques: unos pocos envíos por proceso en lugar de uno por imagen
+            bloque = max(1, len(trabajos) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                resultados = list(pool.map(generar_archivo_qr_seguro, trabajos, chunksize=bloque))
+        else:
+            resultados = [generar_archivo_qr_seguro(t) for t in trabajos]
         
-        return filepath
+        archivos = []
+        generados = omitidos = errores = 0
+        for empleado, (_, filepath), resultado in zip(empleados, trabajos, resultados):
+            if isinstance(resultado, Exception):
+                logger.error("Error generando QR para %s", empleado, exc_info=resultado)
+                errores += 1
+                continue
+            if resultado:
+                generados += 1
+            else:
+                omitidos += 1
+            archivos.append({
+                'empleado': empleado,
+                'archivo': filepath,
+                'codigo_qr': empleado.codigo_qr
+            })
+        
+        segundos = time.perf_counter() - inicio
+        return {
+            'archivos': archivos,
+            'generados': generados,
+            'omitidos': omitidos,
+            'errores': errores,
+            'segundos': segundos,
+            'imagenes_por_segundo': generados / segundos if segundos else 0.0,
+        }
     
     @staticmethod
-    def generar_qr_todos_empleados():
+    def generar_qr_todos_empleados(workers=None):
         """
         Genera códigos QR para todos los empleados.
         
+        Args:
+            workers: Cantidad de procesos para renderizar (opcional)
+            
         Returns:
             list: Lista de rutas de archivos generados
         """
-        empleados = Empleado.objects.all()
-        archivos_generados = []
-        
-        for empleado in empleados:
-            try:
-                archivo = QRService.generar_qr_empleado(empleado)
-                archivos_generados.append({
-                    'empleado': empleado,
-                    'archivo': archivo,
-                    'codigo_qr': empleado.codigo_qr
-                })
-            except Exception as e:
-                print(f"Error generando QR para {empleado}: {e}")
-        
-        return archivos_generados
+        return QRService.generar_qr_masivo(workers=workers)['archivos']
     
     @staticmethod
     def buscar_empleado_por_qr(codigo_qr):
@@ -91,18 +291,13 @@ class QRService:
             dict: Respuesta con empleado encontrado o error
         """
         try:
-            empleado = Empleado.buscar_por_codigo_qr(codigo_qr)
+            # Índice en memoria; solo consulta la base de datos si el código no está
+            empleado = IndiceQR.obtener(codigo_qr)
             
             if empleado:
                 return {
                     'success': True,
-                    'empleado': {
-                        'id': empleado.id_empleado,
-                        'nombres': empleado.nombres,
-                        'apellidos': empleado.apellidos,
-                        'nombre_completo': empleado.nombre_completo,
-                        'dni': empleado.dni
-                    }
+                    'empleado': empleado
                 }
             else:
                 return {
@@ -116,6 +311,25 @@ class QRService:
                 'error': f'Error al buscar empleado: {str(e)}'
             }
     
+    @staticmethod
+    async def abuscar_empleado_por_qr(codigo_qr):
+        """
+        Versión async de buscar_empleado_por_qr para las vistas ASGI.
+        
+        Args:
+            codigo_qr: Código QR escaneado
+            
+        Returns:
+            dict: Respuesta con empleado encontrado o error
+        """
+        try:
+            empleado = await IndiceQR.aobtener(codigo_qr)
+            if empleado:
+                return {'success': True, 'empleado': empleado}
+            return {'success': False, 'error': 'Empleado no encontrado'}
+        except Exception as e:
+            return {'success': False, 'error': f'Error al buscar empleado: {str(e)}'}
+    
     @staticmethod
     def obtener_url_qr_empleado(empleado):
         """
@@ -128,5 +342,4 @@ class QRService:
             str: URL del QR
         """
         codigo_qr = empleado.generar_codigo_qr()
-        base_url = os.getenv("APP_URL", "http://127.0.0.1:8000")
-        return f"{base_url}/qr/{codigo_qr}/"
+        return QRService._url_qr(codigo_qr)
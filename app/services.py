@@ -3,18 +3,28 @@ Servicios de negocio para el sistema de asistencia.
 Contiene la lógica de negocio separada de las vistas.
 """
 
-from datetime import datetime, timedelta
+import logging
+from datetime import date, datetime, timedelta
 from collections import defaultdict
 from django.utils import timezone
 from django.contrib import messages
-from django.db.models import Q
-from .models import Empleado, TipoAsistencia, RegistroAsistencia, DispositivoEmpleado
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, Min, OuterRef, Q
+from .models import Empleado, TipoAsistencia, RegistroAsistencia, DispositivoEmpleado, ResumenDiario
+from .caches import CatalogoTipos, CacheFingerprint, IndiceQR, UltimoRegistro, VersionReportes
+from .eventos import publicar_registros
 
+logger = logging.getLogger(__name__)
 
 class AsistenciaService:
     """Servicio para manejar la lógica de negocio de asistencia."""
     
-    TIPOS_UNICOS = ['Entrada', 'Inicio Almuerzo', 'Fin Almuerzo', 'Salida']
+    # Sincronización de registros tomados sin conexión
+    MAX_LOTE_SINCRONIZACION = 500
+    # La cola del cliente se envía al volver la red, en el siguiente registro o al abrir
+    # una página; 72 horas cubren un fin de semana sin Background Sync (iOS)
+    MAX_ANTIGUEDAD_SINCRONIZACION = timedelta(hours=72)
+    TOLERANCIA_RELOJ = timedelta(minutes=5)  # Relojes de dispositivos adelantados
 
     @staticmethod
     def _normalize_fingerprint(fingerprint):
@@ -27,45 +37,45 @@ class AsistenciaService:
         return s
     
     @staticmethod
-    def validar_registro_duplicado(empleado, tipo_asistencia, fecha):
+    def _insertar_registro(registro):
         """
-        Valida si ya existe un registro del mismo tipo para el empleado en la fecha.
-        
-        Args:
-            empleado: Instancia de Empleado
-            tipo_asistencia: Instancia de TipoAsistencia
-            fecha: Fecha a validar
-            
-        Returns:
-            bool: True si ya existe el registro
+        Inserta el registro en una transacción (o un savepoint si ya hay una abierta).
+        La señal post_save actualiza ResumenDiario en la misma transacción, y una
+        violación de la restricción única revierte ambos sin afectar al llamador.
         """
-        if tipo_asistencia.nombre_asistencia in AsistenciaService.TIPOS_UNICOS:
-            return RegistroAsistencia.objects.filter(
-                empleado=empleado,
-                tipo=tipo_asistencia,
-                fecha_registro=fecha
-            ).exists()
-        return False
+        with transaction.atomic():
+            registro.save(force_insert=True)
     
     @staticmethod
-    def validar_fingerprint_unico(empleado, fingerprint, fecha):
+    def _es_tipo_unico_repetido(registro):
         """
-        Bloquea solo si el fingerprint está VINCULADO a otro empleado distinto.
-        Si no se proporciona fingerprint (None/cadena vacía/null/undefined), no aplica la validación.
+        Indica si un IntegrityError al insertar corresponde a la restricción
+        registro_tipo_unico_por_dia (el tipo ya se registró ese día) y no a otra
+        violación de integridad (NOT NULL, clave foránea, etc.).
+        
+        Args:
+            registro: RegistroAsistencia que no se pudo insertar
+            
+        Returns:
+            bool: True si ya existe el registro único del día
         """
-        fp = AsistenciaService._normalize_fingerprint(fingerprint)
-        if not fp:
-            return False  # no bloquear si no hay fingerprint válido
-        vinculo = DispositivoEmpleado.objects.select_related('empleado').filter(fingerprint=fp).first()
-        if vinculo and vinculo.empleado_id != empleado.id_empleado:
-            return True  # fingerprint pertenece a otro empleado
-        return False
+        return registro.tipo_unico and RegistroAsistencia.objects.filter(
+            empleado_id=registro.empleado_id,
+            tipo_id=registro.tipo_id,
+            fecha_registro=registro.fecha_registro,
+            tipo_unico=True,
+        ).exists()
     
     @staticmethod
     def crear_registro_asistencia(empleado_id, tipo_id, descripcion, fingerprint):
         """
         Crea un nuevo registro de asistencia.
         
+        El tipo se toma del catálogo en memoria, el vínculo del fingerprint de
+        CacheFingerprint (la misma caché que la auto-identificación), y el
+        duplicado de tipos únicos lo rechaza la restricción de la base de datos
+        al insertar, en lugar de una consulta previa.
+        
         Args:
             empleado_id: ID del empleado
             tipo_id: ID del tipo de asistencia
@@ -76,34 +86,39 @@ class AsistenciaService:
             tuple: (success, message, registro)
         """
         try:
-            empleado = Empleado.objects.get(id_empleado=empleado_id)
-            tipo_asistencia = TipoAsistencia.objects.get(id_tipo=tipo_id)
+            tipo_asistencia = CatalogoTipos.obtener(tipo_id)
             
-            now = timezone.localtime()
-            fecha = now.date()
-            hora = now.time()
-
             # Normalizar fingerprint recibido
             fingerprint = AsistenciaService._normalize_fingerprint(fingerprint)
             
-            # Validar registro duplicado
-            if AsistenciaService.validar_registro_duplicado(empleado, tipo_asistencia, fecha):
-                return False, f'Ya registraste "{tipo_asistencia.nombre_asistencia}" hoy.', None
+            empleado = Empleado.objects.get(id_empleado=empleado_id)
             
             # Validar fingerprint vinculado a otra persona
-            if AsistenciaService.validar_fingerprint_unico(empleado, fingerprint, fecha):
+            vinculado = CacheFingerprint.obtener(fingerprint) if fingerprint else None
+            if vinculado and vinculado['id'] != empleado.id_empleado:
                 return False, "Este dispositivo está vinculado a otro empleado.", None
             
-            # Crear registro
-            registro = RegistroAsistencia.objects.create(
+            now = timezone.localtime()
+            registro = RegistroAsistencia(
                 empleado=empleado,
                 tipo=tipo_asistencia,
-                fecha_registro=fecha,
-                hora_registro=hora,
+                fecha_registro=now.date(),
+                hora_registro=now.time(),
                 descripcion=descripcion,
                 fingerprint=fingerprint
             )
             
+            # Validar registro duplicado: la restricción única rechaza el INSERT
+            try:
+                AsistenciaService._insertar_registro(registro)
+            except IntegrityError:
+                if not AsistenciaService._es_tipo_unico_repetido(registro):
+                    raise
+                return False, f'Ya registraste "{tipo_asistencia.nombre_asistencia}" hoy.', None
+            
+            # Tableros y pantallas conectados por SSE
+            publicar_registros([registro])
+            
             return True, f'{tipo_asistencia.nombre_asistencia} registrada correctamente.', registro
             
         except (Empleado.DoesNotExist, TipoAsistencia.DoesNotExist):
@@ -111,6 +126,168 @@ class AsistenciaService:
         except Exception as e:
             return False, f"Error inesperado: {str(e)}", None
 
+    
+    @staticmethod
+    def _leer_marca(marca, ahora):
+        """
+        Valida una marca enviada por la cola sin conexión del cliente.
+        
+        Args:
+            marca: dict con clave, empleado_id (o codigo_qr), tipo_id, fecha_hora
+                   (ISO 8601 del dispositivo), descripcion y fingerprint
+            ahora: datetime actual con zona horaria
+            
+        Returns:
+            dict: empleado_id, tipo, fecha, hora, descripcion y fingerprint
+            
+        Raises:
+            ValueError: Con el motivo del rechazo
+        """
+        try:
+            tipo = CatalogoTipos.obtener(marca.get('tipo_id'))
+        except TipoAsistencia.DoesNotExist:
+            raise ValueError("Tipo de asistencia no encontrado.")
+        
+        empleado_id = marca.get('empleado_id')
+        if not empleado_id and marca.get('codigo_qr'):
+            empleado = IndiceQR.obtener(str(marca['codigo_qr']))
+            empleado_id = empleado['id'] if empleado else None
+        try:
+            empleado_id = int(empleado_id)
+        except (TypeError, ValueError):
+            raise ValueError("Empleado no encontrado.")
+        
+        try:
+            fecha_hora = datetime.fromisoformat(str(marca.get('fecha_hora')))
+        except ValueError:
+            raise ValueError("Fecha y hora del dispositivo inválidas.")
+        if timezone.is_naive(fecha_hora):
+            fecha_hora = timezone.make_aware(fecha_hora)
+        if fecha_hora > ahora + AsistenciaService.TOLERANCIA_RELOJ:
+            raise ValueError("La fecha y hora del dispositivo están en el futuro.")
+        if fecha_hora < ahora - AsistenciaService.MAX_ANTIGUEDAD_SINCRONIZACION:
+            raise ValueError("El registro es demasiado antiguo para sincronizarse.")
+        fecha_hora = timezone.localtime(fecha_hora)
+        
+        descripcion = str(marca.get('descripcion') or '').strip()[:50]
+        if CatalogoTipos.requiere_descripcion(tipo.id_tipo) and not descripcion:
+            raise ValueError(f'"{tipo.nombre_asistencia}" requiere una descripción.')
+        
+        return {
+            'empleado_id': empleado_id,
+            'tipo': tipo,
+            'fecha': fecha_hora.date(),
+            'hora': fecha_hora.time(),
+            'descripcion': descripcion,
+            'fingerprint': AsistenciaService._normalize_fingerprint(marca.get('fingerprint')),
+        }
+    
+    @staticmethod
+    def sincronizar_registros(marcas):
+        """
+        Registra en lote las marcas que el cliente tomó sin conexión.
+        
+        Cada marca trae una clave de idempotencia generada por el cliente, así que
+        reenviar el lote (p. ej. tras un corte a mitad de la respuesta) no duplica
+        registros. Todo se inserta con un solo bulk_create(ignore_conflicts=True) en
+        una transacción; las marcas que la restricción de tipos únicos descarta se
+        informan como duplicadas. Los registros guardados quedan con sincronizado_en
+        (hora de recepción) para distinguirlos en las exportaciones, ya que su
+        fecha y hora son las del dispositivo.
+        
+        Args:
+            marcas: Lista de dicts (ver _leer_marca) con la clave de idempotencia en "clave"
+            
+        Returns:
+            list: Un dict por marca, en el mismo orden, con clave, estado
+                  ("registrado", "ya_recibido", "duplicado" o "rechazado") y mensaje
+        """
+        ahora = timezone.now()
+        resultados = [None] * len(marcas)
+        leidas = {}  # clave -> (índice, datos)
+        repetidas = []  # (índice, clave) de claves repetidas dentro del lote
+        
+        for i, marca in enumerate(marcas):
+            clave = str(marca.get('clave') or '').strip() if isinstance(marca, dict) else ''
+            if not clave or len(clave) > 64:
+                resultados[i] = {'clave': clave, 'estado': 'rechazado', 'mensaje': "Clave de idempotencia inválida."}
+                continue
+            if clave in leidas:
+                repetidas.append((i, clave))
+                continue
+            try:
+                leidas[clave] = (i, AsistenciaService._leer_marca(marca, ahora))
+            except ValueError as e:
+                resultados[i] = {'clave': clave, 'estado': 'rechazado', 'mensaje': str(e)}
+        
+        # Empleados y vínculos de fingerprint de todo el lote en dos consultas
+        empleados = set(Empleado.objects.filter(
+            id_empleado__in={d['empleado_id'] for _, d in leidas.values()}
+        ).values_list('id_empleado', flat=True))
+        vinculos = dict(DispositivoEmpleado.objects.filter(
+            fingerprint__in={d['fingerprint'] for _, d in leidas.values() if d['fingerprint']}
+        ).values_list('fingerprint', 'empleado_id'))
+        
+        registros = {}
+        for clave, (i, datos) in leidas.items():
+            vinculo = vinculos.get(datos['fingerprint'])
+            if datos['empleado_id'] not in empleados:
+                resultados[i] = {'clave': clave, 'estado': 'rechazado', 'mensaje': "Empleado no encontrado."}
+            elif vinculo is not None and vinculo != datos['empleado_id']:
+                resultados[i] = {'clave': clave, 'estado': 'rechazado',
+                                 'mensaje': "Este dispositivo está vinculado a otro empleado."}
+            else:
+                registros[clave] = RegistroAsistencia(
+                    empleado_id=datos['empleado_id'],
+                    tipo=datos['tipo'],
+                    fecha_registro=datos['fecha'],
+                    hora_registro=datos['hora'],
+                    descripcion=datos['descripcion'],
+                    fingerprint=datos['fingerprint'],
+                    # bulk_create no llama a save(): se copia el flag de la restricción única
+                    tipo_unico=CatalogoTipos.es_unico(datos['tipo'].id_tipo),
+                    clave_idempotencia=clave,
+                    sincronizado_en=ahora,
+                )
+        
+        with transaction.atomic():
+            recibidas = set(RegistroAsistencia.objects.filter(
+                clave_idempotencia__in=registros.keys()
+            ).values_list('clave_idempotencia', flat=True))
+            RegistroAsistencia.objects.bulk_create(
+                [r for clave, r in registros.items() if clave not in recibidas],
+                ignore_conflicts=True,
+            )
+            guardadas = set(RegistroAsistencia.objects.filter(
+                clave_idempotencia__in=[c for c in registros if c not in recibidas]
+            ).values_list('clave_idempotencia', flat=True))
+            if guardadas:
+                # bulk_create no dispara post_save
+                transaction.on_commit(UltimoRegistro.invalidar)
+                publicar_registros(
+                    RegistroAsistencia.objects.filter(clave_idempotencia__in=guardadas)
+                    .select_related('empleado', 'tipo').order_by('id_registro')
+                )
+                ReporteService.actualizar_resumenes(
+                    {(r.empleado_id, r.fecha_registro) for c, r in registros.items() if c in guardadas}
+                )
+        
+        for clave, registro in registros.items():
+            i = leidas[clave][0]
+            nombre = registro.tipo.nombre_asistencia
+            if clave in recibidas:
+                resultados[i] = {'clave': clave, 'estado': 'ya_recibido', 'mensaje': "Registro ya recibido."}
+            elif clave in guardadas:
+                resultados[i] = {'clave': clave, 'estado': 'registrado',
+                                 'mensaje': f'{nombre} registrada correctamente.'}
+            else:
+                resultados[i] = {'clave': clave, 'estado': 'duplicado',
+                                 'mensaje': f'Ya registraste "{nombre}" el {registro.fecha_registro:%d/%m/%Y}.'}
+        for i, clave in repetidas:
+            resultados[i] = resultados[leidas[clave][0]]
+        
+        return resultados
+
 
 class ReporteService:
     """Servicio para generar reportes de asistencia."""
@@ -126,7 +303,19 @@ class ReporteService:
         Returns:
             str: Formato HH:MM
         """
-        total_seconds = int(td.total_seconds())
+        return ReporteService.strfsegundos(int(td.total_seconds()))
+    
+    @staticmethod
+    def strfsegundos(total_seconds):
+        """
+        Convierte una cantidad de segundos a formato HH:MM.
+        
+        Args:
+            total_seconds: int
+            
+        Returns:
+            str: Formato HH:MM
+        """
         hours, remainder = divmod(total_seconds, 3600)
         minutes = remainder // 60
         return f"{hours:02d}:{minutes:02d}"
@@ -137,15 +326,117 @@ class ReporteService:
         return datetime.combine(datetime.today(), t2) - datetime.combine(datetime.today(), t1)
     
     @staticmethod
-    def obtener_datos_resumen():
+    def obtener_filtros(params):
+        """
+        Lee los filtros de exportación enviados por la página de descargas.
+        
+        Args:
+            params: Parámetros de la petición (request.GET)
+            
+        Returns:
+            dict: Filtros presentes (desde, hasta, empleado_id, contrato)
+            
+        Raises:
+            ValueError: Si una fecha o el empleado tienen formato inválido
+        """
+        filtros = {}
+        for clave in ('desde', 'hasta'):
+            valor = (params.get(clave) or '').strip()
+            if valor:
+                try:
+                    filtros[clave] = date.fromisoformat(valor)
+                except ValueError:
+                    raise ValueError(f'Fecha inválida en "{clave}": {valor}')
+        
+        if 'desde' in filtros and 'hasta' in filtros and filtros['desde'] > filtros['hasta']:
+            raise ValueError('La fecha "desde" no puede ser posterior a la fecha "hasta".')
+        
+        empleado = (params.get('empleado') or '').strip()
+        if empleado:
+            if not empleado.isdigit():
+                raise ValueError('Empleado inválido.')
+            filtros['empleado_id'] = int(empleado)
+        
+        contrato = (params.get('contrato') or '').strip()
+        if contrato:
+            filtros['contrato'] = contrato
+        
+        return filtros
+    
+    @staticmethod
+    def filtrar_registros(registros, filtros=None, campo_fecha='fecha_registro'):
+        """
+        Aplica los filtros de exportación sobre un QuerySet de registros.
+        Los filtros se resuelven en la base de datos (índices por fecha y empleado).
+        
+        Args:
+            registros: QuerySet de RegistroAsistencia o ResumenDiario
+            filtros: dict devuelto por obtener_filtros (opcional)
+            campo_fecha: Campo de fecha del modelo filtrado
+            
+        Returns:
+            QuerySet: Registros filtrados
+        """
+        if not filtros:
+            return registros
+        if 'desde' in filtros:
+            registros = registros.filter(**{f'{campo_fecha}__gte': filtros['desde']})
+        if 'hasta' in filtros:
+            registros = registros.filter(**{f'{campo_fecha}__lte': filtros['hasta']})
+        if 'empleado_id' in filtros:
+            registros = registros.filter(empleado_id=filtros['empleado_id'])
+        if 'contrato' in filtros:
+            registros = registros.filter(empleado__contrato=filtros['contrato'])
+        return registros
+    
+    @staticmethod
+    def registros_nuevos(fecha, desde_id=0, limite=500):
+        """
+        Registros de una fecha con id_registro mayor al último visto por el cliente.
+        Usa el índice (fecha_registro, id_registro): solo lee las filas nuevas.
+        
+        Args:
+            fecha: Fecha de los registros
+            desde_id: Último id_registro que ya tiene el cliente
+            limite: Máximo de registros a retornar
+            
+        Returns:
+            tuple: (lista de dicts ordenada por id, hay_mas)
+        """
+        filas = list(
+            RegistroAsistencia.objects
+            .filter(fecha_registro=fecha, id_registro__gt=desde_id)
+            .order_by('id_registro')
+            .values_list('id_registro', 'empleado_id', 'empleado__nombres', 'empleado__apellidos',
+                         'tipo__nombre_asistencia', 'hora_registro', 'descripcion')[:limite + 1]
+        )
+        registros = [
+            {
+                'id': id_registro,
+                'empleado_id': empleado_id,
+                'empleado': f"{nombres} {apellidos}",
+                'tipo': tipo,
+                'hora': hora.strftime('%H:%M:%S'),
+                'descripcion': descripcion or '',
+            }
+            for id_registro, empleado_id, nombres, apellidos, tipo, hora, descripcion in filas[:limite]
+        ]
+        return registros, len(filas) > limite
+    
+    @staticmethod
+    def obtener_datos_resumen(filtros=None):
         """
         Obtiene los datos para el resumen diario de asistencia.
         
+        Args:
+            filtros: dict devuelto por obtener_filtros (opcional)
+            
         Returns:
             dict: Datos organizados por empleado y fecha
         """
         registros = RegistroAsistencia.objects.select_related('empleado', 'tipo') \
             .order_by('empleado', 'fecha_registro', 'hora_registro')
+        registros = ReporteService.filtrar_registros(registros, filtros)
         
         datos_diarios = defaultdict(lambda: defaultdict(list))
         for reg in registros:
@@ -157,16 +448,16 @@ class ReporteService:
         return datos_diarios
     
     @staticmethod
-    def calcular_horas_empleado(data):
+    def calcular_segundos_empleado(data):
         """
-        Calcula las horas trabajadas, almuerzo, comisiones y permisos para un empleado.
+        Calcula las duraciones de almuerzo, comisión, permiso y horas trabajadas en segundos.
         Hace las búsquedas de tipos de asistencia de forma case-insensitive para evitar errores por variaciones de mayúsculas/minúsculas.
         
         Args:
             data: Datos del empleado para una fecha específica
             
         Returns:
-            dict: Horas calculadas
+            dict: Segundos por concepto (int)
         """
         almuerzo = timedelta()
         comision = timedelta()
@@ -200,8 +491,259 @@ class ReporteService:
             trabajadas = total_dia - almuerzo - permiso
         
         return {
-            'almuerzo': ReporteService.strfdelta(almuerzo),
-            'comision': ReporteService.strfdelta(comision),
-            'permiso': ReporteService.strfdelta(permiso),
-            'trabajadas': ReporteService.strfdelta(trabajadas)
+            'almuerzo': int(almuerzo.total_seconds()),
+            'comision': int(comision.total_seconds()),
+            'permiso': int(permiso.total_seconds()),
+            'trabajadas': int(trabajadas.total_seconds())
+        }
+    
+    @staticmethod
+    def calcular_horas_empleado(data):
+        """
+        Calcula las horas trabajadas, almuerzo, comisiones y permisos para un empleado.
+        
+        Args:
+            data: Datos del empleado para una fecha específica
+            
+        Returns:
+            dict: Horas calculadas
+        """
+        segundos = ReporteService.calcular_segundos_empleado(data)
+        return {clave: ReporteService.strfsegundos(valor) for clave, valor in segundos.items()}
+    
+    # Tipos que intervienen en el resumen, en el orden de las columnas del pivote
+    TIPOS_RESUMEN = (
+        'entrada', 'salida', 'inicio almuerzo', 'fin almuerzo',
+        'salida por comisión', 'entrada por comisión', 'salida por otros', 'entrada por otros',
+    )
+    
+    @staticmethod
+    def microsegundos(hora):
+        """Convierte un time a microsegundos desde la medianoche."""
+        return ((hora.hour * 60 + hora.minute) * 60 + hora.second) * 1_000_000 + hora.microsecond
+    
+    @staticmethod
+    def _truncar_segundos(us):
+        """Convierte microsegundos a segundos enteros truncando hacia cero (como int(td.total_seconds()))."""
+        return us // 1_000_000 if us >= 0 else -((-us) // 1_000_000)
+    
+    @staticmethod
+    def _columna_por_tipo(nombres_tipo=None):
+        """
+        Relaciona cada tipo de asistencia con su columna en TIPOS_RESUMEN
+        (comparando nombres sin distinguir mayúsculas). Los demás tipos no aparecen.
+        
+        Args:
+            nombres_tipo: dict id_tipo -> nombre (opcional, por defecto el catálogo)
+            
+        Returns:
+            dict: id_tipo -> índice de columna
+        """
+        if nombres_tipo is None:
+            nombres_tipo = {t.id_tipo: t.nombre_asistencia for t in CatalogoTipos.todos()}
+        posiciones = {nombre: i for i, nombre in enumerate(ReporteService.TIPOS_RESUMEN)}
+        return {
+            id_tipo: posiciones[nombre.lower()]
+            for id_tipo, nombre in nombres_tipo.items()
+            if nombre.lower() in posiciones
         }
+    
+    @staticmethod
+    def _segundos_fila(fila):
+        """
+        Calcula las cuatro duraciones de un día a partir de la primera hora de cada
+        tipo (microsegundos o None, en el orden de TIPOS_RESUMEN).
+        """
+        entrada, salida, ini_alm, fin_alm, sal_com, ent_com, sal_otr, ent_otr = fila
+        almuerzo = fin_alm - ini_alm if ini_alm is not None and fin_alm is not None else 0
+        comision = ent_com - sal_com if sal_com is not None and ent_com is not None else 0
+        permiso = ent_otr - sal_otr if sal_otr is not None and ent_otr is not None else 0
+        trabajadas = salida - entrada - almuerzo - permiso if entrada is not None and salida is not None else 0
+        truncar = ReporteService._truncar_segundos
+        return {
+            'almuerzo': truncar(almuerzo),
+            'comision': truncar(comision),
+            'permiso': truncar(permiso),
+            'trabajadas': truncar(trabajadas),
+        }
+    
+    @staticmethod
+    def calcular_segundos_lote(empleado_ids, fechas, tipo_ids, microsegundos, nombres_tipo=None):
+        """
+        Calcula los resúmenes de muchos empleado-días en una sola pasada.
+        
+        Recibe las marcas como columnas paralelas, las pivota por (empleado, fecha)
+        quedándose con la primera hora de cada tipo, y calcula las cuatro duraciones
+        con aritmética entera. El resultado es idéntico a calcular_segundos_empleado.
+        
+        Args:
+            empleado_ids: Secuencia de IDs de empleado
+            fechas: Secuencia de fechas
+            tipo_ids: Secuencia de IDs de tipo de asistencia
+            microsegundos: Secuencia de horas en microsegundos desde la medianoche
+            nombres_tipo: dict id_tipo -> nombre (opcional, por defecto el catálogo)
+            
+        Returns:
+            dict: (empleado_id, fecha) -> segundos por concepto
+        """
+        columna_por_tipo = ReporteService._columna_por_tipo(nombres_tipo)
+        pivote = {}
+        for clave, tipo_id, us in zip(zip(empleado_ids, fechas), tipo_ids, microsegundos):
+            fila = pivote.get(clave)
+            if fila is None:
+                fila = pivote[clave] = [None] * 8
+            columna = columna_por_tipo.get(tipo_id)
+            if columna is not None and (fila[columna] is None or us < fila[columna]):
+                fila[columna] = us
+        
+        return {clave: ReporteService._segundos_fila(fila) for clave, fila in pivote.items()}
+    
+    @staticmethod
+    def calcular_segundos_dias(dias):
+        """
+        Calcula los resúmenes de varios empleado-días con una sola consulta agregada:
+        la base de datos devuelve la primera hora de cada tipo por día, sin leer las marcas.
+        
+        Args:
+            dias: Conjunto de (empleado_id, fecha)
+            
+        Returns:
+            dict: (empleado_id, fecha) -> segundos por concepto; los días sin registros no aparecen
+        """
+        condicion = Q()
+        for empleado_id, fecha in dias:
+            condicion |= Q(empleado_id=empleado_id, fecha_registro=fecha)
+        if not condicion:
+            return {}
+        
+        tipos_por_columna = defaultdict(list)
+        for id_tipo, columna in ReporteService._columna_por_tipo().items():
+            tipos_por_columna[columna].append(id_tipo)
+        primeras = {
+            f'primera_{columna}': Min('hora_registro', filter=Q(tipo_id__in=ids))
+            for columna, ids in tipos_por_columna.items()
+        }
+        
+        # Count mantiene el GROUP BY aunque ningún tipo del catálogo entre en el resumen
+        filas = RegistroAsistencia.objects.filter(condicion) \
+            .values('empleado_id', 'fecha_registro').annotate(marcas=Count('id_registro'), **primeras).order_by()
+        resultado = {}
+        for fila in filas:
+            horas = [fila.get(f'primera_{columna}') for columna in range(len(ReporteService.TIPOS_RESUMEN))]
+            resultado[(fila['empleado_id'], fila['fecha_registro'])] = ReporteService._segundos_fila(
+                [ReporteService.microsegundos(hora) if hora is not None else None for hora in horas]
+            )
+        return resultado
+    
+    @staticmethod
+    def _guardar_lote(empleado_ids, fechas, tipo_ids, microsegundos):
+        """Calcula y guarda los resúmenes de un lote de marcas. Retorna la cantidad guardada."""
+        resultado = ReporteService.calcular_segundos_lote(empleado_ids, fechas, tipo_ids, microsegundos)
+        ReporteService._guardar_resumenes([
+            ResumenDiario(empleado_id=empleado_id, fecha=fecha, **segundos)
+            for (empleado_id, fecha), segundos in resultado.items()
+        ])
+        return len(resultado)
+    
+    @staticmethod
+    def _guardar_resumenes(resumenes):
+        """Inserta o actualiza resúmenes en una sola sentencia (upsert por empleado y fecha)."""
+        ResumenDiario.objects.bulk_create(
+            resumenes,
+            update_conflicts=True,
+            unique_fields=['empleado', 'fecha'],
+            update_fields=['almuerzo', 'comision', 'permiso', 'trabajadas'],
+        )
+    
+    @staticmethod
+    def actualizar_resumenes(dias):
+        """
+        Recalcula los resúmenes de los días con registros nuevos: una consulta agregada
+        y un upsert para todos los días, dentro de la transacción del INSERT (sin savepoint
+        propio: si falla se revierte también el registro).
+        
+        Args:
+            dias: Conjunto de (empleado_id, fecha)
+            
+        Returns:
+            dict: (empleado_id, fecha) -> segundos de los días con registros
+        """
+        resultado = ReporteService.calcular_segundos_dias(dias)
+        if resultado:
+            ReporteService._guardar_resumenes([
+                ResumenDiario(empleado_id=empleado_id, fecha=fecha, **segundos)
+                for (empleado_id, fecha), segundos in resultado.items()
+            ])
+        return resultado
+    
+    @staticmethod
+    def recalcular_resumenes(dias):
+        """
+        Recalcula los resúmenes tras editar o eliminar registros, dentro de la
+        transacción en curso, y elimina los de días que quedaron sin registros.
+        Usa un savepoint: si falla se registra el error y el cambio del registro
+        se conserva (se repara con `manage.py reconstruir_resumen`).
+        
+        Args:
+            dias: Iterable de (empleado_id, fecha)
+        """
+        dias = set(dias)
+        try:
+            with transaction.atomic():
+                vacios = dias - ReporteService.actualizar_resumenes(dias).keys()
+                condicion = Q()
+                for empleado_id, fecha in vacios:
+                    condicion |= Q(empleado_id=empleado_id, fecha=fecha)
+                if condicion:
+                    ResumenDiario.objects.filter(condicion).delete()
+        except Exception:
+            logger.exception("No se pudieron actualizar los resúmenes diarios de %s", sorted(dias))
+    
+    @staticmethod
+    def reconstruir_resumen(desde=None, hasta=None, lote=1000):
+        """
+        Recalcula los resúmenes diarios desde los registros de asistencia.
+        Recorre los registros por lotes y elimina resúmenes de días sin registros.
+        
+        Args:
+            desde: Fecha inicial (opcional)
+            hasta: Fecha final (opcional)
+            lote: Cantidad de resúmenes por sentencia de upsert
+            
+        Returns:
+            tuple: (resúmenes guardados, resúmenes eliminados)
+        """
+        filtros = {k: v for k, v in (('desde', desde), ('hasta', hasta)) if v}
+        registros = ReporteService.filtrar_registros(RegistroAsistencia.objects.all(), filtros) \
+            .order_by('empleado_id', 'fecha_registro') \
+            .values_list('empleado_id', 'fecha_registro', 'tipo_id', 'hora_registro')
+        
+        # Las marcas se acumulan en columnas y se procesan por lotes de `lote` empleado-días;
+        # el orden por (empleado, fecha) garantiza que un día nunca quede partido entre lotes
+        guardados = 0
+        columnas = ([], [], [], [])
+        dias = 0
+        anterior = None
+        for empleado_id, fecha, tipo_id, hora in registros.iterator(chunk_size=2000):
+            if (empleado_id, fecha) != anterior:
+                if dias >= lote:
+                    guardados += ReporteService._guardar_lote(*columnas)
+                    columnas = ([], [], [], [])
+                    dias = 0
+                anterior = (empleado_id, fecha)
+                dias += 1
+            columnas[0].append(empleado_id)
+            columnas[1].append(fecha)
+            columnas[2].append(tipo_id)
+            columnas[3].append(ReporteService.microsegundos(hora))
+        if dias:
+            guardados += ReporteService._guardar_lote(*columnas)
+        
+        huerfanos = ReporteService.filtrar_registros(ResumenDiario.objects.all(), filtros, campo_fecha='fecha') \
+            .exclude(Exists(RegistroAsistencia.objects.filter(
+                empleado_id=OuterRef('empleado_id'),
+                fecha_registro=OuterRef('fecha')
+            )))
+        eliminados, _ = huerfanos.delete()
+        VersionReportes.invalidar()
+        return guardados, eliminados
@@ -0,0 +1,110 @@
+"""
+Señales de modelos para mantener coherentes las cachés en memoria y el
+resumen diario precalculado.
+"""
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.db import transaction
+from django.dispatch import receiver
+from .models import Empleado, TipoAsistencia, DispositivoEmpleado, RegistroAsistencia
+from .services import ReporteService
+from .caches import CatalogoTipos, CacheFingerprint, IndiceEmpleados, IndiceQR, UltimoRegistro, VersionReportes
+
+
+@receiver([post_save, post_delete], sender=TipoAsistencia)
+def invalidar_catalogo_tipos(sender, **kwargs):
+    """Invalida el catálogo de tipos cuando se crea, modifica o elimina un tipo."""
+    CatalogoTipos.invalidar()
+
+
+@receiver([post_save, post_delete], sender=DispositivoEmpleado)
+def invalidar_fingerprint(sender, instance, **kwargs):
+    """Invalida el fingerprint al vincularlo, reasignarlo o desvincularlo."""
+    CacheFingerprint.invalidar(instance.fingerprint)
+
+
+@receiver(post_save, sender=Empleado)
+def invalidar_fingerprints_empleado(sender, instance, created, **kwargs):
+    """Invalida los dispositivos del empleado cuando cambian sus datos (nombres, DNI)."""
+    if created:
+        return
+    fingerprints = list(
+        DispositivoEmpleado.objects.filter(empleado=instance).values_list('fingerprint', flat=True)
+    )
+    if fingerprints:
+        CacheFingerprint.invalidar(*fingerprints)
+
+
+@receiver([post_save, post_delete], sender=Empleado)
+def invalidar_indice_qr(sender, **kwargs):
+    """Invalida el índice de códigos QR cuando se crea, modifica o elimina un empleado."""
+    IndiceQR.invalidar()
+
+
+@receiver([post_save, post_delete], sender=Empleado)
+def invalidar_indice_empleados(sender, **kwargs):
+    """Invalida el índice de búsqueda de empleados cuando se crea, modifica o elimina uno."""
+    IndiceEmpleados.invalidar()
+
+
+@receiver(post_save, sender=RegistroAsistencia)
+def invalidar_ultimo_registro(sender, created, **kwargs):
+    """Avisa a los tableros en vivo que hay registros nuevos."""
+    if created:
+        transaction.on_commit(UltimoRegistro.invalidar)
+
+
+@receiver([post_save, post_delete], sender=Empleado)
+@receiver([post_save, post_delete], sender=TipoAsistencia)
+def invalidar_reportes_catalogos(sender, **kwargs):
+    """Los reportes muestran nombres de empleados y tipos: descarta los archivos cacheados."""
+    VersionReportes.invalidar()
+
+
+@receiver(post_save, sender=RegistroAsistencia)
+@receiver(post_delete, sender=RegistroAsistencia)
+def invalidar_reportes_registros(sender, created=False, **kwargs):
+    """
+    Una edición o eliminación no se refleja en la marca de agua: descarta los reportes
+    cacheados. La versión se incrementa en la misma transacción que el cambio.
+    Los registros nuevos no hace falta invalidarlos; cambian la marca de agua de los reportes afectados.
+    """
+    if not created:
+        VersionReportes.invalidar()
+
+
+@receiver(pre_save, sender=RegistroAsistencia)
+def recordar_dia_registro(sender, instance, **kwargs):
+    """Guarda el empleado y la fecha anteriores de un registro editado para recalcular ese día."""
+    instance._dia_anterior = None
+    if not instance._state.adding and instance.pk is not None:
+        instance._dia_anterior = (
+            RegistroAsistencia.objects.filter(pk=instance.pk)
+            .values_list('empleado_id', 'fecha_registro').first()
+        )
+
+
+@receiver(post_save, sender=RegistroAsistencia)
+def actualizar_resumen_guardado(sender, instance, created, **kwargs):
+    """
+    Actualiza el resumen del día del registro en la misma transacción que el guardado.
+    Un registro nuevo solo necesita el upsert de su día; una edición recalcula también
+    el día anterior si se movió de fecha o de empleado.
+    """
+    dia = (instance.empleado_id, instance.fecha_registro)
+    if created:
+        ReporteService.actualizar_resumenes({dia})
+        return
+    dias = {dia}
+    anterior = getattr(instance, '_dia_anterior', None)
+    if anterior:
+        dias.add(anterior)
+    ReporteService.recalcular_resumenes(dias)
+
+
+@receiver(post_delete, sender=RegistroAsistencia)
+def actualizar_resumen_eliminado(sender, instance, origin=None, **kwargs):
+    """Recalcula (o elimina) el resumen del día del registro eliminado."""
+    if isinstance(origin, Empleado) or getattr(origin, 'model', None) is Empleado:
+        return  # Al eliminar el empleado sus resúmenes se eliminan en cascada
+    ReporteService.recalcular_resumenes({(instance.empleado_id, instance.fecha_registro)})
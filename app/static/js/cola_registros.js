@@ -0,0 +1,29 @@
+// Registra el service worker de la cola sin conexión (ver templates/sw.js) y le pide
+// enviar los registros pendientes al cargar la página y al recuperar la conexión.
+(function () {
+  if (!('serviceWorker' in navigator)) return;
+
+  const urlServiceWorker = document.currentScript.dataset.sw;
+  const csrf = () => (document.querySelector('[name=csrfmiddlewaretoken]') || {}).value || '';
+
+  navigator.serviceWorker.register(urlServiceWorker).catch(() => {});
+
+  const sincronizar = () => navigator.serviceWorker.ready.then((registro) => {
+    if (registro.active) registro.active.postMessage({ tipo: 'sincronizar', csrf: csrf() });
+  });
+  window.addEventListener('online', sincronizar);
+  if (navigator.onLine) sincronizar();
+
+  // Aviso de los registros pendientes que se enviaron
+  navigator.serviceWorker.addEventListener('message', (event) => {
+    if (!event.data || event.data.tipo !== 'registros-sincronizados') return;
+    const contenedor = document.querySelector('.container');
+    if (!contenedor) return;
+    const aviso = document.createElement('div');
+    aviso.className = 'alert alert-info mt-3';
+    aviso.setAttribute('role', 'status');
+    aviso.textContent = 'Registros sin conexión enviados: ' +
+      event.data.resultados.map(r => r.mensaje).join(' ');
+    contenedor.prepend(aviso);
+  });
+})();
@@ -0,0 +1,137 @@
+// Service worker: cola de registros de asistencia tomados sin conexión.
+//
+// Si el envío del formulario de registro falla por falta de red, la marca se guarda
+// en IndexedDB con una clave de idempotencia y la hora del dispositivo, y se muestra
+// una confirmación. Al recuperar la conexión, toda la cola se envía en una sola
+// petición a la API de sincronización.
+
+const API_SINCRONIZAR = '{% url "api_sincronizar_registros" %}';
+const TAG_SYNC = 'sincronizar-registros';
+const MAX_POR_LOTE = 100;
+const DB_NOMBRE = 'nakamita';
+const DB_STORE = 'registros_pendientes';
+
+// Formularios de registro: QR por empleado, QR general y registro manual
+const RUTAS_REGISTRO = [
+  { patron: /^\/qr\/([^/]+)\/$/, campo: 'codigo_qr' },
+  { patron: /^\/auto\/empleado\/(\d+)\/$/, campo: 'empleado_id' },
+  { patron: /^\/manual\/$/, campo: null },
+];
+
+function abrirDB() {
+  return new Promise((resolve, reject) => {
+    const peticion = indexedDB.open(DB_NOMBRE, 1);
+    peticion.onupgradeneeded = () => peticion.result.createObjectStore(DB_STORE, { keyPath: 'clave' });
+    peticion.onsuccess = () => resolve(peticion.result);
+    peticion.onerror = () => reject(peticion.error);
+  });
+}
+
+async function operar(modo, fn) {
+  const db = await abrirDB();
+  return new Promise((resolve, reject) => {
+    const tx = db.transaction(DB_STORE, modo);
+    const resultado = fn(tx.objectStore(DB_STORE));
+    tx.oncomplete = () => resolve(resultado && resultado.result);
+    tx.onerror = () => reject(tx.error);
+  });
+}
+
+const encolar = (marca) => operar('readwrite', store => store.put(marca));
+const pendientes = () => operar('readonly', store => store.getAll());
+const quitar = (claves) => operar('readwrite', store => claves.forEach(c => store.delete(c)));
+
+function marcaDesdeFormulario(url, datos) {
+  const ruta = RUTAS_REGISTRO.find(r => r.patron.test(url.pathname));
+  if (!ruta || !datos.get('tipo_evento')) return null;
+  const marca = {
+    clave: self.crypto.randomUUID(),
+    fecha_hora: new Date().toISOString(),
+    tipo_id: datos.get('tipo_evento'),
+    descripcion: datos.get('descripcion') || '',
+    fingerprint: datos.get('fingerprint') || '',
+    csrf: datos.get('csrfmiddlewaretoken') || '',
+  };
+  if (ruta.campo) {
+    marca[ruta.campo] = decodeURIComponent(url.pathname.match(ruta.patron)[1]);
+  } else {
+    marca.empleado_id = datos.get('empleado');
+  }
+  return marca;
+}
+
+function paginaEncolado(marca) {
+  const hora = new Date(marca.fecha_hora).toLocaleTimeString('es-PE');
+  const html = `<!DOCTYPE html><html lang="es"><head><meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1"><title>Registro pendiente</title></head>
+<body style="font-family:sans-serif;text-align:center;padding:2rem">
+<h2>Sin conexión</h2>
+<p>Tu registro de las <strong>${hora}</strong> quedó guardado en este dispositivo
+y se enviará automáticamente al recuperar la conexión.</p>
+<p><a href="javascript:history.back()">Volver</a></p></body></html>`;
+  return new Response(html, { headers: { 'Content-Type': 'text/html; charset=utf-8' } });
+}
+
+let sincronizando = null;
+let csrfActual = '';  // Token de la última página abierta (el de la cola puede haber expirado)
+
+// Envía la cola por lotes; solo se conservan las marcas si falla la red o el servidor
+async function sincronizar() {
+  const marcas = await pendientes();
+  for (let i = 0; i < marcas.length; i += MAX_POR_LOTE) {
+    const lote = marcas.slice(i, i + MAX_POR_LOTE);
+    const respuesta = await fetch(API_SINCRONIZAR, {
+      method: 'POST',
+      credentials: 'same-origin',
+      headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfActual || lote[lote.length - 1].csrf },
+      body: JSON.stringify({ registros: lote.map(({ csrf, ...marca }) => marca) }),
+    });
+    if (!respuesta.ok) throw new Error(`Sincronización rechazada (${respuesta.status})`);
+    const { resultados } = await respuesta.json();
+    // Todos los estados son definitivos: reintentar no cambiaría el resultado
+    await quitar(resultados.map(r => r.clave));
+    const clientes = await self.clients.matchAll();
+    clientes.forEach(c => c.postMessage({ tipo: 'registros-sincronizados', resultados }));
+  }
+}
+
+function sincronizarUnaVez() {
+  sincronizando = sincronizando || sincronizar().finally(() => { sincronizando = null; });
+  return sincronizando;
+}
+
+self.addEventListener('install', () => self.skipWaiting());
+self.addEventListener('activate', (event) => event.waitUntil(self.clients.claim()));
+
+self.addEventListener('fetch', (event) => {
+  const peticion = event.request;
+  if (peticion.method !== 'POST' || peticion.mode !== 'navigate') return;
+  const url = new URL(peticion.url);
+  if (!RUTAS_REGISTRO.some(r => r.patron.test(url.pathname))) return;
+
+  const copia = peticion.clone();
+  event.respondWith(fetch(peticion).then((respuesta) => {
+    // Hay red: aprovechar para vaciar la cola pendiente
+    event.waitUntil(sincronizarUnaVez().catch(() => {}));
+    return respuesta;
+  }).catch(async () => {
+    const marca = marcaDesdeFormulario(url, await copia.formData());
+    if (!marca) return Response.error();
+    await encolar(marca);
+    if (self.registration.sync) {
+      await self.registration.sync.register(TAG_SYNC).catch(() => {});
+    }
+    return paginaEncolado(marca);
+  }));
+});
+
+// Background Sync (Chrome/Android); en otros navegadores la página avisa con postMessage
+self.addEventListener('sync', (event) => {
+  if (event.tag === TAG_SYNC) event.waitUntil(sincronizarUnaVez());
+});
+
+self.addEventListener('message', (event) => {
+  if (!event.data || event.data.tipo !== 'sincronizar') return;
+  csrfActual = event.data.csrf || csrfActual;
+  event.waitUntil(sincronizarUnaVez().catch(() => {}));
+});
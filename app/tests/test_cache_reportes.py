@@ -0,0 +1,72 @@
+"""
+Pruebas de la clave de CacheReportes: cambia solo cuando cambian los datos
+que entran en el reporte.
+"""
+
+from datetime import date, time
+from django.core.cache import cache
+from django.test import TestCase
+from app.cache_reportes import CacheReportes
+from app.models import Empleado, TipoAsistencia, RegistroAsistencia
+from app.services import ReporteService
+
+
+class ClaveReportesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empleado = Empleado.objects.create(nombres='Ana', apellidos='Díaz', dni=40000001, contrato='CAS')
+        cls.comision = TipoAsistencia.objects.create(nombre_asistencia='Salida por comisión')
+
+    def setUp(self):
+        cache.clear()
+        self.registro = self.marcar(date(2025, 6, 2))
+        self.filtros = {'desde': date(2025, 6, 1), 'hasta': date(2025, 6, 30)}
+
+    def marcar(self, fecha, **kwargs):
+        return RegistroAsistencia.objects.create(
+            empleado=self.empleado, tipo=self.comision, fecha_registro=fecha, hora_registro=time(10, 0), **kwargs
+        )
+
+    def clave(self, tipo='asistencia', formato='xlsx'):
+        return CacheReportes.clave(tipo, formato, self.filtros)
+
+    def test_misma_clave_con_los_mismos_datos(self):
+        self.assertEqual(self.clave(), self.clave())
+        self.assertNotEqual(self.clave(), self.clave(formato='csv'))
+        self.assertNotEqual(self.clave(), self.clave(tipo='resumen'))
+
+    def test_registro_fuera_del_rango_no_cambia_la_clave(self):
+        antes = self.clave()
+        self.marcar(date(2025, 7, 1))
+        self.assertEqual(self.clave(), antes)
+
+    def test_registro_dentro_del_rango_cambia_la_clave(self):
+        antes = self.clave()
+        self.marcar(date(2025, 6, 3))
+        self.assertNotEqual(self.clave(), antes)
+
+    def test_id_confirmado_fuera_de_orden_cambia_la_clave(self):
+        self.marcar(date(2025, 6, 3), id_registro=self.registro.pk + 100)
+        antes = self.clave()
+        # Un id menor que el máximo (transacción más lenta) no cambia Max pero sí la cantidad
+        self.marcar(date(2025, 6, 4), id_registro=self.registro.pk + 50)
+        self.assertNotEqual(self.clave(), antes)
+
+    def test_editar_o_eliminar_cambia_la_clave(self):
+        antes = self.clave()
+        self.registro.hora_registro = time(11, 0)
+        self.registro.save()
+        editado = self.clave()
+        self.assertNotEqual(editado, antes)
+        self.registro.delete()
+        self.assertNotEqual(self.clave(), editado)
+
+    def test_cambio_de_empleado_o_reconstruir_cambia_la_clave(self):
+        antes = self.clave()
+        self.empleado.nombres = 'Ana María'
+        self.empleado.save()
+        renombrado = self.clave()
+        self.assertNotEqual(renombrado, antes)
+        ReporteService.reconstruir_resumen()
+        self.assertNotEqual(self.clave(), renombrado)
@@ -0,0 +1,97 @@
+"""
+Pruebas de CacheVersionada: versión compartida en la base de datos y una sola
+reconstrucción para cargas concurrentes.
+"""
+
+import asyncio
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import TestCase
+from app.caches import CatalogoTipos, IndiceEmpleados
+from app.models import Empleado, TipoAsistencia, VersionDatos
+
+
+class CacheVersionadaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        TipoAsistencia.objects.create(nombre_asistencia='Entrada')
+
+    def nombres(self):
+        return [t.nombre_asistencia for t in CatalogoTipos.todos()]
+
+    def test_invalidar_incrementa_la_version_en_la_base(self):
+        antes = VersionDatos.obtener(CatalogoTipos.VERSION_KEY)
+        CatalogoTipos.invalidar()
+        self.assertEqual(VersionDatos.obtener(CatalogoTipos.VERSION_KEY), antes + 1)
+
+    def test_version_de_otro_proceso_se_ve_al_vencer_la_cache(self):
+        self.assertEqual(self.nombres(), ['Entrada'])
+        # Otro proceso agrega un tipo: solo cambia el contador en la base, no esta caché local
+        TipoAsistencia.objects.bulk_create([TipoAsistencia(nombre_asistencia='Salida')])
+        VersionDatos.incrementar(CatalogoTipos.VERSION_KEY)
+        self.assertEqual(self.nombres(), ['Entrada'])
+        cache.delete(CatalogoTipos.VERSION_KEY)  # Equivale a que pase VERSION_TTL
+        self.assertEqual(self.nombres(), ['Entrada', 'Salida'])
+
+    def test_invalidar_descarta_la_version_al_confirmar(self):
+        self.assertEqual(self.nombres(), ['Entrada'])
+        with self.captureOnCommitCallbacks(execute=True):
+            TipoAsistencia.objects.create(nombre_asistencia='Salida')
+        self.assertIsNone(cache.get(CatalogoTipos.VERSION_KEY))
+        self.assertEqual(self.nombres(), ['Entrada', 'Salida'])
+
+    def test_cargas_async_concurrentes_reconstruyen_una_vez(self):
+        IndiceEmpleados.invalidar()
+        construir = IndiceEmpleados._construir
+
+        async def cargar_varias():
+            await asyncio.gather(*(IndiceEmpleados._acargar() for _ in range(5)))
+
+        with mock.patch.object(IndiceEmpleados, '_construir', side_effect=construir) as espia:
+            async_to_sync(cargar_varias)()
+        self.assertEqual(espia.call_count, 1)
+
+
+class EtagIndiceEmpleadosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.empleado = Empleado.objects.create(nombres='Ana', apellidos='Díaz', dni=40000001, contrato='CAS')
+
+    def etag(self):
+        return async_to_sync(IndiceEmpleados.aversion)()
+
+    def test_mismos_datos_misma_etag(self):
+        antes = self.etag()
+        IndiceEmpleados.invalidar()  # Otro worker reconstruye con los mismos datos
+        self.assertEqual(self.etag(), antes)
+
+    def test_cambio_de_datos_cambia_etag(self):
+        antes = self.etag()
+        self.empleado.apellidos = 'Díaz Paz'
+        self.empleado.save()
+        self.assertNotEqual(self.etag(), antes)
+
+
+class BusquedaIndiceEmpleadosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.ana = Empleado.objects.create(nombres='Ana', apellidos='Díaz', dni=40000001, contrato='CAS')
+        self.andres = Empleado.objects.create(nombres='Andrés', apellidos='Paz', dni=40000002, contrato='CAS')
+        self.luis = Empleado.objects.create(nombres='Luis', apellidos='Diaz Ana', dni=41000003, contrato='CAS')
+
+    def ids(self, texto):
+        return {r['id'] for r in IndiceEmpleados.buscar(texto, 1, 50)['resultados']}
+
+    def test_prefijos_por_palabra(self):
+        self.assertEqual(self.ids('an'), {self.ana.id_empleado, self.andres.id_empleado, self.luis.id_empleado})
+        self.assertEqual(self.ids('ana'), {self.ana.id_empleado, self.luis.id_empleado})
+        self.assertEqual(self.ids('andres'), {self.andres.id_empleado})
+        self.assertEqual(self.ids('anaz'), set())
+
+    def test_terminos_combinados_y_dni(self):
+        self.assertEqual(self.ids('diaz lu'), {self.luis.id_empleado})
+        self.assertEqual(self.ids('4000'), {self.ana.id_empleado, self.andres.id_empleado})
@@ -0,0 +1,77 @@
+"""
+Pruebas de equivalencia entre el cálculo por lotes del resumen diario
+(calcular_segundos_lote) y el cálculo original por empleado-día
+(calcular_segundos_empleado).
+"""
+
+import random
+from collections import defaultdict
+from datetime import date, time, timedelta
+from django.test import SimpleTestCase
+from app.services import ReporteService
+
+NOMBRES_TIPO = {
+    1: 'Entrada', 2: 'Salida', 3: 'Inicio Almuerzo', 4: 'Fin Almuerzo',
+    5: 'Entrada por comisión', 6: 'Salida por comisión',
+    7: 'Entrada por otros', 8: 'Salida por otros', 9: 'Refrigerio',
+}
+
+
+def por_dia(marcas):
+    """
+    Cálculo original: diccionario por empleado-día y una llamada por día. Toma la
+    primera marca de cada tipo, así que recibe las marcas ordenadas por hora como
+    las entrega obtener_datos_resumen.
+    """
+    datos = defaultdict(lambda: defaultdict(list))
+    for empleado_id, fecha, tipo_id, hora in marcas:
+        datos[(empleado_id, fecha)][NOMBRES_TIPO[tipo_id]].append(hora)
+    return {clave: ReporteService.calcular_segundos_empleado(data) for clave, data in datos.items()}
+
+
+def por_lote(marcas):
+    """Cálculo por lotes sobre columnas."""
+    return ReporteService.calcular_segundos_lote(
+        [m[0] for m in marcas], [m[1] for m in marcas], [m[2] for m in marcas],
+        [ReporteService.microsegundos(m[3]) for m in marcas],
+        nombres_tipo=NOMBRES_TIPO,
+    )
+
+
+class CalculoPorLotesTests(SimpleTestCase):
+
+    def test_casos_borde(self):
+        lunes, martes = date(2025, 6, 2), date(2025, 6, 3)
+        marcas = [
+            # Día completo con almuerzo, comisión y permiso
+            (1, lunes, 1, time(8, 0)), (1, lunes, 3, time(13, 0)), (1, lunes, 4, time(13, 45, 30)),
+            (1, lunes, 6, time(10, 0)), (1, lunes, 5, time(11, 15)),
+            (1, lunes, 8, time(15, 0)), (1, lunes, 7, time(15, 20)), (1, lunes, 2, time(17, 30)),
+            # Sin salida: no hay horas trabajadas
+            (1, martes, 1, time(8, 5)), (1, martes, 3, time(13, 0)), (1, martes, 4, time(14, 0)),
+            # Otro empleado: solo salida, tipo fuera del resumen y marcas repetidas
+            (2, lunes, 2, time(17, 0)), (2, lunes, 9, time(10, 0)),
+            (2, martes, 1, time(8, 0, 0, 500)), (2, martes, 1, time(7, 59)), (2, martes, 2, time(16, 59, 59, 999999)),
+            # Salida antes que la entrada (duración negativa truncada hacia cero)
+            (3, lunes, 1, time(9, 0, 0, 1)), (3, lunes, 2, time(8, 0)),
+        ]
+        marcas.sort(key=lambda m: (m[0], m[1], m[3]))
+        esperado = por_dia(marcas)
+        self.assertEqual(len(esperado), 5)
+        self.assertEqual(por_lote(marcas), esperado)
+        self.assertEqual(esperado[(1, martes)]['trabajadas'], 0)
+        self.assertEqual(esperado[(2, lunes)], {'almuerzo': 0, 'comision': 0, 'permiso': 0, 'trabajadas': 0})
+
+    def test_marcas_aleatorias(self):
+        rnd = random.Random(7)
+        marcas = []
+        for i in range(2000):
+            empleado_id, fecha = i % 13 + 1, date(2025, 1, 1) + timedelta(days=i // 13)
+            tipos = rnd.sample(list(NOMBRES_TIPO), rnd.randint(1, len(NOMBRES_TIPO)))
+            if rnd.random() < 0.2:
+                tipos.append(rnd.choice(tipos))
+            for tipo_id in tipos:
+                hora = time(rnd.randint(6, 20), rnd.randint(0, 59), rnd.randint(0, 59), rnd.randint(0, 999999))
+                marcas.append((empleado_id, fecha, tipo_id, hora))
+        marcas.sort(key=lambda m: (m[0], m[1], m[3]))
+        self.assertEqual(por_lote(marcas), por_dia(marcas))
@@ -0,0 +1,73 @@
+"""
+Pruebas de AsistenciaService.crear_registro_asistencia: solo la violación de
+registro_tipo_unico_por_dia se informa como registro duplicado.
+"""
+
+from unittest import mock
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import TestCase
+from app.models import Empleado, TipoAsistencia, RegistroAsistencia, DispositivoEmpleado
+from app.services import AsistenciaService
+
+
+class CrearRegistroTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empleado = Empleado.objects.create(nombres='Ana', apellidos='Díaz', dni=40000001, contrato='CAS')
+        cls.entrada = TipoAsistencia.objects.create(nombre_asistencia='Entrada')
+        cls.comision = TipoAsistencia.objects.create(nombre_asistencia='Salida por comisión')
+
+    def setUp(self):
+        # Los catálogos en memoria se recargan al cambiar la versión de la caché
+        cache.clear()
+
+    def registrar(self, tipo, fingerprint=None):
+        return AsistenciaService.crear_registro_asistencia(self.empleado.pk, tipo.pk, '', fingerprint)
+
+    def test_tipo_unico_repetido_es_duplicado(self):
+        ok, _, registro = self.registrar(self.entrada)
+        self.assertTrue(ok)
+        self.assertIsNotNone(registro.pk)
+
+        ok, mensaje, registro = self.registrar(self.entrada)
+        self.assertFalse(ok)
+        self.assertIsNone(registro)
+        self.assertEqual(mensaje, 'Ya registraste "Entrada" hoy.')
+        self.assertEqual(RegistroAsistencia.objects.count(), 1)
+
+    def test_tipo_no_unico_se_registra_varias_veces(self):
+        self.assertTrue(self.registrar(self.comision)[0])
+        self.assertTrue(self.registrar(self.comision)[0])
+        self.assertEqual(RegistroAsistencia.objects.count(), 2)
+
+    def test_otro_error_de_integridad_no_es_duplicado(self):
+        error = IntegrityError('NOT NULL constraint failed: app_registroasistencia.hora_registro')
+        with mock.patch.object(AsistenciaService, '_insertar_registro', side_effect=error):
+            ok, mensaje, _ = self.registrar(self.entrada)
+        self.assertFalse(ok)
+        self.assertNotIn('Ya registraste', mensaje)
+        self.assertIn('NOT NULL', mensaje)
+
+    def test_error_de_integridad_en_tipo_no_unico(self):
+        error = IntegrityError('FOREIGN KEY constraint failed')
+        with mock.patch.object(AsistenciaService, '_insertar_registro', side_effect=error):
+            ok, mensaje, _ = self.registrar(self.comision)
+        self.assertFalse(ok)
+        self.assertNotIn('Ya registraste', mensaje)
+
+    def test_dispositivo_de_otro_empleado_se_rechaza(self):
+        otro = Empleado.objects.create(nombres='Luis', apellidos='Paz', dni=40000002, contrato='CAS')
+        DispositivoEmpleado.objects.create(fingerprint='fp-otro', empleado=otro)
+        ok, mensaje, _ = self.registrar(self.entrada, fingerprint='fp-otro')
+        self.assertFalse(ok)
+        self.assertEqual(mensaje, "Este dispositivo está vinculado a otro empleado.")
+        self.assertFalse(RegistroAsistencia.objects.exists())
+
+    def test_vinculo_del_fingerprint_sale_de_la_cache(self):
+        DispositivoEmpleado.objects.create(fingerprint='fp-propio', empleado=self.empleado)
+        self.assertTrue(self.registrar(self.comision, fingerprint='fp-propio')[0])
+        with mock.patch.object(DispositivoEmpleado, 'obtener_empleado_por_fingerprint') as consulta:
+            self.assertTrue(self.registrar(self.comision, fingerprint='fp-propio')[0])
+        consulta.assert_not_called()
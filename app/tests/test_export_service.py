@@ -0,0 +1,122 @@
+"""
+Pruebas de la exportación de asistencia: lectura por paginación keyset,
+contenido del Excel generado en modo write-only y paridad de los formatos CSV.
+"""
+
+import csv
+import gzip
+import io
+from unittest import mock
+from datetime import date, time
+from django.core.cache import cache
+from django.test import TestCase
+from openpyxl import load_workbook
+from app.export_service import ExportService
+from app.models import Empleado, TipoAsistencia, RegistroAsistencia
+
+
+class ExportacionAsistenciaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empleados = [
+            Empleado.objects.create(nombres=f'Nombre{i}', apellidos=f'Apellido{i}', dni=40000000 + i, contrato='CAS')
+            for i in range(3)
+        ]
+        comision = TipoAsistencia.objects.create(nombre_asistencia='Salida por comisión')
+        # Varios registros comparten fecha y hora: el id desempata la paginación
+        for empleado in cls.empleados:
+            for dia in (2, 3):
+                for hora in (time(10, 0), time(10, 0), time(15, 30)):
+                    RegistroAsistencia.objects.create(
+                        empleado=empleado, tipo=comision, fecha_registro=date(2025, 6, dia),
+                        hora_registro=hora, descripcion='Banco',
+                    )
+
+    def setUp(self):
+        cache.clear()
+
+    def esperado(self):
+        registros = RegistroAsistencia.objects.select_related('empleado', 'tipo') \
+            .order_by('-fecha_registro', '-hora_registro', '-id_registro')
+        return [
+            [r.empleado.nombre_completo, r.tipo.nombre_asistencia, r.fecha_registro.strftime('%Y-%m-%d'),
+             r.hora_registro.strftime('%H:%M:%S'), r.descripcion, '', '']
+            for r in registros
+        ]
+
+    def test_keyset_cruza_lotes_con_empates(self):
+        ids = RegistroAsistencia.objects.all()
+        claves = ('fecha_registro', 'hora_registro', 'id_registro')
+        todos = list(ids.order_by(*claves).values_list('id_registro', flat=True))
+        with self.assertNumQueries(len(todos) // 4 + 1):
+            leidos = [fila[0] for fila in ExportService.iterar_por_claves(ids, ('id_registro',), claves, lote=4)]
+        self.assertEqual(leidos, todos)
+        descendente = ExportService.iterar_por_claves(ids, ('id_registro',), claves, descendente=True, lote=5)
+        self.assertEqual([fila[0] for fila in descendente], todos[::-1])
+
+    def test_filas_asistencia_en_orden_del_reporte(self):
+        with mock.patch.object(ExportService, 'CHUNK_SIZE', 5):
+            filas = list(ExportService.filas_asistencia(RegistroAsistencia.objects.all()))
+        self.assertEqual(filas, self.esperado())
+
+    def test_excel_tiene_encabezados_y_todas_las_filas(self):
+        destino = io.BytesIO()
+        ExportService.escribir('xlsx', destino, **ExportService.reporte('asistencia', {}))
+        destino.seek(0)
+        hoja = load_workbook(destino, read_only=True).active
+        filas = [[valor if valor is not None else '' for valor in fila] for fila in hoja.iter_rows(values_only=True)]
+        self.assertEqual(filas[0], ExportService.ENCABEZADOS_ASISTENCIA)
+        self.assertEqual(filas[1:], self.esperado())
+
+
+class ParidadFormatosTests(TestCase):
+    """Los tres formatos de cada reporte tienen las mismas columnas y filas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        entrada = TipoAsistencia.objects.create(nombre_asistencia='Entrada')
+        salida = TipoAsistencia.objects.create(nombre_asistencia='Salida')
+        comision = TipoAsistencia.objects.create(nombre_asistencia='Salida por comisión')
+        # Nombres con comas, comillas y tildes para ejercitar el escapado del CSV
+        for i in range(4):
+            empleado = Empleado.objects.create(
+                nombres=f'Ñandú {i}', apellidos='Pérez, "Q"', dni=42000000 + i, contrato='CAS'
+            )
+            for dia in (2, 3, 4):
+                marcas = [(entrada, time(8, i), None), (comision, time(11, 0), 'Banco; SUNAT')]
+                if dia != 4:
+                    marcas.append((salida, time(17, 30), None))  # Un día sin salida
+                for tipo, hora, descripcion in marcas:
+                    RegistroAsistencia.objects.create(
+                        empleado=empleado, tipo=tipo, fecha_registro=date(2025, 6, dia),
+                        hora_registro=hora, descripcion=descripcion,
+                    )
+
+    def setUp(self):
+        cache.clear()
+
+    def leer(self, tipo, formato):
+        destino = io.BytesIO()
+        reporte = ExportService.reporte(tipo, {})
+        del reporte['nombre_base']
+        # Bloques y lotes pequeños para cruzar varios de cada uno
+        with mock.patch.object(ExportService, 'FILAS_BLOQUE_CSV', 7), mock.patch.object(ExportService, 'CHUNK_SIZE', 5):
+            ExportService.escribir(formato, destino, **reporte)
+        contenido = destino.getvalue()
+        if formato == 'xlsx':
+            hoja = load_workbook(io.BytesIO(contenido), read_only=True).active
+            return [['' if valor is None else str(valor) for valor in fila]
+                    for fila in hoja.iter_rows(values_only=True)]
+        if formato == 'csv.gz':
+            contenido = gzip.decompress(contenido)
+        return list(csv.reader(io.StringIO(contenido.decode('utf-8'))))
+
+    def test_mismas_columnas_y_filas_en_todos_los_formatos(self):
+        for tipo, filas_esperadas in (('asistencia', 32), ('resumen', 12)):
+            with self.subTest(tipo=tipo):
+                excel = self.leer(tipo, 'xlsx')
+                self.assertEqual(len(excel), filas_esperadas + 1)
+                self.assertEqual(excel[0], list(ExportService.reporte(tipo, {})['encabezados']))
+                for formato in ('csv', 'csv.gz'):
+                    self.assertEqual(self.leer(tipo, formato), excel, formato)
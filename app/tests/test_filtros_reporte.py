@@ -0,0 +1,91 @@
+"""
+Pruebas de los filtros de exportación: lectura de parámetros y filtrado en la
+base de datos de registros y resúmenes.
+"""
+
+from datetime import date, time
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from app.models import Empleado, TipoAsistencia, RegistroAsistencia, ResumenDiario
+from app.services import ReporteService
+
+
+class ObtenerFiltrosTests(TestCase):
+
+    def test_filtros_validos(self):
+        filtros = ReporteService.obtener_filtros({
+            'desde': '2025-06-01', 'hasta': ' 2025-06-30 ', 'empleado': '7', 'contrato': 'CAS',
+        })
+        self.assertEqual(filtros, {
+            'desde': date(2025, 6, 1), 'hasta': date(2025, 6, 30), 'empleado_id': 7, 'contrato': 'CAS',
+        })
+
+    def test_parametros_vacios_no_filtran(self):
+        self.assertEqual(ReporteService.obtener_filtros({'desde': '', 'empleado': ' ', 'contrato': ''}), {})
+
+    def test_parametros_invalidos(self):
+        for params in (
+            {'desde': '2025-13-01'},
+            {'hasta': 'ayer'},
+            {'desde': '2025-06-30', 'hasta': '2025-06-01'},
+            {'empleado': 'abc'},
+        ):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                ReporteService.obtener_filtros(params)
+
+
+class FiltrarRegistrosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cas = Empleado.objects.create(nombres='Ana', apellidos='Cas', dni=41000001, contrato='CAS')
+        cls.locador = Empleado.objects.create(nombres='Luis', apellidos='Locador', dni=41000002, contrato='Locador')
+        entrada = TipoAsistencia.objects.create(nombre_asistencia='Entrada')
+        for empleado in (cls.cas, cls.locador):
+            for dia in (1, 15, 30):
+                RegistroAsistencia.objects.create(
+                    empleado=empleado, tipo=entrada, fecha_registro=date(2025, 6, dia), hora_registro=time(8, 0),
+                )
+
+    def filtrar(self, params, modelo=RegistroAsistencia, campo_fecha='fecha_registro'):
+        filtros = ReporteService.obtener_filtros(params)
+        consulta = ReporteService.filtrar_registros(modelo.objects.all(), filtros, campo_fecha=campo_fecha)
+        return sorted(consulta.values_list('empleado_id', campo_fecha))
+
+    def test_rango_de_fechas_inclusivo(self):
+        self.assertEqual(self.filtrar({'desde': '2025-06-15', 'hasta': '2025-06-30'}), sorted([
+            (self.cas.id_empleado, date(2025, 6, 15)), (self.cas.id_empleado, date(2025, 6, 30)),
+            (self.locador.id_empleado, date(2025, 6, 15)), (self.locador.id_empleado, date(2025, 6, 30)),
+        ]))
+
+    def test_empleado_y_contrato(self):
+        por_empleado = self.filtrar({'empleado': str(self.locador.id_empleado), 'hasta': '2025-06-01'})
+        self.assertEqual(por_empleado, [(self.locador.id_empleado, date(2025, 6, 1))])
+        por_contrato = self.filtrar({'contrato': 'CAS'})
+        self.assertEqual({empleado for empleado, _ in por_contrato}, {self.cas.id_empleado})
+        self.assertEqual(len(por_contrato), 3)
+        self.assertEqual(self.filtrar({'contrato': 'CAS', 'empleado': str(self.locador.id_empleado)}), [])
+
+    def test_resumen_usa_su_campo_de_fecha(self):
+        filtrados = self.filtrar({'contrato': 'Locador', 'desde': '2025-06-15'}, ResumenDiario, 'fecha')
+        self.assertEqual(filtrados, [
+            (self.locador.id_empleado, date(2025, 6, 15)), (self.locador.id_empleado, date(2025, 6, 30)),
+        ])
+
+
+class PaginaDescargaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_no_lista_empleados_en_la_plantilla(self):
+        Empleado.objects.create(nombres='Rosa', apellidos='Quispe', dni=41000003, contrato='CAS')
+        usuario = User.objects.create_user('admin', password='clave', is_staff=True)
+        self.client.force_login(usuario)
+        response = self.client.get(reverse('pagina_descarga_excel'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Quispe')
+        self.assertContains(response, reverse('api_buscar_empleados'))
+        self.assertContains(response, '<option value="CAS">CAS</option>', html=True)
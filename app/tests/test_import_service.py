@@ -0,0 +1,31 @@
+"""
+Pruebas de ImportService.importar_empleados con DNIs repetidos en el archivo.
+"""
+
+from django.core.cache import cache
+from django.test import TestCase
+from app.import_service import ImportService
+from app.models import Empleado
+
+
+def fila(dni, nombres):
+    return {'dni': dni, 'nombres': nombres, 'apellidos': 'Díaz', 'contrato': 'CAS'}
+
+
+class DniRepetidoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_se_informa_la_fila_descartada(self):
+        filas = [(2, fila(40000001, 'Ana')), (3, fila(40000002, 'Luis')), (4, fila(40000001, 'Ana María'))]
+        resultado = ImportService.importar_empleados(filas)
+        self.assertEqual(resultado['omitidos'], 1)
+        self.assertEqual(resultado['errores'], [(2, "DNI 40000001 repetido; se descarta esta fila y se usa la fila 4")])
+        self.assertEqual(Empleado.objects.get(dni=40000001).nombres, 'Ana María')
+
+    def test_tres_apariciones_informan_las_dos_descartadas(self):
+        filas = [(2, fila(40000001, 'A')), (5, fila(40000001, 'B')), (9, fila(40000001, 'C'))]
+        resultado = ImportService.importar_empleados(filas)
+        self.assertEqual([numero for numero, _ in resultado['errores']], [2, 5])
+        self.assertEqual(Empleado.objects.get(dni=40000001).nombres, 'C')
@@ -0,0 +1,90 @@
+"""
+Pruebas de la consulta incremental del tablero: avance del cursor desde_id y
+respuestas 304 mientras el ETag del cliente siga vigente.
+"""
+
+from datetime import time, timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from app.models import Empleado, TipoAsistencia, RegistroAsistencia
+from app.services import ReporteService
+
+
+class RegistrosNuevosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('admin', password='clave', is_staff=True)
+        cls.empleado = Empleado.objects.create(nombres='Ana', apellidos='Díaz', dni=40000001, contrato='CAS')
+        cls.comision = TipoAsistencia.objects.create(nombre_asistencia='Salida por comisión')
+        cls.hoy = timezone.localdate()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+        self.url = reverse('api_registros_nuevos')
+
+    def marcar(self, fecha=None, hora=time(9, 0)):
+        # La marca de agua (UltimoRegistro) se invalida al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            return RegistroAsistencia.objects.create(
+                empleado=self.empleado, tipo=self.comision,
+                fecha_registro=fecha or self.hoy, hora_registro=hora, descripcion='Banco',
+            )
+
+    def consultar(self, desde_id=0, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(self.url, {'desde_id': desde_id}, headers=headers)
+
+    def test_el_cursor_avanza_con_los_registros_nuevos(self):
+        self.marcar(fecha=self.hoy - timedelta(days=1))
+        primeros = [self.marcar(hora=time(9, m)).pk for m in range(2)]
+
+        data = self.consultar().json()
+        self.assertEqual([r['id'] for r in data['registros']], primeros)
+        self.assertEqual(data['cursor'], primeros[-1])
+        self.assertFalse(data['hay_mas'])
+
+        data = self.consultar(data['cursor']).json()
+        self.assertEqual(data['registros'], [])
+        self.assertEqual(data['cursor'], primeros[-1])
+
+        nuevo = self.marcar(hora=time(10, 0))
+        data = self.consultar(data['cursor']).json()
+        self.assertEqual([r['id'] for r in data['registros']], [nuevo.pk])
+        self.assertEqual(data['registros'][0]['descripcion'], 'Banco')
+        self.assertEqual(data['cursor'], nuevo.pk)
+
+    def test_limite_indica_que_hay_mas(self):
+        ids = [self.marcar(hora=time(9, m)).pk for m in range(3)]
+        registros, hay_mas = ReporteService.registros_nuevos(self.hoy, 0, limite=2)
+        self.assertEqual([r['id'] for r in registros], ids[:2])
+        self.assertTrue(hay_mas)
+        registros, hay_mas = ReporteService.registros_nuevos(self.hoy, registros[-1]['id'], limite=2)
+        self.assertEqual([r['id'] for r in registros], ids[2:])
+        self.assertFalse(hay_mas)
+
+    def test_etag_vigente_responde_304_hasta_que_hay_un_registro_nuevo(self):
+        registro = self.marcar()
+        response = self.consultar(registro.pk)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.consultar(registro.pk, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        nuevo = self.marcar(hora=time(10, 0))
+        response = self.consultar(registro.pk, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([r['id'] for r in response.json()['registros']], [nuevo.pk])
+
+    def test_parametros_invalidos_y_acceso_solo_staff(self):
+        self.assertEqual(self.client.get(self.url, {'desde_id': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'fecha': '2025-02-30'}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
@@ -0,0 +1,86 @@
+"""
+Pruebas de las exportaciones en segundo plano: latido del worker, recuperación
+de jobs abandonados y descarga directa cuando no hay worker.
+"""
+
+import shutil
+import tempfile
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from app.job_service import ReporteJobService
+from app.models import ReporteJob
+
+
+class RecuperarAbandonadosTests(TestCase):
+
+    def crear(self, iniciado, latido):
+        ahora = timezone.now()
+        return ReporteJob.objects.create(
+            tipo='asistencia', formato='csv', parametros={}, estado=ReporteJob.PROCESANDO,
+            iniciado_en=ahora - iniciado, latido_en=ahora - latido if latido is not None else None,
+        )
+
+    def test_job_largo_con_latido_no_se_recupera(self):
+        job = self.crear(iniciado=timedelta(hours=2), latido=timedelta(seconds=20))
+        self.assertEqual(ReporteJobService.recuperar_abandonados(5), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.estado, ReporteJob.PROCESANDO)
+
+    def test_job_sin_latido_reciente_vuelve_a_pendiente(self):
+        sin_latido = self.crear(iniciado=timedelta(minutes=20), latido=timedelta(minutes=10))
+        anterior = self.crear(iniciado=timedelta(minutes=20), latido=None)
+        self.assertEqual(ReporteJobService.recuperar_abandonados(5), 2)
+        for job in (sin_latido, anterior):
+            job.refresh_from_db()
+            self.assertEqual(job.estado, ReporteJob.PENDIENTE)
+            self.assertIsNone(job.latido_en)
+
+
+class SolicitarReporteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('admin', password='clave', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+
+    @override_settings(REPORTES_SEGUNDO_PLANO=False)
+    def test_sin_worker_redirige_a_la_descarga_directa(self):
+        respuesta = self.client.post(
+            reverse('solicitar_reporte', args=['resumen']), {'desde': '2025-06-01', 'formato': 'csv'}
+        )
+        self.assertRedirects(
+            respuesta, reverse('resumen_excel') + '?desde=2025-06-01&formato=csv', fetch_redirect_response=False
+        )
+        self.assertFalse(ReporteJob.objects.exists())
+
+    @override_settings(REPORTES_SEGUNDO_PLANO=True)
+    def test_con_worker_encola_y_ofrece_descarga_directa_si_demora(self):
+        self.client.post(reverse('solicitar_reporte', args=['asistencia']), {'formato': 'csv'})
+        job = ReporteJob.objects.get()
+        self.assertEqual(job.estado, ReporteJob.PENDIENTE)
+
+        reporte = self.client.get(reverse('api_estado_reportes')).json()['reportes'][0]
+        self.assertNotIn('url_directa', reporte)
+
+        ReporteJob.objects.filter(pk=job.pk).update(creado_en=timezone.now() - timedelta(minutes=2))
+        reporte = self.client.get(reverse('api_estado_reportes')).json()['reportes'][0]
+        self.assertEqual(reporte['url_directa'], reverse('descargar_excel') + '?formato=csv')
+
+    def test_procesar_termina_el_job(self):
+        with override_settings(MEDIA_ROOT=self.media, REPORTES_CACHE_MAX_MB=0):
+            ReporteJobService.encolar('asistencia', {'formato': 'csv'}, self.usuario)
+            job = ReporteJobService.tomar_siguiente()
+            self.assertIsNotNone(job.latido_en)
+            self.assertTrue(ReporteJobService.procesar(job))
+        job.refresh_from_db()
+        self.assertEqual(job.estado, ReporteJob.TERMINADO)
+        self.assertGreater(job.tamano, 0)
@@ -0,0 +1,139 @@
+"""
+Pruebas del mantenimiento de ResumenDiario al crear, editar y eliminar registros.
+"""
+
+from datetime import date, time
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from app.caches import CatalogoTipos
+from app.models import Empleado, TipoAsistencia, RegistroAsistencia, ResumenDiario
+from app.services import AsistenciaService, ReporteService
+
+
+class ResumenDiarioSenalesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empleado = Empleado.objects.create(nombres='Ana', apellidos='Díaz', dni=40000001, contrato='CAS')
+        cls.entrada = TipoAsistencia.objects.create(nombre_asistencia='Entrada')
+        cls.salida = TipoAsistencia.objects.create(nombre_asistencia='Salida')
+
+    def setUp(self):
+        cache.clear()
+        self.dia = date(2025, 6, 2)
+        RegistroAsistencia.objects.create(
+            empleado=self.empleado, tipo=self.entrada, fecha_registro=self.dia, hora_registro=time(8, 0)
+        )
+        self.salida_registro = RegistroAsistencia.objects.create(
+            empleado=self.empleado, tipo=self.salida, fecha_registro=self.dia, hora_registro=time(17, 0)
+        )
+
+    def trabajadas(self, fecha):
+        return ResumenDiario.objects.filter(empleado=self.empleado, fecha=fecha) \
+            .values_list('trabajadas', flat=True).first()
+
+    def test_crear_actualiza_resumen(self):
+        self.assertEqual(self.trabajadas(self.dia), 9 * 3600)
+
+    def test_editar_hora_recalcula(self):
+        self.salida_registro.hora_registro = time(16, 0)
+        self.salida_registro.save()
+        self.assertEqual(self.trabajadas(self.dia), 8 * 3600)
+
+    def test_mover_de_fecha_recalcula_ambos_dias(self):
+        otro_dia = date(2025, 6, 3)
+        self.salida_registro.fecha_registro = otro_dia
+        self.salida_registro.save()
+        self.assertEqual(self.trabajadas(self.dia), 0)
+        self.assertEqual(self.trabajadas(otro_dia), 0)
+        self.assertEqual(ResumenDiario.objects.count(), 2)
+
+    def test_eliminar_recalcula_y_borra_dia_vacio(self):
+        self.salida_registro.delete()
+        self.assertEqual(self.trabajadas(self.dia), 0)
+        RegistroAsistencia.objects.filter(fecha_registro=self.dia).delete()
+        self.assertFalse(ResumenDiario.objects.exists())
+
+    def test_registro_nuevo_no_abre_savepoint_propio(self):
+        almuerzo = TipoAsistencia.objects.create(nombre_asistencia='Inicio almuerzo')
+        registro = RegistroAsistencia(
+            empleado=self.empleado, tipo=almuerzo, fecha_registro=self.dia, hora_registro=time(13, 0)
+        )
+        CatalogoTipos.todos()  # Catálogo en memoria, como en producción
+        with CaptureQueriesContext(connection) as consultas:
+            AsistenciaService._insertar_registro(registro)
+        sentencias = [q['sql'].split()[0].upper() for q in consultas.captured_queries]
+        # Savepoint de _insertar_registro (la prueba ya corre en una transacción), INSERT,
+        # consulta agregada del día, upsert del resumen y RELEASE
+        self.assertEqual(sentencias.count('SAVEPOINT'), 1)
+        self.assertEqual(len(sentencias), 5)
+        self.assertEqual(self.trabajadas(self.dia), 9 * 3600)
+
+    def test_tipos_fuera_del_resumen_y_mayusculas(self):
+        otro_dia = date(2025, 6, 4)
+        refrigerio = TipoAsistencia.objects.create(nombre_asistencia='Refrigerio')
+        RegistroAsistencia.objects.create(
+            empleado=self.empleado, tipo=refrigerio, fecha_registro=otro_dia, hora_registro=time(10, 0)
+        )
+        self.assertEqual(self.trabajadas(otro_dia), 0)
+        ini = TipoAsistencia.objects.create(nombre_asistencia='INICIO ALMUERZO')
+        fin = TipoAsistencia.objects.create(nombre_asistencia='fin almuerzo')
+        for tipo, hora in ((ini, time(13, 0)), (fin, time(13, 45, 30))):
+            RegistroAsistencia.objects.create(
+                empleado=self.empleado, tipo=tipo, fecha_registro=self.dia, hora_registro=hora
+            )
+        resumen = ResumenDiario.objects.get(empleado=self.empleado, fecha=self.dia)
+        self.assertEqual(resumen.almuerzo, 45 * 60 + 30)
+        self.assertEqual(resumen.trabajadas, 9 * 3600 - resumen.almuerzo)
+
+    def test_consulta_agregada_coincide_con_el_calculo_por_marcas(self):
+        marcas = list(
+            RegistroAsistencia.objects.values_list('empleado_id', 'fecha_registro', 'tipo_id', 'hora_registro')
+        )
+        por_marcas = ReporteService.calcular_segundos_lote(
+            [m[0] for m in marcas], [m[1] for m in marcas], [m[2] for m in marcas],
+            [ReporteService.microsegundos(m[3]) for m in marcas],
+        )
+        dias = set(por_marcas) | {(self.empleado.id_empleado, date(2025, 6, 9))}
+        self.assertEqual(ReporteService.calcular_segundos_dias(dias), por_marcas)
+
+
+class MigracionResumenTests(TransactionTestCase):
+    """La migración 0015 llena ResumenDiario con el historial usando solo modelos históricos."""
+
+    antes = [('app', '0014_reportejob')]
+    despues = [('app', '0015_resumendiario_backfill')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.ultimas = executor.loader.graph.leaf_nodes()
+        executor.migrate(self.antes)
+        apps = executor.loader.project_state(self.antes).apps
+
+        Empleado = apps.get_model('app', 'Empleado')
+        TipoAsistencia = apps.get_model('app', 'TipoAsistencia')
+        RegistroAsistencia = apps.get_model('app', 'RegistroAsistencia')
+        self.empleado = Empleado.objects.create(nombres='Ana', apellidos='Díaz', dni=40000001, contrato='CAS')
+        entrada = TipoAsistencia.objects.create(nombre_asistencia='Entrada')
+        salida = TipoAsistencia.objects.create(nombre_asistencia='Salida')
+        for tipo, hora in ((entrada, time(8, 0)), (salida, time(16, 30))):
+            RegistroAsistencia.objects.create(
+                empleado=self.empleado, tipo=tipo, fecha_registro=date(2024, 3, 4), hora_registro=hora
+            )
+        RegistroAsistencia.objects.create(
+            empleado=self.empleado, tipo=entrada, fecha_registro=date(2024, 3, 5), hora_registro=time(8, 0)
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.despues)
+        self.Resumen = executor.loader.project_state(self.despues).apps.get_model('app', 'ResumenDiario')
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(self.ultimas)
+
+    def test_historial_queda_resumido(self):
+        resumenes = dict(self.Resumen.objects.values_list('fecha', 'trabajadas'))
+        self.assertEqual(resumenes, {date(2024, 3, 4): 8 * 3600 + 30 * 60, date(2024, 3, 5): 0})
@@ -0,0 +1,82 @@
+"""
+Pruebas de AsistenciaService.sincronizar_registros: idempotencia por clave,
+ventana de antigüedad y marca de registros sincronizados.
+"""
+
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from app.export_service import ExportService
+from app.models import Empleado, TipoAsistencia, RegistroAsistencia
+from app.services import AsistenciaService
+
+
+class SincronizarRegistrosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empleado = Empleado.objects.create(nombres='Ana', apellidos='Díaz', dni=40000001, contrato='CAS')
+        cls.entrada = TipoAsistencia.objects.create(nombre_asistencia='Entrada')
+        cls.comision = TipoAsistencia.objects.create(nombre_asistencia='Salida por comisión')
+
+    def setUp(self):
+        cache.clear()
+
+    def marca(self, clave, tipo=None, hace=timedelta(minutes=10)):
+        return {
+            'clave': clave,
+            'empleado_id': self.empleado.pk,
+            'tipo_id': (tipo or self.entrada).pk,
+            'fecha_hora': (timezone.now() - hace).isoformat(),
+            'descripcion': 'Banco',
+        }
+
+    def estados(self, marcas):
+        return [r['estado'] for r in AsistenciaService.sincronizar_registros(marcas)]
+
+    def test_reenviar_el_lote_no_duplica(self):
+        lote = [self.marca('a'), self.marca('b', tipo=self.comision)]
+        self.assertEqual(self.estados(lote), ['registrado', 'registrado'])
+        self.assertEqual(self.estados(lote), ['ya_recibido', 'ya_recibido'])
+        self.assertEqual(RegistroAsistencia.objects.count(), 2)
+
+    def test_clave_repetida_en_el_lote(self):
+        lote = [self.marca('a', tipo=self.comision), self.marca('a', tipo=self.comision)]
+        self.assertEqual(self.estados(lote), ['registrado', 'registrado'])
+        self.assertEqual(RegistroAsistencia.objects.count(), 1)
+
+    def test_tipo_unico_con_otra_clave_es_duplicado(self):
+        self.assertEqual(self.estados([self.marca('a'), self.marca('b', hace=timedelta(minutes=5))]),
+                         ['registrado', 'duplicado'])
+        self.assertEqual(RegistroAsistencia.objects.count(), 1)
+
+    def test_ventana_de_antiguedad(self):
+        limite = AsistenciaService.MAX_ANTIGUEDAD_SINCRONIZACION
+        self.assertLessEqual(limite, timedelta(hours=72))
+        estados = self.estados([
+            self.marca('dentro', tipo=self.comision, hace=limite - timedelta(minutes=5)),
+            self.marca('vieja', tipo=self.comision, hace=limite + timedelta(minutes=5)),
+            self.marca('futura', tipo=self.comision,
+                       hace=-(AsistenciaService.TOLERANCIA_RELOJ + timedelta(minutes=1))),
+        ])
+        self.assertEqual(estados, ['registrado', 'rechazado', 'rechazado'])
+        self.assertEqual(
+            list(RegistroAsistencia.objects.values_list('clave_idempotencia', flat=True)), ['dentro']
+        )
+
+    def test_registros_sincronizados_quedan_marcados(self):
+        self.estados([self.marca('a')])
+        AsistenciaService.crear_registro_asistencia(self.empleado.pk, self.comision.pk, 'Banco', None)
+        sincronizado = RegistroAsistencia.objects.get(clave_idempotencia='a')
+        directo = RegistroAsistencia.objects.get(clave_idempotencia__isnull=True)
+        self.assertIsNotNone(sincronizado.sincronizado_en)
+        self.assertIsNone(directo.sincronizado_en)
+
+        filas = {
+            fila[1]: fila[-1]
+            for fila in ExportService.filas_asistencia(RegistroAsistencia.objects.order_by('id_registro'))
+        }
+        self.assertEqual(ExportService.ENCABEZADOS_ASISTENCIA[-1], "Sincronizado sin conexión")
+        self.assertTrue(filas['Entrada'])
+        self.assertEqual(filas['Salida por comisión'], '')
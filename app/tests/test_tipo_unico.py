@@ -0,0 +1,96 @@
+"""
+Pruebas de la restricción registro_tipo_unico_por_dia y de la migración 0010
+que la introduce sin romper los duplicados históricos.
+"""
+
+from datetime import date, time
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from app.models import Empleado, TipoAsistencia, RegistroAsistencia
+
+
+class RestriccionTipoUnicoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empleado = Empleado.objects.create(nombres='Ana', apellidos='Díaz', dni=40000001, contrato='CAS')
+        cls.otro = Empleado.objects.create(nombres='Luis', apellidos='Paz', dni=40000002, contrato='CAS')
+        cls.entrada = TipoAsistencia.objects.create(nombre_asistencia='Entrada')
+        cls.comision = TipoAsistencia.objects.create(nombre_asistencia='Salida por comisión')
+
+    def marcar(self, tipo, empleado=None, fecha=date(2025, 6, 2), hora=time(8, 0)):
+        return RegistroAsistencia.objects.create(
+            empleado=empleado or self.empleado, tipo=tipo, fecha_registro=fecha, hora_registro=hora
+        )
+
+    def test_tipo_unico_repetido_el_mismo_dia_falla(self):
+        self.marcar(self.entrada)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.marcar(self.entrada, hora=time(8, 5))
+
+    def test_tipo_unico_en_otro_dia_u_otro_empleado(self):
+        self.marcar(self.entrada)
+        self.marcar(self.entrada, fecha=date(2025, 6, 3))
+        self.marcar(self.entrada, empleado=self.otro)
+        self.assertEqual(RegistroAsistencia.objects.count(), 3)
+
+    def test_tipo_no_unico_se_repite(self):
+        self.marcar(self.comision)
+        self.marcar(self.comision, hora=time(15, 0))
+        self.assertEqual(RegistroAsistencia.objects.filter(tipo=self.comision).count(), 2)
+        self.assertFalse(RegistroAsistencia.objects.filter(tipo_unico=True).exists())
+
+
+class MigracionTipoUnicoTests(TransactionTestCase):
+    """La migración 0010 conserva los duplicados históricos y marca solo el primero."""
+
+    antes = [('app', '0009_registroasistencia_indices_exportacion')]
+    despues = [('app', '0010_registroasistencia_tipo_unico')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.ultimas = executor.loader.graph.leaf_nodes()
+        executor.migrate(self.antes)
+        apps = executor.loader.project_state(self.antes).apps
+
+        Empleado = apps.get_model('app', 'Empleado')
+        TipoAsistencia = apps.get_model('app', 'TipoAsistencia')
+        RegistroAsistencia = apps.get_model('app', 'RegistroAsistencia')
+        empleado = Empleado.objects.create(nombres='Ana', apellidos='Díaz', dni=40000001, contrato='CAS')
+        entrada = TipoAsistencia.objects.create(nombre_asistencia='Entrada')
+        comision = TipoAsistencia.objects.create(nombre_asistencia='Salida por comisión')
+        fecha = date(2024, 3, 4)
+        self.ids_entrada = [
+            RegistroAsistencia.objects.create(
+                empleado=empleado, tipo=entrada, fecha_registro=fecha, hora_registro=hora
+            ).pk
+            for hora in (time(8, 0), time(8, 1), time(8, 2))
+        ]
+        for hora in (time(10, 0), time(12, 0)):
+            RegistroAsistencia.objects.create(
+                empleado=empleado, tipo=comision, fecha_registro=fecha, hora_registro=hora
+            )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.despues)
+        self.Registro = executor.loader.project_state(self.despues).apps.get_model('app', 'RegistroAsistencia')
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(self.ultimas)
+
+    def test_duplicados_historicos_se_conservan(self):
+        self.assertEqual(self.Registro.objects.filter(id_registro__in=self.ids_entrada).count(), 3)
+        self.assertEqual(self.Registro.objects.count(), 5)
+
+    def test_solo_el_primero_queda_marcado(self):
+        marcados = list(self.Registro.objects.filter(tipo_unico=True).values_list('id_registro', flat=True))
+        self.assertEqual(marcados, [min(self.ids_entrada)])
+
+    def test_la_restriccion_rige_despues_de_migrar(self):
+        primero = self.Registro.objects.get(id_registro=min(self.ids_entrada))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.Registro.objects.create(
+                empleado_id=primero.empleado_id, tipo_id=primero.tipo_id,
+                fecha_registro=primero.fecha_registro, hora_registro=time(9, 0), tipo_unico=True,
+            )
@@ -14,6 +14,8 @@ urlpatterns = [
     # Sistema de QR por empleado (existente)
     path('qr/', views.escanear_qr, name='escanear_qr'),
     path('qr/<str:codigo_qr>/', views.registrar_asistencia_qr, name='registrar_asistencia_qr'),
+    path('qr/<str:codigo_qr>/image.<str:formato>', views.imagen_qr_empleado, name='imagen_qr_empleado'),
+    path('api/buscar-empleados/', views.api_buscar_empleados, name='api_buscar_empleados'),
     path('api/buscar-empleado-qr/', views.api_buscar_empleado_qr, name='api_buscar_empleado_qr'),
 
     # QR general: auto-identificación por dispositivo
@@ -22,9 +24,21 @@ urlpatterns = [
     path('api/identificar-fingerprint/', views.api_identificar_por_fingerprint, name='api_identificar_por_fingerprint'),
     path('api/vincular-fingerprint/', views.api_vincular_fingerprint, name='api_vincular_fingerprint'),
     path('api/desvincular-fingerprint/', views.api_desvincular_fingerprint, name='api_desvincular_fingerprint'),
+
+    # Registros tomados sin conexión (cola del service worker)
+    path('api/sincronizar-registros/', views.api_sincronizar_registros, name='api_sincronizar_registros'),
+    path('sw.js', views.service_worker, name='service_worker'),
     
     # Reportes (solo para staff)
     path('login/descarga/', views.pagina_descarga_excel, name='pagina_descarga_excel'),
     path('login/descargar/asistencia', views.exportar_asistencia_excel, name='descargar_excel'),
     path('login/descargar/resumen/', views.exportar_resumen_excel, name='resumen_excel'),
+    path('login/reportes/<str:tipo>/solicitar/', views.solicitar_reporte, name='solicitar_reporte'),
+    path('login/reportes/<int:job_id>/descargar/', views.descargar_reporte, name='descargar_reporte'),
+    path('login/api/reportes/', views.api_estado_reportes, name='api_estado_reportes'),
+    path('login/descargar/credenciales/', views.descargar_credenciales, name='descargar_credenciales'),
+    path('login/tablero/', views.tablero_asistencia, name='tablero_asistencia'),
+    path('login/api/registros-nuevos/', views.api_registros_nuevos, name='api_registros_nuevos'),
+    path('login/eventos/registros/', views.eventos_registros, name='eventos_registros'),
+    path('login/metricas/', views.metricas, name='metricas'),
 ]
@@ -1,17 +1,25 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse, Http404
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
 from django.urls import reverse
-from .models import Empleado, TipoAsistencia, RegistroAsistencia, DispositivoEmpleado
+from django.utils import timezone
+from django.utils.http import urlencode
+from .models import Empleado, TipoAsistencia, DispositivoEmpleado, ReporteJob
 from .services import AsistenciaService, ReporteService
-from .qr_service import QRService
+from .qr_service import QRService, QR_BOX_SIZE, imagen_qr
+from .export_service import ExportService, CONTENT_TYPES
+from .job_service import ReporteJobService
+from .credencial_service import CredencialService
+from .caches import CatalogoTipos, CacheFingerprint, IndiceEmpleados, IndiceQR, UltimoRegistro
+from .eventos import flujo_sse
+from .metricas import Metricas
 from .utils import obtener_fecha_hora_actual
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Border, Side
-from openpyxl.worksheet.table import Table, TableStyleInfo
+from datetime import date, datetime, timedelta
 import json
 
 
@@ -31,180 +39,225 @@ def es_staff(user):
 def pagina_descarga_excel(request):
     """
     Página para descargar reportes de Excel.
-    Solo accesible para usuarios staff.
+    Solo accesible para usuarios staff. El filtro de empleado usa el buscador
+    paginado (api_buscar_empleados) en lugar de listar a todos en la plantilla.
     """
-    return render(request, 'pagina_descarga_excel.html')
+    contratos = Empleado.objects.order_by('contrato').values_list('contrato', flat=True).distinct()
+    return render(request, 'pagina_descarga_excel.html', {
+        'contratos': contratos,
+    })
 
 
 @user_passes_test(es_staff)
 def exportar_resumen_excel(request):
     """
-    Exporta un resumen diario de asistencia en formato Excel.
-    Incluye Proyecto y Actividad (si existen) para la ENTRADA de ese día.
-    """
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Resumen Diario"
-
-    # Encabezados (sin Proyecto/Actividad - ACTIVIDADES deshabilitadas)
-    encabezados = [
-        "Empleado", "Fecha", "Tiempo de Almuerzo",
-        "Horas por Comisión", "Horas por Permiso (Otros)",
-        "Horas Trabajadas Totales"
-    ]
-    ws.append(encabezados)
-
-    # Obtener datos usando el servicio
-    datos_diarios = ReporteService.obtener_datos_resumen()
-
-    for (id_empleado, fecha), data in datos_diarios.items():
-        empleado = data["empleado"]
-        horas = ReporteService.calcular_horas_empleado(data)
-
-        ws.append([
-            empleado.nombre_completo,
-            fecha.strftime("%Y-%m-%d"),
-            horas['almuerzo'],
-            horas['comision'],
-            horas['permiso'],
-            horas['trabajadas']
-        ])
-
-    # Ajustar ancho de columnas
-    for col in ws.columns:
-        max_length = max(len(str(cell.value)) for cell in col if cell.value)
-        ws.column_dimensions[col[0].column_letter].width = max_length + 2
-
-    # Aplicar estilo al encabezado
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill("solid", fgColor="4F81BD")
-    thin_border = Border(
-        left=Side(style='thin'), right=Side(style='thin'),
-        top=Side(style='thin'), bottom=Side(style='thin')
-    )
+    Exporta un resumen diario de asistencia en formato Excel, CSV o CSV comprimido (?formato=).
+    Lee los resúmenes precalculados (ResumenDiario) en lugar de recalcular el historial.
+    Acepta filtros opcionales por rango de fechas, empleado y contrato.
+    Si no hubo registros nuevos dentro de los filtros se envía el archivo de CacheReportes.
+    """
+    try:
+        filtros = ReporteService.obtener_filtros(request.GET)
+        formato = ExportService.obtener_formato(request.GET)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('pagina_descarga_excel')
 
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = thin_border
+    return ExportService.respuesta_reporte('resumen', formato, filtros, request.headers.get('If-None-Match', ''))
 
-    # Crear tabla solo si hay datos (al menos 1 fila de datos)
-    if ws.max_row > 1:
-        tabla = Table(
-            displayName="ResumenAsistencia",
-            ref=f"A1:F{ws.max_row}"
-        )
-        style = TableStyleInfo(
-            name="TableStyleMedium9", showFirstColumn=False,
-            showLastColumn=False, showRowStripes=True, showColumnStripes=False
-        )
-        tabla.tableStyleInfo = style
-        ws.add_table(tabla)
+@user_passes_test(es_staff)
+def exportar_asistencia_excel(request):
+    """
+    Exporta los registros de asistencia en formato Excel, CSV o CSV comprimido (?formato=).
+    Acepta filtros opcionales por rango de fechas, empleado y contrato.
+    El archivo se genera en modo streaming: los registros se leen por lotes
+    y se escriben fila por fila, sin cargar todo el historial en memoria.
+    Si no hubo registros nuevos dentro de los filtros se envía el archivo de CacheReportes.
+    """
+    try:
+        filtros = ReporteService.obtener_filtros(request.GET)
+        formato = ExportService.obtener_formato(request.GET)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('pagina_descarga_excel')
+
+    # ACTIVIDADES deshabilitadas: hoja "Actividades" temporalmente omitida
+    return ExportService.respuesta_reporte('asistencia', formato, filtros, request.headers.get('If-None-Match', ''))
+
+
+URLS_DESCARGA_DIRECTA = {'asistencia': 'descargar_excel', 'resumen': 'resumen_excel'}
+ESPERA_WORKER = timedelta(seconds=60)  # Pendiente más tiempo: se ofrece la descarga directa
+
+
+def url_descarga_directa(tipo, parametros, formato):
+    """
+    URL de la descarga directa (streaming) de un reporte con los mismos filtros.
+
+    Args:
+        tipo: 'asistencia' o 'resumen'
+        parametros: dict de filtros (ReporteJobService.PARAMETROS)
+        formato: Uno de ExportService.FORMATOS
+
+    Returns:
+        str
+    """
+    return f"{reverse(URLS_DESCARGA_DIRECTA[tipo])}?{urlencode({**parametros, 'formato': formato})}"
 
-    # Enviar archivo
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-    )
-    response['Content-Disposition'] = 'attachment; filename=resumen_asistencia.xlsx'
-    wb.save(response)
-    return response
 
 @user_passes_test(es_staff)
-def exportar_asistencia_excel(request):
+@require_http_methods(["POST"])
+def solicitar_reporte(request, tipo):
     """
-    Exporta todos los registros de asistencia en formato Excel.
-    Incluye información detallada de cada registro y agrega una hoja "Actividades".
+    Encola una exportación (asistencia o resumen) con los filtros y el formato del
+    formulario; la genera `manage.py procesar_reportes` y la página de descargas
+    consulta su estado hasta que el archivo está listo.
+    Sin REPORTES_SEGUNDO_PLANO (no hay worker) redirige a la descarga directa.
     """
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Asistencia"
+    if not settings.REPORTES_SEGUNDO_PLANO and tipo in URLS_DESCARGA_DIRECTA:
+        parametros = {
+            clave: request.POST[clave].strip()
+            for clave in ReporteJobService.PARAMETROS
+            if (request.POST.get(clave) or '').strip()
+        }
+        return redirect(url_descarga_directa(tipo, parametros, request.POST.get('formato') or 'xlsx'))
+    try:
+        job = ReporteJobService.encolar(tipo, request.POST, request.user)
+    except ValueError as e:
+        messages.error(request, str(e))
+    else:
+        messages.success(request, f"Reporte #{job.pk} en cola. Estará disponible abajo cuando termine.")
+    return redirect('pagina_descarga_excel')
 
-    # Encabezados del excel
-    encabezados = ["Empleado", "Tipo de Asistencia", "Fecha", "Hora", "Descripción", "ID Dispositivo"]
-    ws.append(encabezados)
 
-    # Registros usando el modelo
-    registros = RegistroAsistencia.objects.select_related('empleado', 'tipo') \
-        .order_by('-fecha_registro', '-hora_registro')
-    
-    for reg in registros:
-        fila = [
-            reg.empleado.nombre_completo,
-            reg.tipo.nombre_asistencia,
-            reg.fecha_registro.strftime('%Y-%m-%d'),
-            reg.hora_registro.strftime('%H:%M:%S'),
-            reg.descripcion or '',
-            reg.fingerprint or '',
-        ]
-        ws.append(fila)
-
-    # Ajustar ancho de columnas
-    for col in ws.columns:
-        max_length = max(len(str(cell.value)) for cell in col if cell.value)
-        ws.column_dimensions[col[0].column_letter].width = max_length + 2
-
-    # Estilo encabezado
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill("solid", fgColor="4F81BD")
-    thin_border = Border(
-        left=Side(style='thin'), right=Side(style='thin'),
-        top=Side(style='thin'), bottom=Side(style='thin')
+@user_passes_test(es_staff)
+@require_http_methods(["GET"])
+def api_estado_reportes(request):
+    """
+    Estado de las últimas exportaciones en segundo plano del usuario.
+    Los jobs pendientes por más de ESPERA_WORKER (worker detenido o saturado)
+    incluyen url_directa para descargarlos sin esperar.
+    """
+    jobs = ReporteJobService.recientes(request.user)
+    limite = timezone.now() - ESPERA_WORKER
+    for job in jobs:
+        if job['estado'] == ReporteJob.TERMINADO:
+            job['url'] = reverse('descargar_reporte', args=[job['id']])
+        elif job['estado'] == ReporteJob.PENDIENTE and datetime.fromisoformat(job['creado_en']) < limite:
+            job['url_directa'] = url_descarga_directa(job['tipo_clave'], job['parametros'], job['formato'])
+    pendientes = any(j['estado'] in (ReporteJob.PENDIENTE, ReporteJob.PROCESANDO) for j in jobs)
+    response = JsonResponse({'success': True, 'reportes': jobs, 'pendientes': pendientes})
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@user_passes_test(es_staff)
+def descargar_reporte(request, job_id):
+    """Descarga el archivo de una exportación terminada desde el almacenamiento."""
+    job = get_object_or_404(ReporteJob, pk=job_id, estado=ReporteJob.TERMINADO)
+    try:
+        archivo = job.archivo.open('rb')
+    except (ValueError, FileNotFoundError):
+        raise Http404("El archivo del reporte ya no está disponible")
+    return FileResponse(
+        archivo, as_attachment=True, filename=job.nombre_descarga,
+        content_type=CONTENT_TYPES[job.formato]
     )
 
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = thin_border
 
-    # Tabla solo si hay datos (al menos 1 fila de datos)
-    if ws.max_row > 1:
-        tabla = Table(
-            displayName="RegistroAsistencia",
-            ref=f"A1:F{ws.max_row}"
-        )
-        style = TableStyleInfo(
-            name="TableStyleMedium9", showFirstColumn=False,
-            showLastColumn=False, showRowStripes=True, showColumnStripes=False
-        )
-        tabla.tableStyleInfo = style
-        ws.add_table(tabla)
+@user_passes_test(es_staff)
+def descargar_credenciales(request):
+    """
+    Descarga las credenciales QR de los empleados en un solo archivo.
+    formato=pdf genera páginas A4 con varias credenciales; formato=zip un PNG por empleado.
+    Acepta filtros opcionales por empleado y contrato. El archivo se genera por bloques
+    en memoria y se envía a medida que se produce, sin escribir en disco.
+    """
+    formato = request.GET.get('formato', 'pdf')
+    if formato not in ('pdf', 'zip'):
+        messages.error(request, "Formato de credenciales inválido.")
+        return redirect('pagina_descarga_excel')
+    try:
+        filtros = ReporteService.obtener_filtros(request.GET)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('pagina_descarga_excel')
+
+    empleados = CredencialService.obtener_empleados(filtros)
+    if formato == 'pdf':
+        response = StreamingHttpResponse(CredencialService.stream_pdf(empleados), content_type='application/pdf')
+    else:
+        response = StreamingHttpResponse(CredencialService.stream_zip(empleados), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="credenciales_qr.{formato}"'
+    return response
 
-    # ACTIVIDADES deshabilitadas: hoja "Actividades" temporalmente omitida
-    # from .models import ActividadProyecto
-    # ws2 = wb.create_sheet(title="Actividades")
-    # ws2.append(["Empleado", "Fecha", "Proyecto", "Actividad", "Hora"])
-    # for ap in ActividadProyecto.objects.select_related('empleado').all().order_by('-fecha', '-hora'):
-    #     ws2.append([
-    #         ap.empleado.nombre_completo,
-    #         ap.fecha.strftime('%Y-%m-%d'),
-    #         ap.proyecto,
-    #         ap.actividad,
-    #         ap.hora.strftime('%H:%M:%S'),
-    #     ])
-    # for col in ws2.columns:
-    #     max_length = max(len(str(cell.value)) for cell in col if cell.value)
-    #     ws2.column_dimensions[col[0].column_letter].width = max_length + 2
-    # if ws2.max_row > 1:
-    #     tabla2 = Table(
-    #         displayName="TablaActividades",
-    #         ref=f"A1:E{ws2.max_row}"
-    #     )
-    #     style2 = TableStyleInfo(
-    #         name="TableStyleMedium9", showFirstColumn=False,
-    #         showLastColumn=False, showRowStripes=True, showColumnStripes=False
-    #     )
-    #     tabla2.tableStyleInfo = style2
-    #     ws2.add_table(tabla2)
-
-    # Respuesta
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-    )
-    response['Content-Disposition'] = 'attachment; filename=registro_asistencia.xlsx'
-    wb.save(response)
+
+@user_passes_test(es_staff)
+def tablero_asistencia(request):
+    """
+    Tablero en vivo con los registros del día para supervisores.
+    La página consulta periódicamente api_registros_nuevos con el último id recibido.
+    """
+    return render(request, 'tablero_asistencia.html', {
+        'fecha': timezone.localdate(),
+        'intervalo_ms': 5000,
+    })
+
+
+@user_passes_test(es_staff)
+@require_http_methods(["GET"])
+def api_registros_nuevos(request):
+    """
+    Registros del día con id mayor a ?desde_id= (cursor del cliente).
+    Responde 304 sin consultar los registros si el ETag del cliente sigue vigente:
+    el ETag depende de la fecha, el cursor y el último id insertado (UltimoRegistro).
+    """
+    try:
+        desde_id = int(request.GET.get('desde_id') or 0)
+        fecha = date.fromisoformat(request.GET['fecha']) if request.GET.get('fecha') else timezone.localdate()
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Parámetros inválidos'}, status=400)
+
+    ultimo_id = UltimoRegistro.obtener()
+    etag = f'"{fecha.isoformat()}-{desde_id}-{ultimo_id}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        registros, hay_mas = ([], False) if desde_id >= ultimo_id else \
+            ReporteService.registros_nuevos(fecha, desde_id)
+        response = JsonResponse({
+            'success': True,
+            'cursor': registros[-1]['id'] if registros else desde_id,
+            'registros': registros,
+            'hay_mas': hay_mas,
+        })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
     return response
 
+@user_passes_test(es_staff)
+async def eventos_registros(request):
+    """
+    Flujo Server-Sent Events con cada registro de asistencia nuevo (vista async).
+    Requiere workers ASGI: bajo WSGI cada conexión ocuparía un worker completo,
+    así que responde 501 y el tablero sigue con la consulta periódica.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(
+            "Las notificaciones en tiempo real requieren SERVIDOR_PERFIL=asgi.",
+            status=501, content_type='text/plain; charset=utf-8'
+        )
+    response = StreamingHttpResponse(flujo_sse(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Evita que nginx acumule el flujo
+    return response
 
+@user_passes_test(es_staff)
+def metricas(request):
+    """
+    Métricas por vista de este proceso en formato de texto de Prometheus.
+    Solo tiene datos con METRICAS_ACTIVAS.
+    """
+    return HttpResponse(Metricas.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 def pagina_principal(request):
     """
@@ -213,6 +266,34 @@ def pagina_principal(request):
     return render(request, 'pagina_principal.html')
 
 
+QR_TIPOS_CONTENIDO = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+@require_http_methods(["GET", "HEAD"])
+def imagen_qr_empleado(request, codigo_qr, formato):
+    """
+    Sirve la imagen del QR de un empleado en PNG o SVG (?size= píxeles por módulo, 1-40).
+    La imagen depende solo del código, así que se memoriza en el proceso y se envía
+    con ETag fuerte y Cache-Control immutable para que navegadores y CDN no la vuelvan a pedir.
+    """
+    if formato not in QR_TIPOS_CONTENIDO or not IndiceQR.obtener(codigo_qr):
+        raise Http404("Código QR no encontrado")
+    try:
+        box_size = int(request.GET.get('size', QR_BOX_SIZE))
+    except ValueError:
+        box_size = QR_BOX_SIZE
+    box_size = min(max(box_size, 1), 40)
+
+    contenido, etag = imagen_qr(codigo_qr, formato, box_size)
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(contenido, content_type=QR_TIPOS_CONTENIDO[formato])
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
 def escanear_qr(request):
     """
     Página para escanear código QR.
@@ -224,24 +305,23 @@ def escanear_qr(request):
 def identificar_dispositivo(request):
     """
     Página de QR general: identifica por fingerprint. Si ya está vinculado, redirige directo al formulario.
-    Si no, muestra selector de empleado para vincular el dispositivo.
+    Si no, muestra un buscador de empleados (api_buscar_empleados) para vincular el dispositivo.
     """
-    empleados = Empleado.objects.order_by('apellidos', 'nombres')
-    return render(request, 'identificar.html', { 'empleados': empleados })
+    return render(request, 'identificar.html')
 
 
 def registrar_asistencia_qr(request, codigo_qr):
     """
     Vista para registrar asistencia usando código QR.
-    Detecta automáticamente al empleado.
+    Detecta automáticamente al empleado (desde el índice en memoria de códigos QR).
     """
-    empleado = Empleado.buscar_por_codigo_qr(codigo_qr)
+    empleado = IndiceQR.obtener(codigo_qr)
     
     if not empleado:
         messages.error(request, 'Código QR no válido o empleado no encontrado.')
         return render(request, 'error_qr.html')
     
-    tipos_evento = TipoAsistencia.objects.all()
+    tipos_evento = CatalogoTipos.todos()
 
     if request.method == 'POST':
         tipo_id = request.POST.get('tipo_evento')
@@ -258,7 +338,7 @@ def registrar_asistencia_qr(request, codigo_qr):
 
         # Usar el servicio para crear el registro
         success, message, registro = AsistenciaService.crear_registro_asistencia(
-            empleado.id_empleado, tipo_id, descripcion, fingerprint
+            empleado['id'], tipo_id, descripcion, fingerprint
         )
 
         if success:
@@ -294,7 +374,7 @@ def registrar_asistencia_auto(request, empleado_id):
     Primera vez: se vincula en identificar_dispositivo.
     """
     empleado = get_object_or_404(Empleado, id_empleado=empleado_id)
-    tipos_evento = TipoAsistencia.objects.all()
+    tipos_evento = CatalogoTipos.todos()
 
     if request.method == 'POST':
         tipo_id = request.POST.get('tipo_evento')
@@ -339,10 +419,34 @@ def registrar_asistencia_auto(request, empleado_id):
     })
 
 
+@require_http_methods(["GET", "HEAD"])
+async def api_buscar_empleados(request):
+    """
+    Búsqueda de empleados por prefijo de nombres, apellidos o DNI (vista async).
+    Parámetros: q, pagina (desde 1) y por_pagina. Responde 304 si el índice no cambió
+    desde el ETag que envía el navegador.
+    """
+    try:
+        pagina = max(int(request.GET.get('pagina', 1)), 1)
+        por_pagina = max(int(request.GET.get('por_pagina', IndiceEmpleados.POR_PAGINA)), 1)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Parámetros de paginación inválidos'}, status=400)
+
+    etag = f'"{await IndiceEmpleados.aversion()}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        resultado = await IndiceEmpleados.abuscar(request.GET.get('q', ''), pagina, por_pagina)
+        response = JsonResponse({'success': True, **resultado})
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'  # Revalidar siempre: el ETag cambia con cada alta o edición
+    return response
+
+
 @require_http_methods(["POST", "OPTIONS"])
-def api_buscar_empleado_qr(request):
+async def api_buscar_empleado_qr(request):
     """
-    API para buscar empleado por código QR.
+    API para buscar empleado por código QR (vista async).
     """
     # Responder preflight/local OPTIONS
     if request.method == 'OPTIONS':
@@ -354,7 +458,7 @@ def api_buscar_empleado_qr(request):
         if not codigo_qr:
             return JsonResponse({'success': False, 'error': 'Código QR requerido'}, status=400)
         
-        resultado = QRService.buscar_empleado_por_qr(codigo_qr)
+        resultado = await QRService.abuscar_empleado_por_qr(codigo_qr)
         status_code = 200 if resultado.get('success') else 404
         return JsonResponse(resultado, status=status_code)
         
@@ -365,9 +469,9 @@ def api_buscar_empleado_qr(request):
 
 
 @require_http_methods(["POST", "OPTIONS"])
-def api_identificar_por_fingerprint(request):
+async def api_identificar_por_fingerprint(request):
     """
-    Identifica empleado por fingerprint del dispositivo.
+    Identifica empleado por fingerprint del dispositivo (vista async).
     """
     if request.method == 'OPTIONS':
         return JsonResponse({'success': True})
@@ -376,18 +480,9 @@ def api_identificar_por_fingerprint(request):
         fingerprint = data.get('fingerprint')
         if not fingerprint:
             return JsonResponse({'success': False, 'error': 'Fingerprint requerido'}, status=400)
-        empleado = DispositivoEmpleado.obtener_empleado_por_fingerprint(fingerprint)
+        empleado = await CacheFingerprint.aobtener(fingerprint)
         if empleado:
-            return JsonResponse({
-                'success': True,
-                'empleado': {
-                    'id': empleado.id_empleado,
-                    'nombres': empleado.nombres,
-                    'apellidos': empleado.apellidos,
-                    'nombre_completo': empleado.nombre_completo,
-                    'dni': empleado.dni,
-                }
-            })
+            return JsonResponse({'success': True, 'empleado': empleado})
         else:
             return JsonResponse({'success': False, 'error': 'Dispositivo no vinculado a un empleado'}, status=404)
     except json.JSONDecodeError:
@@ -397,9 +492,9 @@ def api_identificar_por_fingerprint(request):
 
 
 @require_http_methods(["POST", "OPTIONS"])
-def api_vincular_fingerprint(request):
+async def api_vincular_fingerprint(request):
     """
-    Vincula el fingerprint al empleado seleccionado (primera vez).
+    Vincula el fingerprint al empleado seleccionado (primera vez). Vista async.
     """
     if request.method == 'OPTIONS':
         return JsonResponse({'success': True})
@@ -409,9 +504,9 @@ def api_vincular_fingerprint(request):
         fingerprint = data.get('fingerprint')
         if not empleado_id or not fingerprint:
             return JsonResponse({'success': False, 'error': 'Empleado y fingerprint requeridos'}, status=400)
-        empleado = Empleado.objects.get(id_empleado=empleado_id)
+        empleado = await Empleado.objects.aget(id_empleado=empleado_id)
         # Reasignación permitida: si el fingerprint existe con otro empleado, se actualiza al elegido
-        DispositivoEmpleado.objects.update_or_create(
+        await DispositivoEmpleado.objects.aupdate_or_create(
             fingerprint=fingerprint,
             defaults={'empleado': empleado}
         )
@@ -423,9 +518,9 @@ def api_vincular_fingerprint(request):
 
 
 @require_http_methods(["POST", "OPTIONS"])
-def api_desvincular_fingerprint(request):
+async def api_desvincular_fingerprint(request):
     """
-    Desvincula el fingerprint del dispositivo actual para permitir seleccionar de nuevo.
+    Desvincula el fingerprint del dispositivo actual para permitir seleccionar de nuevo. Vista async.
     """
     if request.method == 'OPTIONS':
         return JsonResponse({'success': True})
@@ -434,19 +529,54 @@ def api_desvincular_fingerprint(request):
         fingerprint = data.get('fingerprint')
         if not fingerprint:
             return JsonResponse({'success': False, 'error': 'Fingerprint requerido'}, status=400)
-        borrados, detalle = DispositivoEmpleado.objects.filter(fingerprint=fingerprint).delete()
+        borrados, detalle = await DispositivoEmpleado.objects.filter(fingerprint=fingerprint).adelete()
         return JsonResponse({'success': True, 'deleted': borrados})
     except Exception as e:
         return JsonResponse({'success': False, 'error': f'Error del servidor: {str(e)}'}, status=500)
 
 
+@require_http_methods(["POST", "OPTIONS"])
+def api_sincronizar_registros(request):
+    """
+    Recibe en un solo lote las marcas guardadas sin conexión por el service worker.
+    Cada marca trae su clave de idempotencia y la fecha/hora del dispositivo;
+    responde el estado de cada una en el mismo orden.
+    """
+    if request.method == 'OPTIONS':
+        return JsonResponse({'success': True})
+    try:
+        data = json.loads(request.body)
+        marcas = data.get('registros') if isinstance(data, dict) else None
+        if not isinstance(marcas, list) or not marcas:
+            return JsonResponse({'success': False, 'error': 'Registros requeridos'}, status=400)
+        if len(marcas) > AsistenciaService.MAX_LOTE_SINCRONIZACION:
+            return JsonResponse({
+                'success': False,
+                'error': f'Máximo {AsistenciaService.MAX_LOTE_SINCRONIZACION} registros por lote'
+            }, status=400)
+        resultados = AsistenciaService.sincronizar_registros(marcas)
+        return JsonResponse({'success': True, 'resultados': resultados})
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Datos JSON inválidos'}, status=400)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': f'Error del servidor: {str(e)}'}, status=500)
+
+
+def service_worker(request):
+    """
+    Service worker de la cola de registros sin conexión.
+    Se sirve desde la raíz del sitio para que su alcance cubra los formularios de registro.
+    """
+    response = render(request, 'sw.js', content_type='application/javascript')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
 def registrar_asistencia(request):
     """
     Vista tradicional para registrar la asistencia de un empleado.
     Mantenida para compatibilidad.
     """
-    empleados = Empleado.objects.all()
-    tipos_evento = TipoAsistencia.objects.all()
+    tipos_evento = CatalogoTipos.todos()
 
     if request.method == 'POST':
         empleado_id = request.POST.get('empleado')
@@ -457,10 +587,7 @@ def registrar_asistencia(request):
         # Validar datos requeridos
         if not empleado_id or not tipo_id:
             messages.error(request, 'Debe seleccionar un empleado y tipo de asistencia.')
-            return render(request, 'formulario.html', {
-                'empleados': empleados,
-                'tipos_evento': tipos_evento
-            })
+            return render(request, 'formulario.html', {'tipos_evento': tipos_evento})
 
         # Usar el servicio para crear el registro
         success, message, registro = AsistenciaService.crear_registro_asistencia(
@@ -488,10 +615,7 @@ def registrar_asistencia(request):
         else:
             messages.error(request, message)
 
-    return render(request, 'formulario.html', {
-        'empleados': empleados,
-        'tipos_evento': tipos_evento
-    })
+    return render(request, 'formulario.html', {'tipos_evento': tipos_evento})
 
 
 # ACTIVIDADES deshabilitadas: vista temporalmente comentada
@@ -65,6 +65,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Métricas por vista (Server-Timing y /login/metricas/ en formato Prometheus, ver app/metricas.py).
+# Va primero para medir también el resto de middlewares.
+METRICAS_ACTIVAS = str(os.getenv('METRICAS_ACTIVAS', 'False')).lower() in ['1', 'true', 'yes', 'on']
+METRICAS_MUESTRAS = int(os.getenv('METRICAS_MUESTRAS', 1000))  # Últimas peticiones por vista para los cuantiles
+if METRICAS_ACTIVAS:
+    MIDDLEWARE.insert(0, 'app.metricas.MetricasMiddleware')
+
 ROOT_URLCONF = 'control_asistencia.urls'
 
 TEMPLATES = [
@@ -92,13 +99,30 @@ DATABASE_URL=os.getenv("DATABASE_URL")
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 USE_POSTGRES = str(DB_LIVE).lower() in ["1", "true", "yes"]
 
+# Reutilización de conexiones (solo para DATABASE_URL):
+# - none: una conexión nueva por petición (comportamiento original)
+# - persistent: conexiones persistentes por worker con health checks (DB_CONN_MAX_AGE segundos)
+# - pool: pool nativo de Django 5.1; requiere psycopg 3 (pip install "psycopg[binary,pool]")
+DB_CONN_MODE = os.getenv('DB_CONN_MODE', 'none').lower()
+# Con workers ASGI (SERVIDOR_PERFIL=asgi, ver gunicorn.conf.py) Django no admite conexiones
+# persistentes: cada hilo de sync_to_async dejaría la suya abierta. Se usa pool o none.
+if DB_CONN_MODE == 'persistent' and os.getenv('SERVIDOR_PERFIL', 'wsgi').lower() == 'asgi':
+    DB_CONN_MODE = 'none'
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '4'))
+# pgbouncer en modo transaction (p. ej. Supabase puerto 6543): sin cursores del lado del servidor
+# ni sentencias preparadas, porque cada transacción puede caer en otra conexión del servidor
+DB_PGBOUNCER = str(os.getenv('DB_PGBOUNCER', 'True')).lower() in ['1', 'true', 'yes', 'on']
+
 if DATABASE_URL:
     # Prefer DATABASE_URL when provided (e.g., Supabase)
     try:
         DATABASES = {
             'default': dj_database_url.config(
                 default=DATABASE_URL,
-                conn_max_age=0,  # No mantener conexiones persistentes con pgbouncer
+                # Con pool o sin reutilización, Django exige conn_max_age=0
+                conn_max_age=DB_CONN_MAX_AGE if DB_CONN_MODE == 'persistent' else 0,
                 conn_health_checks=True,  # Verificar salud de conexiones
                 ssl_require=True,
             )
@@ -109,6 +133,16 @@ if DATABASE_URL:
             'connect_timeout': 10,
             'options': '-c statement_timeout=30000'  # 30 segundos timeout
         }
+        if DB_PGBOUNCER:
+            DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+        if DB_CONN_MODE == 'pool':
+            DATABASES['default']['OPTIONS']['pool'] = {
+                'min_size': DB_POOL_MIN_SIZE,
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': 10,
+            }
+            if DB_PGBOUNCER:
+                DATABASES['default']['OPTIONS']['prepare_threshold'] = None
     except Exception:
         # Fall back to explicit variables if URL is invalid
         if USE_POSTGRES:
@@ -175,6 +209,41 @@ else:
 
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Con REDIS_URL la caché es compartida entre workers (requiere `pip install redis`);
+# sin ella se usa memoria local del proceso. Las versiones de las cachés en memoria
+# viven en la base de datos (VersionDatos): sin Redis otro worker ve una invalidación
+# como mucho CacheVersionada.VERSION_TTL segundos después.
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Segundos que se conserva el vínculo fingerprint -> empleado en caché.
+# Con caché local se usa un valor corto porque otros workers no reciben la invalidación.
+FINGERPRINT_CACHE_TTL = int(os.getenv('FINGERPRINT_CACHE_TTL', 86400 if REDIS_URL else 300))
+FINGERPRINT_CACHE_TTL_NEGATIVO = int(os.getenv('FINGERPRINT_CACHE_TTL_NEGATIVO', 30))
+
+# Notificaciones en tiempo real (SSE) de registros de asistencia (ver app/eventos.py):
+# - memoria: solo llegan a las conexiones del mismo proceso (un worker)
+# - postgres: LISTEN/NOTIFY entre todos los workers; requiere Postgres con conexión
+#   de sesión (no pgbouncer en modo transaction)
+EVENTOS_BACKEND = os.getenv('EVENTOS_BACKEND', 'memoria').lower()
+EVENTOS_MAX_COLA = int(os.getenv('EVENTOS_MAX_COLA', 100))  # Eventos pendientes por conexión
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -216,6 +285,19 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 # Use ManifestStaticFilesStorage to avoid cache issues during updates
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Archivos generados por la app (reportes de procesar_reportes). No se publican:
+# se descargan por una vista con login. Web y worker deben compartir este directorio.
+MEDIA_ROOT = Path(os.getenv('MEDIA_ROOT', BASE_DIR / 'media'))
+
+# Exportaciones en segundo plano (ReporteJob + manage.py procesar_reportes). Solo debe
+# activarse si hay un worker corriendo y comparte MEDIA_ROOT con la web; sin worker los
+# botones de la página de descargas usan las descargas directas por streaming.
+REPORTES_SEGUNDO_PLANO = str(os.getenv('REPORTES_SEGUNDO_PLANO', 'False')).lower() in ['1', 'true', 'yes', 'on']
+
+# Caché en disco de reportes generados (ver app/cache_reportes.py). 0 la desactiva.
+REPORTES_CACHE_DIR = Path(os.getenv('REPORTES_CACHE_DIR', MEDIA_ROOT / 'cache_reportes'))
+REPORTES_CACHE_MAX_MB = int(os.getenv('REPORTES_CACHE_MAX_MB', 500))  # Tamaño máximo; se eliminan los menos usados
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
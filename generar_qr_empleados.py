@@ -1,9 +1,10 @@
 #!/usr/bin/env python
 """
 Script para generar códigos QR para todos los empleados.
-Ejecutar: python generar_qr_empleados.py
+Ejecutar: python generar_qr_empleados.py [--workers N]
 """
 
+import argparse
 import os
 import django
 import sys
@@ -15,38 +16,19 @@ django.setup()
 from app.models import Empleado
 from app.qr_service import QRService
 
-def generar_qr_todos():
-    """Genera códigos QR para todos los empleados."""
+def generar_qr_todos(workers=None):
+    """Genera códigos QR para todos los empleados (en paralelo)."""
     print("🔄 Generando códigos QR para todos los empleados...")
     
-    empleados = Empleado.objects.all()
-    print(f"📊 Total de empleados: {empleados.count()}")
+    empleados = list(Empleado.objects.all())
+    print(f"📊 Total de empleados: {len(empleados)}")
     
-    archivos_generados = []
-    
-    for empleado in empleados:
-        try:
-            print(f"👤 Procesando: {empleado.nombre_completo}")
-            
-            # Generar código QR si no existe
-            codigo_qr = empleado.generar_codigo_qr()
-            print(f"   📱 Código QR: {codigo_qr}")
-            
-            # Generar archivo QR
-            archivo = QRService.generar_qr_empleado(empleado)
-            print(f"   💾 Archivo: {archivo}")
-            
-            archivos_generados.append({
-                'empleado': empleado,
-                'codigo_qr': codigo_qr,
-                'archivo': archivo
-            })
-            
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
+    resultado = QRService.generar_qr_masivo(empleados, workers=workers)
+    archivos_generados = resultado['archivos']
     
     print(f"\n✅ Proceso completado!")
-    print(f"📁 Archivos generados: {len(archivos_generados)}")
+    print(f"📁 Archivos generados: {resultado['generados']} | sin cambios: {resultado['omitidos']} | errores: {resultado['errores']}")
+    print(f"⏱️  {resultado['segundos']:.2f}s ({resultado['imagenes_por_segundo']:.1f} imágenes/s)")
     
     # Mostrar resumen
     print("\n📋 Resumen de códigos QR generados:")
@@ -56,8 +38,12 @@ def generar_qr_todos():
     return archivos_generados
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera los PNG de QR de todos los empleados.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Procesos para renderizar (por defecto, uno por CPU; 1 = sin paralelismo)')
+    args = parser.parse_args()
     try:
-        archivos = generar_qr_todos()
+        archivos = generar_qr_todos(args.workers)
         print(f"\n🎉 ¡Códigos QR generados exitosamente para {len(archivos)} empleados!")
     except Exception as e:
         print(f"\n❌ Error durante la generación: {e}")
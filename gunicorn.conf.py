@@ -0,0 +1,33 @@
+"""
+Configuración de gunicorn (se carga automáticamente desde el directorio del proyecto).
+
+SERVIDOR_PERFIL elige el tipo de worker:
+- wsgi (por defecto): workers síncronos sobre control_asistencia.wsgi. Con WEB_THREADS > 1
+  cada worker atiende esa cantidad de peticiones a la vez en hilos (gthread).
+- asgi: workers uvicorn (paquete uvicorn-worker) sobre control_asistencia.asgi. Las APIs
+  JSON de identificación son async y un worker atiende muchas a la vez mientras esperan
+  a la base de datos. Las vistas síncronas (formularios de registro, exportaciones,
+  admin) corren con sync_to_async(thread_sensitive=True) dentro del ThreadSensitiveContext
+  que ASGIHandler abre por petición: cada petición usa su propio hilo, así que un worker
+  atiende varias a la vez sin tope propio (WEB_THREADS no aplica). El límite práctico es
+  la base de datos (cada hilo toma su conexión; con DB_CONN_MODE=pool esperan a
+  DB_POOL_MAX_SIZE) y el GIL en el trabajo de CPU, como generar una exportación.
+
+La cantidad de workers se toma de WEB_CONCURRENCY (por defecto 1) y el puerto de PORT.
+Para aprovechar varios núcleos se suben los procesos (WEB_CONCURRENCY); las peticiones
+simultáneas por worker las dan WEB_THREADS (wsgi) o los hilos por petición (asgi), y las
+conexiones resultantes deben entrar en el límite de la base de datos o de pgbouncer.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+SERVIDOR_PERFIL = os.getenv('SERVIDOR_PERFIL', 'wsgi').lower()
+
+if SERVIDOR_PERFIL == 'asgi':
+    wsgi_app = 'control_asistencia.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'control_asistencia.wsgi:application'
+    threads = int(os.getenv('WEB_THREADS', '1'))
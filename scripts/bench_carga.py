@@ -0,0 +1,292 @@
+"""
+Prueba de carga del registro de entrada en hora punta.
+
+Crea una base de datos de prueba aparte (test_<nombre>, como `manage.py test`), la
+pobla por inserciones masivas al estilo de cargar_empleados.py (empleados, tipos y
+dispositivos vinculados) y ejecuta concurrentemente los flujos reales de la mañana
+contra las vistas, con un cliente por hilo:
+
+- dispositivo vinculado: api_identificar_por_fingerprint + POST registrar_asistencia_auto
+- primera vez: api_vincular_fingerprint + POST registrar_asistencia_auto
+- QR personal: GET + POST registrar_asistencia_qr
+
+Una fracción de los empleados envía dos veces el registro (doble toque) para
+ejercitar la restricción única. Al final reporta rendimiento, latencias p50/p95/p99
+y consultas por operación, resultados de los registros y verifica en la base de
+datos que no haya duplicados.
+
+Uso:
+    python scripts/bench_carga.py                              # 500 empleados, 16 hilos
+    python scripts/bench_carga.py --empleados 3000 --hilos 32 --json resultados.json
+    DATABASE_URL=postgres://... python scripts/bench_carga.py  # requiere permiso CREATEDB
+
+Con SQLite la base de prueba es un archivo temporal; las escrituras se serializan,
+así que los números solo sirven para comparar cambios, no para dimensionar.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Caché local del proceso: no tocar las versiones ni los fingerprints del Redis real
+os.environ.pop('REDIS_URL', None)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'control_asistencia.settings')
+import django
+django.setup()
+
+from django.contrib.messages import get_messages
+from django.db import close_old_connections, connection
+from django.db.models import Count
+from django.test import Client
+
+from app.models import Empleado, TipoAsistencia, DispositivoEmpleado, RegistroAsistencia
+
+TIPOS = [
+    'Entrada', 'Salida', 'Inicio Almuerzo', 'Fin Almuerzo',
+    'Entrada por comisión', 'Salida por comisión',
+    'Entrada por otros', 'Salida por otros'
+]
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not valores:
+        return 0.0
+    k = max(0, min(len(valores) - 1, round(p / 100 * len(valores)) - 1))
+    return valores[k]
+
+
+def crear_base_prueba(keepdb):
+    """Crea la base de prueba y retorna el nombre original para destruirla al final."""
+    nombre_original = connection.settings_dict['NAME']
+    if connection.vendor == 'sqlite':
+        # Archivo en lugar de memoria compartida: varios hilos escriben a la vez
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(
+            tempfile.gettempdir(), 'bench_carga.sqlite3'
+        )
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb, serialize=False)
+    return nombre_original
+
+
+def poblar(empleados, vinculados, semilla):
+    """
+    Inserta empleados con código QR, los tipos de asistencia y los dispositivos vinculados.
+
+    Returns:
+        list: Tareas (flujo, empleado_id, codigo_qr, fingerprint) en orden aleatorio
+    """
+    rnd = random.Random(semilla)
+    RegistroAsistencia.objects.all().delete()
+    DispositivoEmpleado.objects.all().delete()
+    Empleado.objects.all().delete()
+    Empleado.objects.bulk_create([
+        Empleado(nombres=f"Nombre{i}", apellidos=f"Apellido{i}", dni=20000000 + i,
+                 contrato='Planilla', codigo_qr=f"CARGA{i:08d}")
+        for i in range(empleados)
+    ], batch_size=1000)
+    for nombre in TIPOS:
+        TipoAsistencia.objects.get_or_create(nombre_asistencia=nombre)
+
+    tareas = []
+    dispositivos = []
+    for empleado_id, codigo_qr in Empleado.objects.values_list('id_empleado', 'codigo_qr'):
+        fingerprint = f"fp-carga-{empleado_id}"
+        sorteo = rnd.random()
+        if sorteo < vinculados:
+            dispositivos.append(DispositivoEmpleado(empleado_id=empleado_id, fingerprint=fingerprint))
+            flujo = 'vinculado'
+        elif sorteo < vinculados + (1 - vinculados) / 2:
+            flujo = 'primera_vez'
+        else:
+            flujo = 'qr'
+        tareas.append((flujo, empleado_id, codigo_qr, fingerprint))
+    DispositivoEmpleado.objects.bulk_create(dispositivos, batch_size=1000)
+    return tareas
+
+
+class Carga:
+    """Ejecuta las tareas en hilos y acumula latencias, consultas y resultados."""
+
+    def __init__(self, tipo_entrada):
+        self.tipo_entrada = tipo_entrada
+        self.lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.consultas = defaultdict(int)
+        self.resultados = Counter()
+        self.errores = {}  # Último error 5xx por operación
+
+    def _pedir(self, cliente, operacion, metodo, ruta, **kwargs):
+        consultas = [0]
+
+        def contar(execute, sql, params, many, context):
+            consultas[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(contar):
+            inicio = time.perf_counter()
+            response = getattr(cliente, metodo)(ruta, **kwargs)
+            # Como request_finished en el servidor: cierra o reutiliza según CONN_MAX_AGE
+            close_old_connections()
+            duracion = time.perf_counter() - inicio
+        with self.lock:
+            self.latencias[operacion].append(duracion * 1000)
+            self.consultas[operacion] += consultas[0]
+            if response.status_code >= 500:
+                self.resultados['error_servidor'] += 1
+                self.errores[operacion] = response.content[:300]
+        return response
+
+    def _registrar(self, cliente, operacion, ruta, fingerprint):
+        response = self._pedir(cliente, operacion, 'post', ruta, data={
+            'tipo_evento': self.tipo_entrada, 'fingerprint': fingerprint,
+        })
+        if response.status_code >= 500:
+            return
+        # Las plantillas renderizadas no sirven con hilos (la señal es global): se usan los mensajes
+        mensajes = [str(m) for m in get_messages(response.wsgi_request)]
+        if any(m.endswith('registrada correctamente.') for m in mensajes):
+            resultado = 'registrado'
+        elif any(m.startswith('Ya registraste') for m in mensajes):
+            resultado = 'duplicado_rechazado'
+        else:
+            resultado = 'rechazado'
+        with self.lock:
+            self.resultados[resultado] += 1
+
+    def ejecutar_todas(self, tareas, hilos):
+        """Reparte las tareas entre los hilos; cada hilo cierra su conexión al terminar."""
+        pendientes = iter(tareas)
+
+        def trabajar():
+            try:
+                while True:
+                    with self.lock:
+                        tarea = next(pendientes, None)
+                    if tarea is None:
+                        return
+                    try:
+                        self.ejecutar(tarea)
+                    except Exception as e:
+                        with self.lock:
+                            self.resultados[f'excepcion_{type(e).__name__}'] += 1
+            finally:
+                connection.close()
+
+        trabajadores = [threading.Thread(target=trabajar) for _ in range(hilos)]
+        for t in trabajadores:
+            t.start()
+        for t in trabajadores:
+            t.join()
+
+    def ejecutar(self, tarea):
+        flujo, empleado_id, codigo_qr, fingerprint = tarea
+        # Un cliente (cookies) por tarea, como cada teléfono
+        cliente = Client(HTTP_HOST='localhost', raise_request_exception=False)
+        if flujo == 'vinculado':
+            self._pedir(cliente, 'identificar_fingerprint', 'post', '/api/identificar-fingerprint/',
+                        data={'fingerprint': fingerprint}, content_type='application/json')
+            self._registrar(cliente, 'registro_auto', f'/auto/empleado/{empleado_id}/', fingerprint)
+        elif flujo == 'primera_vez':
+            self._pedir(cliente, 'vincular_fingerprint', 'post', '/api/vincular-fingerprint/',
+                        data={'empleado_id': empleado_id, 'fingerprint': fingerprint},
+                        content_type='application/json')
+            self._registrar(cliente, 'registro_auto', f'/auto/empleado/{empleado_id}/', fingerprint)
+        else:
+            self._pedir(cliente, 'formulario_qr', 'get', f'/qr/{codigo_qr}/')
+            self._registrar(cliente, 'registro_qr', f'/qr/{codigo_qr}/', fingerprint)
+
+
+def verificar(empleados_esperados):
+    """Cuenta registros y duplicados (empleado, tipo, fecha) en la base de prueba."""
+    duplicados = RegistroAsistencia.objects.values('empleado', 'tipo', 'fecha_registro') \
+        .annotate(n=Count('id_registro')).filter(n__gt=1).count()
+    total = RegistroAsistencia.objects.count()
+    return {
+        'registros_en_bd': total,
+        'empleados_sin_registro': empleados_esperados - RegistroAsistencia.objects.values('empleado').distinct().count(),
+        'duplicados_en_bd': duplicados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--empleados', type=int, default=500)
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--vinculados', type=float, default=0.7,
+                        help='Fracción de empleados con dispositivo ya vinculado (el resto: mitad primera vez, mitad QR)')
+    parser.add_argument('--repetidos', type=float, default=0.1,
+                        help='Fracción de empleados que envía el registro dos veces')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--keepdb', action='store_true', help='Conserva la base de prueba entre ejecuciones')
+    parser.add_argument('--json', help='Archivo donde guardar los resultados')
+    args = parser.parse_args()
+
+    nombre_original = crear_base_prueba(args.keepdb)
+    try:
+        tareas = poblar(args.empleados, args.vinculados, args.semilla)
+        rnd = random.Random(args.semilla)
+        tareas += rnd.sample(tareas, int(len(tareas) * args.repetidos))
+        rnd.shuffle(tareas)
+        carga = Carga(TipoAsistencia.objects.get(nombre_asistencia='Entrada').id_tipo)
+
+        inicio = time.perf_counter()
+        carga.ejecutar_todas(tareas, args.hilos)
+        duracion = time.perf_counter() - inicio
+        peticiones = sum(len(v) for v in carga.latencias.values())
+
+        resultado = {
+            'motor': connection.vendor,
+            'empleados': args.empleados,
+            'hilos': args.hilos,
+            'tareas': len(tareas),
+            'peticiones': peticiones,
+            'segundos': round(duracion, 3),
+            'peticiones_por_segundo': round(peticiones / duracion, 1),
+            'operaciones': {},
+            'resultados': dict(carga.resultados),
+            **verificar(args.empleados),
+        }
+        print(f"{connection.vendor} | {len(tareas)} tareas, {peticiones} peticiones en {duracion:.2f}s "
+              f"({resultado['peticiones_por_segundo']} pet/s, {args.hilos} hilos)")
+        print(f"{'operación':<26}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'consultas':>11}")
+        for operacion, latencias in sorted(carga.latencias.items()):
+            latencias.sort()
+            fila = {
+                'n': len(latencias),
+                'p50_ms': round(percentil(latencias, 50), 2),
+                'p95_ms': round(percentil(latencias, 95), 2),
+                'p99_ms': round(percentil(latencias, 99), 2),
+                'consultas_promedio': round(carga.consultas[operacion] / len(latencias), 2),
+            }
+            resultado['operaciones'][operacion] = fila
+            print(f"{operacion:<26}{fila['n']:>7}{fila['p50_ms']:>10.2f}{fila['p95_ms']:>10.2f}"
+                  f"{fila['p99_ms']:>10.2f}{fila['consultas_promedio']:>11.2f}")
+        print("Resultados:", ", ".join(f"{k}={v}" for k, v in sorted(carga.resultados.items())))
+        for operacion, contenido in carga.errores.items():
+            print(f"Último error en {operacion}: {contenido!r}")
+        print(f"En BD: {resultado['registros_en_bd']} registros, {resultado['duplicados_en_bd']} duplicados, "
+              f"{resultado['empleados_sin_registro']} empleados sin registro")
+
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as archivo:
+                json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0, keepdb=args.keepdb)
+
+    errores = sum(v for k, v in carga.resultados.items() if k.startswith(('error', 'excepcion')))
+    return 1 if resultado['duplicados_en_bd'] or errores else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
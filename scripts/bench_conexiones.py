@@ -0,0 +1,98 @@
+"""
+Benchmark de latencia por petición según el modo de conexión a la base de datos.
+
+Ejecuta N peticiones a través del handler WSGI real (el mismo ciclo que usa gunicorn:
+request_started/request_finished cierran o reutilizan la conexión según CONN_MAX_AGE)
+y reporta p50/p99 por modo.
+
+Uso:
+    python scripts/bench_conexiones.py                      # modo actual (DB_CONN_MODE)
+    python scripts/bench_conexiones.py --comparar           # none, persistent y pool
+    python scripts/bench_conexiones.py --path /manual/ --peticiones 500
+
+Tiene sentido contra DATABASE_URL (Postgres/pgbouncer); con SQLite la conexión es casi gratis.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+MODOS = ['none', 'persistent', 'pool']
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not valores:
+        return 0.0
+    k = max(0, min(len(valores) - 1, round(p / 100 * len(valores)) - 1))
+    return valores[k]
+
+
+def medir(path, peticiones, calentamiento):
+    """Ejecuta las peticiones en este proceso y retorna las latencias en ms ordenadas."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'control_asistencia.settings')
+    import django
+    django.setup()
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+
+    handler = WSGIHandler()
+    factory = RequestFactory()
+
+    def peticion():
+        environ = factory._base_environ(PATH_INFO=path, REQUEST_METHOD='GET', HTTP_HOST='localhost')
+        response = handler(environ, lambda status, headers: None)
+        for _ in response:
+            pass
+        response.close()  # dispara request_finished, igual que el servidor WSGI
+
+    for _ in range(calentamiento):
+        peticion()
+
+    latencias = []
+    for _ in range(peticiones):
+        inicio = time.perf_counter()
+        peticion()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return sorted(latencias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='/manual/', help='Ruta a solicitar (por defecto /manual/)')
+    parser.add_argument('--peticiones', type=int, default=200)
+    parser.add_argument('--calentamiento', type=int, default=10)
+    parser.add_argument('--comparar', action='store_true', help='Ejecuta cada modo en un proceso aparte')
+    args = parser.parse_args()
+
+    if args.comparar:
+        print(f"{'modo':<12}{'p50 ms':>10}{'p99 ms':>10}")
+        for modo in MODOS:
+            env = dict(os.environ, DB_CONN_MODE=modo)
+            resultado = subprocess.run(
+                [sys.executable, __file__, '--path', args.path,
+                 '--peticiones', str(args.peticiones), '--calentamiento', str(args.calentamiento)],
+                env=env, capture_output=True, text=True,
+            )
+            if resultado.returncode != 0:
+                error = (resultado.stderr.strip().splitlines() or ['error desconocido'])[-1]
+                print(f"{modo:<12}  no disponible: {error}")
+                continue
+            print(resultado.stdout.strip().splitlines()[-1])
+        return 0
+
+    latencias = medir(args.path, args.peticiones, args.calentamiento)
+    modo = os.getenv('DB_CONN_MODE', 'none')
+    print(f"{modo:<12}{percentil(latencias, 50):>10.2f}{percentil(latencias, 99):>10.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
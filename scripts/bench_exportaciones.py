@@ -0,0 +1,286 @@
+"""
+Benchmark de las exportaciones y del resumen sobre historiales sintéticos.
+
+Crea una base de datos de prueba aparte (test_<nombre>, como `manage.py test`) y la
+llena por etapas con marcas sintéticas (Entrada, almuerzo, Salida y comisiones
+ocasionales) hasta cada tamaño pedido. En cada tamaño mide:
+
+- exportar_asistencia_excel y exportar_resumen_excel en Excel y CSV (vistas reales, respuesta consumida)
+- exportar_resumen_excel repetido con CacheReportes (acierto: sin registros nuevos)
+- ReporteService.obtener_datos_resumen
+- ReporteService.reconstruir_resumen (necesario para el Excel de resumen)
+
+Para cada operación reporta tiempo, pico de memoria de Python (tracemalloc, en una
+segunda pasada para no inflar el tiempo), RSS máximo del proceso hasta ese momento
+y tamaño de la salida. Los resultados se guardan en JSON y pueden compararse con
+una ejecución anterior para detectar regresiones.
+
+Uso:
+    python scripts/bench_exportaciones.py                                   # 10k y 100k filas
+    python scripts/bench_exportaciones.py --filas 10000 100000 1000000 --json base.json
+    python scripts/bench_exportaciones.py --json nuevo.json --comparar base.json --tolerancia 0.2
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, time as dtime, timedelta
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.pop('REDIS_URL', None)  # No tocar la caché compartida real
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'control_asistencia.settings')
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+
+from app.models import Empleado, TipoAsistencia, RegistroAsistencia
+from app.services import ReporteService
+
+# Marcas de un día típico: (tipo, hora base, minutos de variación)
+JORNADA = [
+    ('Entrada', dtime(8, 0), 30),
+    ('Inicio Almuerzo', dtime(13, 0), 20),
+    ('Fin Almuerzo', dtime(14, 0), 20),
+    ('Salida', dtime(17, 30), 45),
+]
+COMISION = [('Salida por comisión', dtime(10, 0), 30), ('Entrada por comisión', dtime(11, 30), 30)]
+TIPOS = [
+    'Entrada', 'Salida', 'Inicio Almuerzo', 'Fin Almuerzo',
+    'Entrada por comisión', 'Salida por comisión',
+    'Entrada por otros', 'Salida por otros'
+]
+INICIO = date(2023, 1, 2)
+
+
+def crear_base_prueba():
+    """Crea la base de prueba y retorna el nombre original para destruirla al final."""
+    nombre_original = connection.settings_dict['NAME']
+    if connection.vendor == 'sqlite':
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(
+            tempfile.gettempdir(), 'bench_exportaciones.sqlite3'
+        )
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    return nombre_original
+
+
+def generar_marcas(empleados, tipos, semilla):
+    """
+    Genera marcas sin fin, día por día y empleado por empleado.
+
+    Yields:
+        RegistroAsistencia sin guardar
+    """
+    rnd = random.Random(semilla)
+    dia = 0
+    while True:
+        fecha = INICIO + timedelta(days=dia)
+        for empleado_id in empleados:
+            marcas = JORNADA + (COMISION if rnd.random() < 0.1 else [])
+            for nombre, base, variacion in marcas:
+                minutos = base.hour * 60 + base.minute + rnd.randint(-variacion, variacion)
+                tipo = tipos[nombre]
+                yield RegistroAsistencia(
+                    empleado_id=empleado_id, tipo=tipo, tipo_unico=tipo.es_tipo_unico,
+                    fecha_registro=fecha,
+                    hora_registro=dtime(minutos // 60, minutos % 60, rnd.randint(0, 59)),
+                    fingerprint=f"fp-bench-{empleado_id}",
+                )
+        dia += 1
+
+
+def insertar(marcas, cantidad, lote=5000):
+    """Inserta las siguientes `cantidad` marcas por lotes (bulk_create no llama a save())."""
+    pendientes = []
+    for _ in range(cantidad):
+        pendientes.append(next(marcas))
+        if len(pendientes) >= lote:
+            RegistroAsistencia.objects.bulk_create(pendientes)
+            pendientes = []
+    if pendientes:
+        RegistroAsistencia.objects.bulk_create(pendientes)
+
+
+def medir(funcion, memoria=True):
+    """
+    Ejecuta la función dos veces: una para el tiempo y otra con tracemalloc
+    (tracemalloc hace mucho más lenta la ejecución).
+
+    Args:
+        funcion: Operación a medir
+        memoria: False omite la pasada con tracemalloc (pico_python_mb queda en None)
+
+    Returns:
+        dict: segundos, pico_python_mb, rss_max_mb y salida (valor que retorna la función)
+    """
+    inicio = time.perf_counter()
+    salida = funcion()
+    segundos = time.perf_counter() - inicio
+
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+    return {
+        'segundos': round(segundos, 3),
+        'pico_python_mb': round(pico / (1024 * 1024), 2) if pico is not None else None,
+        'rss_max_mb': round(rss_mb, 1),
+        'salida': salida,
+    }
+
+
+def con_cache(funcion):
+    """Ejecuta la función con CacheReportes activa (el resto de mediciones la tiene apagada)."""
+    def envuelta():
+        settings.REPORTES_CACHE_MAX_MB = 1024
+        try:
+            return funcion()
+        finally:
+            settings.REPORTES_CACHE_MAX_MB = 0
+    return envuelta
+
+
+def descargar(cliente, ruta):
+    """Pide una exportación y consume la respuesta en streaming; retorna los bytes recibidos."""
+    response = cliente.get(ruta)
+    if response.status_code != 200:
+        raise RuntimeError(f"{ruta} respondió {response.status_code}")
+    total = sum(len(bloque) for bloque in response.streaming_content)
+    response.close()
+    return total
+
+
+# Diferencias absolutas por debajo de estas se consideran ruido
+MINIMO_COMPARABLE = {'segundos': 0.1, 'pico_python_mb': 1.0}
+
+
+def comparar(actual, base, tolerancia):
+    """
+    Compara tiempos y picos de memoria con una ejecución anterior.
+
+    Returns:
+        list: Descripciones de las regresiones encontradas
+    """
+    regresiones = []
+    for filas, operaciones in actual['resultados'].items():
+        for operacion, valores in operaciones.items():
+            anterior = base.get('resultados', {}).get(filas, {}).get(operacion)
+            if not anterior:
+                continue
+            for metrica, minimo in MINIMO_COMPARABLE.items():
+                previo, nuevo = anterior.get(metrica), valores[metrica]
+                if previo is None or nuevo is None:
+                    continue
+                if nuevo > previo * (1 + tolerancia) and nuevo - previo >= minimo:
+                    regresiones.append(
+                        f"{operacion} con {filas} filas: {metrica} {previo} -> {nuevo}"
+                    )
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000],
+                        help='Tamaños del historial (cantidad de RegistroAsistencia)')
+    parser.add_argument('--empleados', type=int, default=200)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--sin-memoria', action='store_true',
+                        help='Omite la pasada con tracemalloc (útil con 1M de filas)')
+    parser.add_argument('--json', help='Archivo donde guardar los resultados')
+    parser.add_argument('--comparar', help='Resultados JSON anteriores para detectar regresiones')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='Aumento relativo permitido al comparar (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    nombre_original = crear_base_prueba()
+    # Las exportaciones se miden generando siempre el archivo; la caché solo en *_cache
+    settings.REPORTES_CACHE_DIR = tempfile.mkdtemp(prefix='bench_cache_reportes_')
+    settings.REPORTES_CACHE_MAX_MB = 0
+    try:
+        Empleado.objects.bulk_create([
+            Empleado(nombres=f"Nombre{i}", apellidos=f"Apellido{i}", dni=30000000 + i, contrato='Planilla')
+            for i in range(args.empleados)
+        ])
+        for nombre in TIPOS:
+            TipoAsistencia.objects.get_or_create(nombre_asistencia=nombre)
+        tipos = {t.nombre_asistencia: t for t in TipoAsistencia.objects.all()}
+        empleados = list(Empleado.objects.values_list('id_empleado', flat=True))
+        marcas = generar_marcas(empleados, tipos, args.semilla)
+
+        cliente = Client(HTTP_HOST='localhost')
+        cliente.force_login(User.objects.create_user('bench', is_staff=True))
+
+        resultado = {
+            'motor': connection.vendor,
+            'empleados': args.empleados,
+            'semilla': args.semilla,
+            'resultados': {},
+        }
+        print(f"{'filas':>9}  {'operación':<28}{'seg':>9}{'pico MB':>10}{'RSS MB':>9}  salida")
+        insertadas = 0
+        for filas in sorted(args.filas):
+            insertar(marcas, filas - insertadas)
+            insertadas = filas
+
+            operaciones = {
+                'reconstruir_resumen': lambda: ReporteService.reconstruir_resumen()[0],
+                'obtener_datos_resumen': lambda: len(ReporteService.obtener_datos_resumen()),
+                'exportar_asistencia_excel': lambda: descargar(cliente, '/login/descargar/asistencia'),
+                'exportar_resumen_excel': lambda: descargar(cliente, '/login/descargar/resumen/'),
+                'exportar_asistencia_csv': lambda: descargar(cliente, '/login/descargar/asistencia?formato=csv'),
+                'exportar_asistencia_csv_gz': lambda: descargar(cliente, '/login/descargar/asistencia?formato=csv.gz'),
+                'exportar_resumen_csv': lambda: descargar(cliente, '/login/descargar/resumen/?formato=csv'),
+                'exportar_resumen_excel_cache': con_cache(lambda: descargar(cliente, '/login/descargar/resumen/')),
+            }
+            por_operacion = resultado['resultados'][str(filas)] = {}
+            for operacion, funcion in operaciones.items():
+                if operacion.endswith('_cache'):
+                    funcion()  # Llena la caché (reconstruir_resumen la invalida) para medir el acierto
+                medicion = medir(funcion, memoria=not args.sin_memoria)
+                por_operacion[operacion] = medicion
+                unidad = 'bytes' if operacion.startswith('exportar') else 'empleado-días'
+                pico = '-' if medicion['pico_python_mb'] is None else f"{medicion['pico_python_mb']:.1f}"
+                print(f"{filas:>9}  {operacion:<28}{medicion['segundos']:>9.2f}"
+                      f"{pico:>10}{medicion['rss_max_mb']:>9.0f}  "
+                      f"{medicion['salida']} {unidad}")
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        shutil.rmtree(settings.REPORTES_CACHE_DIR, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            regresiones = comparar(resultado, json.load(archivo), args.tolerancia)
+        for regresion in regresiones:
+            print(f"REGRESIÓN: {regresion}")
+        if regresiones:
+            return 1
+        print("Sin regresiones respecto a", args.comparar)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
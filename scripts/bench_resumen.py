@@ -0,0 +1,102 @@
+"""
+Benchmark del cálculo de horas del resumen diario.
+
+Compara el cálculo por empleado-día (ReporteService.calcular_segundos_empleado sobre
+el diccionario que arma obtener_datos_resumen) con el cálculo por lotes en columnas
+(ReporteService.calcular_segundos_lote), sobre marcas sintéticas y sin base de datos.
+La equivalencia de ambos cálculos la verifican las pruebas (app/tests/test_calculo_resumen.py).
+
+Uso:
+    python scripts/bench_resumen.py                 # 100k empleado-días
+    python scripts/bench_resumen.py --dias 250000 --semilla 7
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date, time as dtime, timedelta
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'control_asistencia.settings')
+import django
+django.setup()
+
+from app.services import ReporteService
+
+NOMBRES_TIPO = {
+    1: 'Entrada', 2: 'Salida', 3: 'Inicio Almuerzo', 4: 'Fin Almuerzo',
+    5: 'Entrada por comisión', 6: 'Salida por comisión',
+    7: 'Entrada por otros', 8: 'Salida por otros',
+}
+
+
+def generar_marcas(dias, semilla):
+    """Genera marcas (empleado_id, fecha, tipo_id, hora) ordenadas por empleado, fecha y hora."""
+    rnd = random.Random(semilla)
+    empleados = max(1, dias // 250)
+    inicio = date(2024, 1, 1)
+    marcas = []
+    for i in range(dias):
+        empleado_id = i % empleados + 1
+        fecha = inicio + timedelta(days=i // empleados)
+        # Día típico con variaciones: faltan tipos, hay repetidos y horas desordenadas
+        tipos = rnd.sample(list(NOMBRES_TIPO), rnd.randint(1, 8))
+        if rnd.random() < 0.1:
+            tipos.append(rnd.choice(tipos))
+        horas = [dtime(rnd.randint(6, 20), rnd.randint(0, 59), rnd.randint(0, 59), rnd.randint(0, 999999))
+                 for _ in tipos]
+        for tipo_id, hora in sorted(zip(tipos, horas), key=lambda m: m[1]):
+            marcas.append((empleado_id, fecha, tipo_id, hora))
+    return marcas
+
+
+def por_dia(marcas):
+    """Cálculo actual: diccionario por empleado-día y una llamada por día."""
+    datos = defaultdict(lambda: defaultdict(list))
+    for empleado_id, fecha, tipo_id, hora in marcas:
+        datos[(empleado_id, fecha)][NOMBRES_TIPO[tipo_id]].append(hora)
+    return {clave: ReporteService.calcular_segundos_empleado(data) for clave, data in datos.items()}
+
+
+def por_lote(marcas):
+    """Cálculo por lotes sobre columnas."""
+    empleado_ids = [m[0] for m in marcas]
+    fechas = [m[1] for m in marcas]
+    tipo_ids = [m[2] for m in marcas]
+    microsegundos = [ReporteService.microsegundos(m[3]) for m in marcas]
+    return ReporteService.calcular_segundos_lote(
+        empleado_ids, fechas, tipo_ids, microsegundos, nombres_tipo=NOMBRES_TIPO
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dias', type=int, default=100_000, help='Cantidad de empleado-días')
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    marcas = generar_marcas(args.dias, args.semilla)
+    print(f"Empleado-días: {args.dias} | marcas: {len(marcas)}")
+
+    inicio = time.perf_counter()
+    por_dia(marcas)
+    t_dia = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    por_lote(marcas)
+    t_lote = time.perf_counter() - inicio
+
+    print(f"por día : {t_dia:8.3f}s")
+    print(f"por lote: {t_lote:8.3f}s  ({t_dia / t_lote:.1f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())